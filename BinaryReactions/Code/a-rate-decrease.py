@@ -6,8 +6,6 @@ function to the solution and then taking the decay constant as
 the rate of change.
 """
 import numpy as np
-import matplotlib.pyplot as plt
-import palettable as pl
 from binaryreaction import BinarySingular
 from helper import *
 
@@ -21,31 +19,44 @@ tau = np.linspace(0, 10, 1000)
 k = 1000
 s = 0.1
 
-# Initialize the BinaryReaction object
-br = BinarySingular(init_conc, tau, k, s)
 
-# Solve the system
-sol = br.solve()
+def compute() -> tuple:
+    """
+    Solves the system and fits the decay of a. Returns the solution and
+    the fitted curve, parameters and covariance.
+    """
+    # Initialize the BinaryReaction object
+    br = BinarySingular(init_conc, tau, k, s)
 
-# Plot the results
+    # Solve the system
+    sol = br.solve(method='exact')
+    fit, par, err = find_decay_parameter(tau, sol[0], return_curve_fit=True)
+    return sol, fit, par, err
 
-colors = pl.cartocolors.sequential.agSunset_7.hex_colors
-colors2 = pl.cartocolors.sequential.TealGrn_7.hex_colors
 
-plt.plot(tau, sol[0], c=colors[0], label='a')
-fit, par, err = find_decay_parameter(tau, sol[0], return_curve_fit=True)
+def plot(sol, fit, par, err) -> None:
+    import matplotlib.pyplot as plt
+    import palettable as pl
 
-plt.plot(tau, fit, c=colors2[0], label='fit')
+    colors = pl.cartocolors.sequential.agSunset_7.hex_colors
+    colors2 = pl.cartocolors.sequential.TealGrn_7.hex_colors
 
-# Create textbox with decay parameter
+    plt.plot(tau, sol[0], c=colors[0], label='a')
+    plt.plot(tau, fit, c=colors2[0], label='fit')
 
-textstr = '\n'.join((
-    r'$\tau=%.2f$' % (par[1], ),
-    r'$\sigma=%.2f$' % (err[1, 1], )))
-props = dict(boxstyle='round', facecolor='white', alpha=0.5)
+    # Create textbox with decay parameter
 
-plt.text(0.84, 0.14, textstr, transform=plt.gca().transAxes, fontsize=12,
-        verticalalignment='top', bbox=props)
+    textstr = '\n'.join((
+        r'$\tau=%.2f$' % (par[1], ),
+        r'$\sigma=%.2f$' % (err[1, 1], )))
+    props = dict(boxstyle='round', facecolor='white', alpha=0.5)
 
-plt.legend()
-plt.show()
+    plt.text(0.84, 0.14, textstr, transform=plt.gca().transAxes, fontsize=12,
+            verticalalignment='top', bbox=props)
+
+    plt.legend()
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot(*compute())
@@ -3,8 +3,6 @@ Basic test and run of the BinaryEquilibrium class. So solving
 binary reactions in the approximation of equilibrium.
 """
 import numpy 
-import matplotlib.pyplot as plt
-import palettable as pl
 from binaryreaction import BinaryEquilibrium
 
 # Define the initial concentrations
@@ -17,19 +15,32 @@ init_conc = [1, 0, 0, 0]
 # Define the time at which to evaluate the solution
 tau = numpy.linspace(0, 10, 1000)
 
-# Initialize the BinaryReaction object
-br = BinaryEquilibrium(init_conc, tau, k, s)
 
-# Solve the system
-sol = br.solve()
+def compute():
+    """
+    Solves the system in the approximation of equilibrium.
+    """
+    # Initialize the BinaryReaction object
+    br = BinaryEquilibrium(init_conc, tau, k, s)
 
-# Plot the results
-colors = pl.colorbrewer.sequential.Purples_7.hex_colors
+    # Solve the system
+    return br.solve()
 
-plt.plot(tau, sol[0], c="red", label='a')
-plt.plot(tau, sol[1], c="blue", label='a*')
-plt.plot(tau, sol[2], c="green", label='b')
-plt.plot(tau, sol[3], c=colors[5], label='c')
 
-plt.legend()
-plt.show()
+def plot(sol) -> None:
+    import matplotlib.pyplot as plt
+    import palettable as pl
+
+    colors = pl.colorbrewer.sequential.Purples_7.hex_colors
+
+    plt.plot(tau, sol.y[0], c="red", label='a')
+    plt.plot(tau, sol.y[1], c="blue", label='a*')
+    plt.plot(tau, sol.y[2], c="green", label='b')
+    plt.plot(tau, sol.y[3], c=colors[5], label='c')
+
+    plt.legend()
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot(compute())
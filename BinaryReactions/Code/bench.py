@@ -0,0 +1,68 @@
+"""
+Benchmarks of the BinaryReactions models, see mod105/benchmark.py. Run from the
+repository root, e.g.
+
+    python ./BinaryReactions/Code/bench.py run -o br.json
+    python ./BinaryReactions/Code/bench.py run --baseline br.json
+"""
+import sys
+import numpy as np
+import shared
+from mod105.benchmark import Benchmark, main
+from binaryreaction import BinaryReaction, BinaryEquilibrium, BinarySingular
+
+init_conc = np.array([1, 0, 0, 0])
+tau = np.linspace(0, 20, 1000)
+state = np.array([0.6, 0.01, 0.2, 0.2])
+
+# The equilibrium constant of basic.py, from fast to slow decay.
+regimes = {s: BinaryReaction(init_conc, tau, 1000, s) for s in (0.1, 1, 10)}
+
+# Constants spanning equilibrium.py and equilib-sweep.py. For k below
+# about 1/2 the equilibrium a blows up, which is not what is timed here.
+ks = np.logspace(0, 3, 50)
+ss = np.logspace(-2, 2, 50)
+
+benchmarks = [
+    Benchmark('br/rhs', lambda: regimes[0.1].rhs(0, state), number=1000),
+    Benchmark('br/jac', lambda: regimes[0.1].jac(0, state), number=1000),
+]
+for s, br in regimes.items():
+    benchmarks += [
+        # The explicit method crawls through the stiff regimes, once is enough.
+        Benchmark(f'br/solve-s{s}', lambda br=br: br.solve(cache=False),
+                  params={'k': 1000, 's': s, 'method': 'RK45'},
+                  repeat=5 if s < 1 else 1, memory=s < 1),
+        Benchmark(f'br/solve-stiff-s{s}', lambda br=br: br.solve(stiff=True, cache=False),
+                  params={'k': 1000, 's': s, 'method': 'BDF'}),
+    ]
+benchmarks += [
+    Benchmark('br/solve-sensitivities',
+              lambda: regimes[0.1].solve(stiff=True, sensitivities=['k', 's', ('init_conc', 0)], cache=False),
+              params={'k': 1000, 's': 0.1, 'method': 'BDF', 'parameters': 3}),
+    Benchmark('br/equilibrium', lambda: BinaryEquilibrium(init_conc, tau, 1000, 0.1).solve(cache=False),
+              params={'k': 1000, 's': 0.1}),
+    Benchmark('br/equilibrium-exact',
+              lambda: BinaryEquilibrium(init_conc, tau, 1000, 0.1).solve(method='exact', cache=False),
+              params={'k': 1000, 's': 0.1}),
+    Benchmark('br/singular', lambda: BinarySingular(init_conc, tau, 1000, 0.5).solve(cache=False),
+              params={'s': 0.5}),
+    Benchmark('br/singular-exact',
+              lambda: BinarySingular(init_conc, tau, 1000, 0.5).solve(method='exact', cache=False),
+              params={'s': 0.5}),
+    Benchmark('br/ensemble-stiff',
+              lambda: BinaryReaction(init_conc, tau, ks[::5], ss[::5]).solve_ensemble(stiff=True, cache=False),
+              params={'members': 100, 'method': 'BDF'}, repeat=3),
+    # All 2500 pairs in lockstep on a fixed grid.
+    Benchmark('br/ensemble-ros2',
+              lambda: BinaryReaction(init_conc, np.linspace(0, 20, 201), ks, ss).solve_ensemble(
+                  method='ROS2', cache=False),
+              params={'members': 2500, 'steps': 200, 'method': 'ROS2'}, repeat=3),
+    Benchmark('br/equilibrium-ensemble-exact',
+              lambda: BinaryEquilibrium(init_conc, np.linspace(0, 20, 100), ks, ss).solve_ensemble(
+                  method='exact', cache=False),
+              params={'members': 2500, 'points': 100}, repeat=3),
+]
+
+if __name__ == '__main__':
+    sys.exit(main(benchmarks))
@@ -3,9 +3,88 @@ Contains the BinaryReaction class, which is used to store information about a
 binary chemical reaction. It is used to simulate the reaction and plot the
 results.
 """
+import time
+import warnings
 import numpy as np
-from scipy.integrate import solve_ivp
+from scipy.optimize import OptimizeResult
+from scipy.sparse import bsr_matrix, diags
 from typing import Any, Iterable
+import shared
+from mod105.densesolution import DenseSolution
+from mod105.ensemble import METHODS as FIXED_METHODS, integrate
+from mod105.sensitivity import Sensitivities
+from mod105.solvecache import cached
+from mod105.solvestats import STIFF_METHODS, SolveStats, select_method, solve_ivp
+
+
+def _invert_time(time, dtime, a0, tau, growing, tol=1e-14, iterations=100):
+    """
+    Inverts the time t(a) it takes a to get from a0 to a, giving a on the
+    time grid tau for a whole batch of members at once.
+
+    Parameters
+    ----------
+    time : Callable
+        t(a), broadcasting like a0.
+    dtime : Callable
+        The derivative dt/da, i.e. 1/(da/dt).
+    a0 : np.ndarray
+        Initial values, shape (n_members, 1).
+    tau : np.ndarray
+        Times, shape (n_times,).
+    growing : np.ndarray
+        Whether a grows away from a0, shape (n_members, 1).
+
+    Returns
+    -------
+    np.ndarray
+        a with shape (n_members, n_times). Times a never reaches, e.g.
+        past a blow-up, are NaN.
+
+    Notes
+    -----
+    The iteration runs in v = ±ln(a/a0), in which t is increasing from
+    t(0) = 0. The root is first bracketed by doubling v, then found by
+    Newton steps, falling back to bisection whenever a step would leave
+    the bracket.
+    """
+    sign = np.where(growing, 1., -1.)
+    shape = np.broadcast_shapes(np.shape(a0), np.shape(tau))
+    tau = np.broadcast_to(tau, shape)
+
+    with np.errstate(all='ignore'):
+        lo = np.zeros(shape)
+        hi = np.ones(shape)
+        for _ in range(64):
+            short = time(a0 * np.exp(sign*hi)) < tau
+            if not short.any():
+                break
+            lo = np.where(short, hi, lo)
+            hi = np.where(short, 2*hi, hi)
+        reachable = time(a0 * np.exp(sign*hi)) >= tau
+
+        # Start from the initial rate of change, v ~ tau * |da/dt| / a0.
+        v = np.clip(tau / (dtime(a0) * a0 * sign), lo, hi)
+        v = np.where(tau == 0, 0, v)
+        done = (tau == 0) | ~reachable
+        for _ in range(iterations):
+            a = a0 * np.exp(sign*v)
+            t = time(a)
+            lo = np.where(t < tau, v, lo)
+            hi = np.where(t > tau, v, hi)
+            # Newton on ln t(v) = ln tau, which is close to linear in v both
+            # where t grows like 1/a and where it grows like ln a.
+            step = np.log(t / tau) * t / (dtime(a) * a * sign)
+            done |= (np.abs(step) <= tol * (1 + v)) | (t == tau)
+            new = v - step
+            new = np.where((new >= lo) & (new <= hi), new, (lo + hi) / 2)
+            v = np.where(done, v, new)
+            if done.all():
+                break
+
+        a = a0 * np.exp(sign*v)
+    return np.where(reachable, a, np.nan)
+
 
 class BinaryReaction:
     def __init__(self,
@@ -66,18 +145,266 @@ class BinaryReaction:
 
         # Return the rate equations
         return np.array([da, da_star, db, dc])
+
+    def rhs(self, t:float, y:np.ndarray, out:np.ndarray = None) -> np.ndarray:
+        """
+        Fused right-hand side of the rate equations.
+
+        Gives the same result as rate_eq, which is kept as the slow reference,
+        but evaluates all species in one pass. y may also be a block of shape
+        (4, m) as passed by solve_ivp(..., vectorized=True). If out is given,
+        the result is written into it instead of a new array.
+        """
+        # Get rate constants
+        k = self.k[self.solve_for[0]]
+        s = self.s[self.solve_for[1]]
+
+        if out is None:
+            out = np.empty(np.shape(y))
+        return self._rhs(y, k, s, out)
+
+    def _rhs(self, y, k, s, out):
+        """
+        The fused rate equations for (possibly array valued) k and s.
+        """
+        a = y[0]
+        a_star = y[1]
+
+        forward = 1/2*a**2
+        backward = 1/2*k*a*a_star
+        decay = 1/2*k*s*a_star
+
+        out[0] = backward - forward
+        out[1] = forward - backward - 2*decay
+        out[2] = decay
+        out[3] = decay
+        return out
+
+    def jac(self, t:float, y:Iterable[float]) -> np.ndarray:
+        """
+        The exact Jacobian of the rate equations with respect to the state,
+        of shape (4, 4), or (4, 4, m) for a block of states of shape (4, m).
+        """
+        a, a_star, b, c = y
+
+        # Get rate constants
+        k = self.k[self.solve_for[0]]
+        s = self.s[self.solve_for[1]]
+
+        return np.moveaxis(self._jac_block(a, a_star, k, s), (-2, -1), (0, 1))
+
+    def _jac_block(self, a, a_star, k, s):
+        """
+        Jacobian blocks for (possibly array valued) a, a*, k and s.
+        The result has shape (..., 4, 4).
+        """
+        a, a_star, k, s = np.broadcast_arrays(a, a_star, k, s)
+        J = np.zeros(a.shape + (4, 4))
+        J[..., 0, 0] = 1/2*k*a_star - a
+        J[..., 0, 1] = 1/2*k*a
+        J[..., 1, 0] = a - 1/2*k*a_star
+        J[..., 1, 1] = -1/2*k*a - s*k
+        J[..., 2, 1] = 1/2*k*s
+        J[..., 3, 1] = 1/2*k*s
+        return J
+
+    def parameter_jac(self, t:float, y:Iterable[float]) -> np.ndarray:
+        """
+        The exact Jacobian of the rate equations with respect to k and s,
+        of shape (4, 2), or (4, 2, m) for a block of states of shape (4, m).
+        """
+        a, a_star, b, c = y
+
+        # Get rate constants
+        k = self.k[self.solve_for[0]]
+        s = self.s[self.solve_for[1]]
+
+        return np.moveaxis(self._parameter_block(a, a_star, k, s), (-2, -1), (0, 1))
+
+    def _parameter_block(self, a, a_star, k, s):
+        """
+        Blocks of the derivatives by k and s for (possibly array valued)
+        a, a*, k and s. The result has shape (..., 4, 2).
+        """
+        a, a_star, k, s = np.broadcast_arrays(a, a_star, k, s)
+        D = np.zeros(a.shape + (4, 2))
+        D[..., 0, 0] = 1/2*a*a_star
+        D[..., 1, 0] = -1/2*a*a_star - s*a_star
+        D[..., 1, 1] = -k*a_star
+        D[..., 2, 0] = 1/2*s*a_star
+        D[..., 2, 1] = 1/2*k*a_star
+        D[..., 3, 0] = 1/2*s*a_star
+        D[..., 3, 1] = 1/2*k*a_star
+        return D
+
+    def sensitivity_parameters(self) -> dict:
+        """
+        The parameters solve can give sensitivities for, with the columns
+        of parameter_jac they set, see sensitivity.chain.
+        """
+        return {'k': {0: 1}, 's': {1: 1}}
     
-    def solve(self) -> np.ndarray:
+    @cached
+    def solve(self, method: str | None = None, stiff: bool = False, dense: bool = False,
+              sensitivities=None, **options) -> OptimizeResult:
         """
         Solves the reaction system and returns the result.
 
+        Parameters
+        ----------
+        method : str, optional
+            Integration method passed on to solve_ivp. Defaults to RK45,
+            or BDF if stiff is True.
+        stiff : bool
+            Use a stiff solver. Recommended for large k.
+        dense : bool
+            Keep a DenseSolution in sol.sol, which evaluates the solution
+            at any times between tau[0] and tau[-1] without solving again.
+        sensitivities : Iterable, optional
+            Parameters, 'k', 's' or ('init_conc', i), whose derivatives
+            dy/dtheta are integrated alongside and returned in
+            sol.sensitivities, of shape (4, len(sensitivities), len(tau)).
+            See sensitivity.Sensitivities.
+        cache : bool, optional
+            Whether to look the solution up in the solution cache first.
+            By default this follows solvecache.enabled.
+        **options
+            Any further keyword arguments for solve_ivp.
+
         Returns
         -------
-        np.ndarray
-            The solution to the reaction system.
+        OptimizeResult
+            The result of solve_ivp: the concentrations a, b, c, d in y, of
+            shape (4, len(tau)), at the times t, and success, status and
+            message. stats holds the SolveStats of the solve, sol the
+            DenseSolution of dense=True, None otherwise, and
+            sensitivities the derivatives asked for, if any.
         """
-        sol = solve_ivp(self.rate_eq, (self.tau[0], self.tau[-1]), self.init_conc, t_eval=self.tau)
+        method = select_method(method, stiff)
+        fun, y0 = self.rhs, self.init_conc
+        system = None
+        if sensitivities is not None:
+            system = Sensitivities(self, sensitivities)
+            fun, y0 = system.rhs, system.y0
+        if method in STIFF_METHODS:
+            options.setdefault('jac', self.jac if system is None else system.jacobian(method))
+            # Without an exact Jacobian, let the solver build the finite
+            # difference one from a single evaluation on a block of states.
+            if options['jac'] is None:
+                options.setdefault('vectorized', True)
+        if dense:
+            options['dense_output'] = True
+        sol = solve_ivp(fun, (self.tau[0], self.tau[-1]), y0,
+                        t_eval=self.tau, method=method, **options)
+        if dense and sol.sol is not None:
+            sol.sol = DenseSolution.from_ode(sol.sol, fun)
+        if system is not None:
+            system.split(sol)
         return sol
+
+    @cached
+    def solve_ensemble(self, grid: bool = True, method: str | None = None,
+                       stiff: bool = False, dense: bool = False, **options) -> np.ndarray:
+        """
+        Solves the reaction system for many (k, s) pairs at once.
+
+        All members are stacked into one system and advanced together by a
+        single call to solve_ivp, instead of setting up a new solver for every
+        pair of constants.
+
+        Parameters
+        ----------
+        grid : bool
+            If True, the members are all combinations of self.k and self.s,
+            member i*len(s) + j being the pair solve_for = (i, j) would pick.
+            If False, k and s are paired element by element.
+        method, stiff, cache, **options
+            As in solve. The stiff methods get the block diagonal
+            Jacobian of the whole ensemble as a sparse matrix. The
+            fixed-grid schemes of ensemble.integrate, e.g. 'ROS2', take
+            the steps of tau for all members at once instead, with its
+            options such as max_step or dtype. Members the steps are too
+            coarse for are warned about, those that break down are NaN.
+        dense : bool
+            Return a DenseSolution of the whole ensemble instead of the
+            values on tau. Not for the fixed-grid schemes.
+
+        Returns
+        -------
+        np.ndarray
+            The solutions with shape (n_members, n_species, n_times).
+            self.init_conc may be given per member as an (n_members, 4) array.
+            With dense=True, a DenseSolution giving this shape for any
+            array of times.
+        """
+        k, s = self._members(grid)
+        y0 = np.broadcast_to(np.asarray(self.init_conc, dtype=float), (k.size, 4))
+
+        method = select_method(method, stiff)
+        if method in FIXED_METHODS:
+            if dense:
+                raise ValueError(f"The fixed-grid method {method} gives no dense output.")
+            return self._fixed_ensemble(y0, k, s, method, **options)
+        if method in STIFF_METHODS:
+            options.setdefault('jac', self._ensemble_jac)
+        if dense:
+            options['dense_output'] = True
+        sol = solve_ivp(self._ensemble_eq, (self.tau[0], self.tau[-1]), y0.ravel(),
+                        t_eval=self.tau, args=(k, s), method=method, **options)
+        if not sol.success:
+            raise RuntimeError(f"Ensemble solve failed: {sol.message}")
+        if dense:
+            def derivatives(t, y):
+                # Species first, so _rhs sees every member at every step.
+                y = y.reshape(k.size, 4, -1).transpose(1, 0, 2)
+                dy = self._rhs(y, k[:, None], s[:, None], np.empty(y.shape))
+                return dy.transpose(1, 0, 2).reshape(4*k.size, -1)
+            return DenseSolution.from_ode(sol.sol, derivatives, shape=(k.size, 4))
+        return sol.y.reshape(k.size, 4, -1)
+
+    def _fixed_ensemble(self, y0, k, s, method, **options):
+        """
+        The ensemble on the fixed grid tau, see ensemble.integrate.
+        """
+        sol = integrate(lambda t, y: self._rhs(y, k, s, np.empty(y.shape)), self.tau, y0.T,
+                        method=method, jac=lambda t, y: np.moveaxis(self._jac_block(y[0], y[1], k, s), 0, -1),
+                        **options)
+        coarse = np.sum(sol.status == 1)
+        if coarse:
+            warnings.warn(f"The steps of tau exceed the tolerances for {coarse} member(s).", RuntimeWarning)
+        if not sol.stats.success:
+            warnings.warn(f"{np.sum(sol.status == -1)} member(s) broke down.", RuntimeWarning)
+        return np.ascontiguousarray(sol.y.transpose(1, 0, 2))
+
+    def _members(self, grid: bool):
+        """
+        Returns the flat arrays of k and s for every member of an ensemble.
+        """
+        k = np.asarray(self.k, dtype=float)
+        s = np.asarray(self.s, dtype=float)
+        if grid:
+            k, s = np.meshgrid(k, s, indexing='ij')
+            return k.ravel(), s.ravel()
+        if k.size != s.size:
+            raise ValueError("k and s must have the same length when grid=False.")
+        return k, s
+
+    def _ensemble_eq(self, t, y, k, s):
+        """
+        The rate equations of all ensemble members, stacked member by member.
+        """
+        dy = np.empty((k.size, 4))
+        self._rhs(y.reshape(-1, 4).T, k, s, dy.T)
+        return dy.ravel()
+
+    def _ensemble_jac(self, t, y, k, s):
+        """
+        The block diagonal Jacobian of the stacked ensemble system.
+        """
+        a, a_star, b, c = y.reshape(-1, 4).T
+        blocks = self._jac_block(a, a_star, k, s)
+        index = np.arange(k.size)
+        return bsr_matrix((blocks, index, np.arange(k.size + 1)), shape=(4*k.size, 4*k.size))
     
     def _da(self, a, a_star, k, s):
         return 1/2*k*a*a_star - a**2 + 1/2*a**2
@@ -174,32 +501,165 @@ class BinaryEquilibrium(BinaryReaction):
     def _dc(self, a, a_star, k, s):
         return s*a**2/(4*(s+(a/2)))
 
+    def _rhs(self, y, k, s, out):
+        a = y[0]
+
+        a2 = a**2
+        denom = 4*(s + a/2)
+        decay = s*a2/denom
+
+        out[0] = a2*a/(k*denom) - a2
+        out[1] = 0
+        out[2] = decay
+        out[3] = decay
+        return out
+
+    @cached
+    def solve(self, method: str | None = None, stiff: bool = False, **options):
+        """
+        Solves the reaction system and returns the result.
+
+        Parameters
+        ----------
+        method : str, optional
+            As in BinaryReaction.solve, or 'exact' for the closed form
+            solution, see time_of. The other arguments are then ignored.
+        stiff, cache, **options
+            See BinaryReaction.solve.
+
+        Returns
+        -------
+        OptimizeResult
+            The solution to the reaction system.
+        """
+        if method != 'exact':
+            return super().solve(method, stiff, cache=False, **options)
+        start = time.perf_counter()
+        k = np.atleast_1d(self.k[self.solve_for[0]])
+        s = np.atleast_1d(self.s[self.solve_for[1]])
+        y = self._exact(np.atleast_2d(np.asarray(self.init_conc, dtype=float)), k, s)[0]
+        success = not np.isnan(y).any()
+        sol = OptimizeResult(t=np.asarray(self.tau), y=y, success=success, status=0 if success else -1,
+                        message="Closed form solution." if success else "a blows up in finite time.",
+                        nfev=0, njev=0, nlu=0, sol=None, t_events=None, y_events=None)
+        sol.stats = SolveStats.from_result(sol, 'exact', time.perf_counter() - start)
+        return sol
+
+    @cached
+    def solve_ensemble(self, grid: bool = True, method: str | None = None,
+                       stiff: bool = False, **options) -> np.ndarray:
+        """
+        Solves the reaction system for many (k, s) pairs at once.
+
+        Parameters
+        ----------
+        grid, stiff, cache, **options
+            See BinaryReaction.solve_ensemble.
+        method : str, optional
+            As in BinaryReaction.solve_ensemble, or 'exact' for the closed
+            form solution of all members at once. Members that blow up
+            are NaN from the blow-up on.
+
+        Returns
+        -------
+        np.ndarray
+            The solutions with shape (n_members, n_species, n_times).
+        """
+        if method != 'exact':
+            return super().solve_ensemble(grid, method, stiff, cache=False, **options)
+        k, s = self._members(grid)
+        y0 = np.broadcast_to(np.asarray(self.init_conc, dtype=float), (k.size, 4))
+        y = self._exact(y0, k, s)
+        blown = np.isnan(y).any(axis=(1, 2))
+        if blown.any():
+            warnings.warn(f"a blows up in finite time for {blown.sum()} member(s).", RuntimeWarning)
+        return y
+
+    def time_of(self, a, a0, k, s):
+        """
+        The time it takes a to go from a0 to a, in closed form.
+
+        With alpha = 1 - 2k and beta = 4ks the rate equation of a reads
+        da/dt = a^2 (alpha a - beta) / (2k (2s + a)), which separates into
+
+        t(a) = 1/a - 1/a0 + [ln((alpha a - beta)/(alpha a0 - beta)) - ln(a/a0)] / beta.
+
+        All arguments broadcast against each other.
+        """
+        alpha = 1 - 2*k
+        beta = 4*k*s
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_ratio = np.log1p(alpha*(a - a0)/(alpha*a0 - beta))
+            t = 1/a - 1/a0 + (log_ratio - np.log(a/a0))/beta
+            # For s = 0 only the -alpha a^2/(2k) term is left.
+            t_free = 2*k/alpha*(1/a0 - 1/a)
+        return np.where(beta == 0, t_free, t)
+
+    def _exact(self, y0, k, s):
+        """
+        The closed form solutions of a batch of members, with initial
+        concentrations y0 of shape (n_members, 4) and k and s of shape
+        (n_members,). Returns shape (n_members, 4, n_times).
+        """
+        tau = np.asarray(self.tau, dtype=float)
+        a0, a_star0, b0, c0 = (y0[:, i, None] for i in range(4))
+        k = np.asarray(k, dtype=float)[:, None]
+        s = np.asarray(s, dtype=float)[:, None]
+        alpha = 1 - 2*k
+        drive = alpha*a0 - 4*k*s
+
+        a = _invert_time(lambda a: self.time_of(a, a0, k, s),
+                         lambda a: 2*k*(2*s + a)/(a**2*(alpha*a - 4*k*s)),
+                         a0, tau - tau[0], drive > 0)
+        # a sits on its fixed point alpha a = beta.
+        a = np.where(drive == 0, a0, a)
+
+        # db/da = sk/(alpha a - beta) integrates to a logarithm as well.
+        x = (a - a0)/np.where(drive == 0, 1, drive)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_ratio = np.where(alpha == 0, x, np.log1p(alpha*x)/alpha)
+        b = s*k*log_ratio
+
+        shape = a.shape
+        return np.stack([a, np.broadcast_to(a_star0, shape), b0 + b, c0 + b], axis=1)
+
+    def _jac_block(self, a, a_star, k, s):
+        a, a_star, k, s = np.broadcast_arrays(a, a_star, k, s)
+        J = np.zeros(a.shape + (4, 4))
+        J[..., 0, 0] = a**2*(3*s + a)/(k*(2*s + a)**2) - 2*a
+        J[..., 2, 0] = s*a*(4*s + a)/(2*(2*s + a)**2)
+        J[..., 3, 0] = s*a*(4*s + a)/(2*(2*s + a)**2)
+        return J
+
+    def _parameter_block(self, a, a_star, k, s):
+        a, a_star, k, s = np.broadcast_arrays(a, a_star, k, s)
+        D = np.zeros(a.shape + (4, 2))
+        D[..., 0, 0] = -a**3/(2*k**2*(2*s + a))
+        D[..., 0, 1] = -a**3/(k*(2*s + a)**2)
+        D[..., 2, 1] = a**3/(2*(2*s + a)**2)
+        D[..., 3, 1] = a**3/(2*(2*s + a)**2)
+        return D
+
 
 class BinarySingular(BinaryReaction):
     def __init__(self, init_conc: Iterable[float], tau: Iterable[float], k: Iterable[float], s: Iterable[float]) -> None:
         super().__init__(init_conc, tau, k, s)
 
-    def sol_b(self, sol_a):
+    def sol_b(self, sol_a, s=None):
         a = sol_a
         # Get rate constants
-        k = self.k[self.solve_for[0]]
-        s = self.s[self.solve_for[1]]
+        if s is None:
+            s = self.s[self.solve_for[1]]
 
         return s**3 * np.log((a-s)/(1-s)) + \
                s**2 * (a - 1) + \
                s/2 * (a**2 - 1)
     
-    def sol_c(self, sol_a):    
-        a = sol_a
-        # Get rate constants
-        k = self.k[self.solve_for[0]]
-        s = self.s[self.solve_for[1]]
-
-        return s**3 * np.log((a-s)/(1-s)) + \
-            s**2 * (a - 1) + \
-            s/2 * (a**2 - 1)
+    def sol_c(self, sol_a, s=None):    
+        # c follows exactly the same equation as b.
+        return self.sol_b(sol_a, s)
     
-    def sol_a_star(self, a_solution: Iterable[float]):
+    def sol_a_star(self, a_solution: Iterable[float], k=None, s=None):
         """
         Returns the equilibrium value of a_star.
         NOT THE DERIVATIVE OF a_star.
@@ -212,33 +672,140 @@ class BinarySingular(BinaryReaction):
         a = a_solution
 
         # Get rate constants
-        k = self.k[self.solve_for[0]]
-        s = self.s[self.solve_for[1]]
+        if k is None:
+            k = self.k[self.solve_for[0]]
+        if s is None:
+            s = self.s[self.solve_for[1]]
 
         return a**2/(k*(a-s))
     
     def _da(self, t, a):
         # Get rate constants
-        k = self.k[self.solve_for[0]]
         s = self.s[self.solve_for[1]]
 
+        return self._rate_a(a, s)
+
+    def _rate_a(self, a, s):
         return a**3/(a - s) - a**2
+
+    def _jac_a(self, t, a):
+        # Get rate constants
+        s = self.s[self.solve_for[1]]
+
+        return np.atleast_2d(a**2*(2*a - 3*s)/(a - s)**2 - 2*a)
     
-    def sol_a(self):
+    def time_of(self, a, a0, s):
+        """
+        The time it takes a to go from a0 to a, in closed form.
+
+        The rate equation of a reads da/dt = s a^2 / (a - s), which
+        separates into t(a) = ln(a/a0)/s + 1/a - 1/a0. a moves away from
+        s on either side, so a0 = s is a singular starting point.
+
+        All arguments broadcast against each other.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.log(a/a0)/s + 1/a - 1/a0
+
+    def _exact_a(self, a0, s):
+        """
+        The closed form a(tau) for arrays a0 and s of shape (n_members,).
+        Members starting on the singularity a0 = s are NaN.
+        """
+        tau = np.asarray(self.tau, dtype=float)
+        a0 = np.asarray(a0, dtype=float)[:, None]
+        s = np.asarray(s, dtype=float)[:, None]
+        a = _invert_time(lambda a: self.time_of(a, a0, s),
+                         lambda a: (a - s)/(s*a**2),
+                         a0, tau - tau[0], a0 > s)
+        # Without decay, a does not change at all.
+        a = np.where(s == 0, a0, a)
+
+        singular = (a0 == s)[:, 0]
+        if singular.any():
+            warnings.warn(f"{singular.sum()} member(s) start on the singularity a = s.", RuntimeWarning)
+        return np.where(a0 == s, np.nan, a)
+
+    def sol_a(self, method: str | None = None, stiff: bool = False, **options):
         """
         Solves the reaction system and returns the result.
 
+        Parameters
+        ----------
+        method, stiff, **options
+            See BinaryReaction.solve. method='exact' uses the closed form
+            solution instead, see time_of.
+
         Returns
         -------
-        np.ndarray
-            The solution to the reaction system.
+        OptimizeResult
+            The result of solve_ivp for a alone, in y of shape (1,
+            len(tau)), with its SolveStats in stats.
         """
+        if method == 'exact':
+            start = time.perf_counter()
+            a = self._exact_a([self.init_conc[0]], [self.s[self.solve_for[1]]])
+            success = not np.isnan(a).any()
+            sol = OptimizeResult(t=np.asarray(self.tau), y=a, success=success, status=0 if success else -1,
+                            message="Closed form solution." if success else "a starts on a = s.",
+                            nfev=0, njev=0, nlu=0, sol=None, t_events=None, y_events=None)
+            sol.stats = SolveStats.from_result(sol, 'exact', time.perf_counter() - start)
+            return sol
         y0 = [self.init_conc[0]]
-        sol = solve_ivp(self._da, (self.tau[0], self.tau[-1]), y0, t_eval=self.tau)
+        method = select_method(method, stiff)
+        if method in STIFF_METHODS:
+            options.setdefault('jac', self._jac_a)
+        sol = solve_ivp(self._da, (self.tau[0], self.tau[-1]), y0, t_eval=self.tau,
+                        method=method, **options)
         return sol
     
-    def solve(self):
-        sol_a = self.sol_a()
-        sol = [sol_a.y[0], self.sol_a_star(sol_a.y[0]), self.sol_b(sol_a.y[0]), self.sol_c(sol_a.y[0])]
+    @cached
+    def solve(self, method: str | None = None, stiff: bool = False, sensitivities=None, **options):
+        if sensitivities is not None:
+            raise ValueError("BinarySingular does not give sensitivities, "
+                             "solve BinaryReaction for them.")
+        sol_a = self.sol_a(method, stiff, **options)
+        sol_b = self.sol_b(sol_a.y[0])
+        sol = [sol_a.y[0], self.sol_a_star(sol_a.y[0]), sol_b, sol_b.copy()]
         return sol
-    
\ No newline at end of file
+
+    @cached
+    def solve_ensemble(self, grid: bool = True, method: str | None = None,
+                       stiff: bool = False, **options) -> np.ndarray:
+        """
+        Solves the reduced system for many (k, s) pairs at once.
+
+        Only a is integrated, stacked over all members, or with
+        method='exact' found from its closed form. a*, b and c are then
+        recovered algebraically for the whole ensemble. Members starting
+        on the singularity a = s are NaN.
+
+        Parameters
+        ----------
+        grid, method, stiff, cache, **options
+            See BinaryReaction.solve_ensemble.
+
+        Returns
+        -------
+        np.ndarray
+            The solutions with shape (n_members, n_species, n_times).
+        """
+        k, s = self._members(grid)
+        y0 = np.broadcast_to(np.asarray(self.init_conc, dtype=float), (k.size, 4))
+
+        if method == 'exact':
+            a = self._exact_a(y0[:, 0], s)
+        else:
+            method = select_method(method, stiff)
+            if method in STIFF_METHODS:
+                # The members are independent, so the Jacobian is diagonal.
+                options.setdefault('jac', lambda t, a: diags(a**2*(2*a - 3*s)/(a - s)**2 - 2*a))
+            sol = solve_ivp(lambda t, a: self._rate_a(a, s), (self.tau[0], self.tau[-1]),
+                            y0[:, 0], t_eval=self.tau, method=method, **options)
+            if not sol.success:
+                raise RuntimeError(f"Ensemble solve failed: {sol.message}")
+            a = sol.y
+        k = k[:, None]
+        s = s[:, None]
+        b = self.sol_b(a, s)
+        return np.stack([a, self.sol_a_star(a, k, s), b, b.copy()], axis=1)
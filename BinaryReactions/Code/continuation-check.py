@@ -0,0 +1,35 @@
+"""
+Check that a continuation sweep along s in the stiff regime of large k
+reuses the Jacobians and LU factors of the neighbouring points, agrees
+with solving every point from scratch and reports where the warm start
+broke down.
+"""
+import numpy as np
+from binaryreaction import BinaryReaction
+import shared
+from mod105.continuation import WarmStart
+from mod105.sweep import Final, sweep
+
+base = dict(init_conc=[1, 0, 0, 0], tau=np.linspace(0, 10, 200), k=1000)
+grid = {'s': np.linspace(1.1, 10, 50)}
+solve_options = dict(method='Radau', cache=False)
+
+scratch = sweep(BinaryReaction, base, grid, Final(), processes=1, solve_options=solve_options)
+warm = sweep(BinaryReaction, base, grid, Final(), processes=1, solve_options=solve_options, continuation='s')
+assert not scratch.errors and not warm.errors
+assert np.allclose(warm.values, scratch.values, rtol=1e-3, atol=1e-5)
+assert warm.summary()['nlu'] < 0.6 * scratch.summary()['nlu']
+assert warm.summary()['njev'] < 0.75 * scratch.summary()['njev']
+assert warm.summary()['nfev'] < scratch.summary()['nfev']
+assert 0 < len(warm.breakdowns) < len(grid['s'])
+print("BinaryReaction: continuation sweeps reuse the factors of their neighbours.")
+
+# A neighbour far away no longer helps, which the warm start reports.
+previous = WarmStart()
+BinaryReaction(**base, s=1.1).solve(warm_start=previous, **solve_options)
+assert previous.breakdown is None and len(previous.steps) > 1
+start = WarmStart(previous)
+sol = BinaryReaction(**dict(base, k=1), s=10).solve(warm_start=start, **solve_options)
+assert sol.success and start.breakdown is not None and start.replayed < len(previous.steps)
+assert start.previous is None
+print("BinaryReaction: warm starts report where they break down.")
@@ -2,11 +2,9 @@
 Parameter sweep for BinaryEquilibrium.
 """
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-import cmasher as cmr
-import palettable as pl
 from binaryreaction import BinaryEquilibrium
+import shared
+from mod105.sweep import sweep, Trajectories
 
 # Define the initial concentrations
 init_conc = [1, 0, 0, 0]
@@ -18,26 +16,33 @@ tau = np.linspace(0, 10, 1000)
 k = 1000
 s1 = np.linspace(1.1, 10, 10)
 
-# Initialize the BinaryReaction object
-solutions = []
-solutions2 = []
-for par in s1:
-    br = BinaryEquilibrium(init_conc, tau, k, par)
 
-    sol = br.solve()
+def compute() -> np.ndarray:
+    """
+    The time series of a for every value of s, one row each.
+    """
+    result = sweep(BinaryEquilibrium, dict(init_conc=init_conc, tau=tau, k=k), {'s': s1},
+                   reducer=Trajectories(0), processes=1)
+    return result.values
 
-    solutions.append(sol)
 
+def plot(solutions: np.ndarray) -> None:
+    import matplotlib.pyplot as plt
+    import cmasher as cmr
+    import palettable as pl
 
-# Plot the results
-fig, ax = plt.subplots()
-cm = pl.colorbrewer.sequential.Purples_7.mpl_colormap
-colors = cmr.take_cmap_colors(cm, len(s1))
+    fig, ax = plt.subplots()
+    cm = pl.colorbrewer.sequential.Purples_7.mpl_colormap
+    colors = cmr.take_cmap_colors(cm, len(s1))
 
-for i, sol in enumerate(solutions):
-    ax.plot(tau, sol[0], c=colors[i], label=f's = {s1[i]:.2f}')
+    for i, a in enumerate(solutions):
+        ax.plot(tau, a, c=colors[i], label=f's = {s1[i]:.2f}')
 
-ax.set_xlabel('Dimensionless Time')
-ax.set_ylabel('Relative Concentration')
-ax.set_title('Equilibrium Approximation')
-plt.show()
+    ax.set_xlabel('Dimensionless Time')
+    ax.set_ylabel('Relative Concentration')
+    ax.set_title('Equilibrium Approximation')
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot(compute())
@@ -0,0 +1,43 @@
+"""
+Check that the closed form solutions of the reduced models, found by
+inverting t(a) with Newton's method, match tightly converged numerical
+solves and give back the output times through t(a).
+"""
+import warnings
+import numpy as np
+from binaryreaction import BinaryEquilibrium, BinarySingular
+
+init_conc = np.array([1, 0, 0, 0])
+tau = np.linspace(0, 20, 200)
+tight = dict(method='Radau', rtol=1e-10, atol=1e-12, cache=False)
+
+for k in [1, 10, 100]:
+    for s in [0.1, 1, 10]:
+        model = BinaryEquilibrium(init_conc, tau, [k], [s])
+        exact = model.solve(method='exact', cache=False)
+        assert exact.success
+        assert np.allclose(exact.y, model.solve(**tight).y, rtol=1e-6, atol=1e-9)
+        assert np.allclose(model.time_of(exact.y[0, 1:], 1, k, s), tau[1:], rtol=1e-9, atol=1e-12)
+
+# All members of a grid at once.
+model = BinaryEquilibrium(init_conc, tau, [1, 10, 100], [0.1, 1, 10])
+exact = model.solve_ensemble(method='exact', cache=False)
+assert np.allclose(exact, model.solve_ensemble(**tight), rtol=1e-6, atol=1e-9)
+print("BinaryEquilibrium: closed form solution matches the numerical solve.")
+
+for s in [2, 5, 20]:
+    model = BinarySingular(init_conc, tau, [1], [s])
+    exact = model.sol_a(method='exact')
+    assert exact.success
+    assert np.allclose(exact.y, model.sol_a(method='Radau', rtol=1e-10, atol=1e-12).y, rtol=1e-6, atol=1e-9)
+    assert np.allclose(model.time_of(exact.y[0, 1:], 1, s), tau[1:], rtol=1e-9, atol=1e-12)
+
+model = BinarySingular(init_conc, tau, [1], [2, 5, 20])
+exact = model.solve_ensemble(method='exact', cache=False)
+assert np.allclose(exact, model.solve_ensemble(**tight), rtol=1e-6, atol=1e-9)
+
+# Starting on the singularity a = s has no solution.
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', RuntimeWarning)
+    assert not BinarySingular(init_conc, tau, [1], [1]).sol_a(method='exact').success
+print("BinarySingular: closed form solution matches the numerical solve.")
@@ -0,0 +1,27 @@
+"""
+Check that the fused right-hand sides give the same derivatives
+as the reference rate equations built from the _d* methods.
+"""
+import numpy as np
+from binaryreaction import BinaryReaction, BinaryEquilibrium
+
+rng = np.random.default_rng(105)
+tau = np.linspace(0, 10, 1000)
+
+for model in (BinaryReaction, BinaryEquilibrium):
+    for k, s in [(1, 0.1), (1000, 0.1), (1000, 1), (1000, 10)]:
+        br = model([1, 0, 0, 0], tau, k, s)
+        states = rng.uniform(0, 1, size=(4, 50))
+
+        # Single states, with and without a preallocated buffer.
+        out = np.empty(4)
+        for state in states.T:
+            reference = br.rate_eq(0, state)
+            assert np.allclose(br.rhs(0, state), reference, rtol=1e-12, atol=0)
+            assert np.allclose(br.rhs(0, state, out=out), reference, rtol=1e-12, atol=0)
+
+        # A whole block of states, as used by solve_ivp(..., vectorized=True).
+        reference = np.array([br.rate_eq(0, state) for state in states.T]).T
+        assert np.allclose(br.rhs(0, states), reference, rtol=1e-12, atol=0)
+
+    print(f"{model.__name__}: fused right-hand side matches the reference.")
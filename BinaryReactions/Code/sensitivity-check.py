@@ -0,0 +1,31 @@
+"""
+Check that the forward sensitivities of a solve match central finite
+differences of tightly converged solves with perturbed parameters, for
+every method.
+"""
+import numpy as np
+from binaryreaction import BinaryReaction
+
+init_conc = np.array([1, 0.1, 0, 0])
+tau = np.linspace(0, 5, 50)
+tolerances = dict(rtol=1e-10, atol=1e-12, cache=False)
+
+
+def solve(k, s, a0=init_conc[0]):
+    return BinaryReaction(np.r_[a0, init_conc[1:]], tau, [k], [s]).solve(method='Radau', **tolerances).y
+
+
+for k, s in [(1, 0.5), (10, 0.1), (100, 2)]:
+    # The derivatives by k, s and the initial a.
+    h = 1e-6 * np.array([k, s, 1])
+    reference = np.stack([(solve(k + h[0], s) - solve(k - h[0], s)) / (2*h[0]),
+                          (solve(k, s + h[1]) - solve(k, s - h[1])) / (2*h[1]),
+                          (solve(k, s, 1 + h[2]) - solve(k, s, 1 - h[2])) / (2*h[2])], axis=1)
+
+    for method in ['RK45', 'BDF', 'Radau', 'LSODA']:
+        sol = BinaryReaction(init_conc, tau, [k], [s]).solve(method=method, sensitivities=['k', 's', ('init_conc', 0)],
+                                                            **tolerances)
+        assert sol.success and sol.sensitivities.shape == (4, 3, len(tau))
+        assert np.allclose(sol.sensitivities, reference, rtol=1e-4, atol=1e-6)
+
+print("BinaryReaction: sensitivities match the finite differences.")
@@ -2,8 +2,6 @@
 A test file to try out in development code.
 """
 import numpy as np
-import matplotlib.pyplot as plt
-import palettable as pl
 from binaryreaction import BinarySingular
 
 # Define the initial concentrations
@@ -16,20 +14,29 @@ tau = np.linspace(0, 10, 1000)
 k = 1000
 s = 0.1
 
-# Initialize the BinaryReaction object
-br = BinarySingular(init_conc, tau, k, s)
 
-# Solve the system
-sol = br.solve()
+def compute():
+    # Initialize the BinaryReaction object
+    br = BinarySingular(init_conc, tau, k, s)
 
-# Plot the results
+    # Solve the system
+    return br.solve()
 
-colors = pl.cartocolors.sequential.TealGrn_7.hex_colors
 
-plt.plot(tau, sol[0], c=colors[0], label='a')
-plt.plot(tau, sol[1], ls=":", c=colors[1], label='a*')
-plt.plot(tau, sol[2], ls="-", c=colors[2], label='b')
-plt.plot(tau, sol[3], ls="-", c=colors[3], label='c')
+def plot(sol) -> None:
+    import matplotlib.pyplot as plt
+    import palettable as pl
 
-plt.legend()
-plt.show()
+    colors = pl.cartocolors.sequential.TealGrn_7.hex_colors
+
+    plt.plot(tau, sol[0], c=colors[0], label='a')
+    plt.plot(tau, sol[1], ls=":", c=colors[1], label='a*')
+    plt.plot(tau, sol[2], ls="-", c=colors[2], label='b')
+    plt.plot(tau, sol[3], ls="-", c=colors[3], label='c')
+
+    plt.legend()
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot(compute())
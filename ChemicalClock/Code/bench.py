@@ -0,0 +1,61 @@
+"""
+Benchmarks of the ChemicalClock models, see mod105/benchmark.py. Run from the
+repository root, e.g.
+
+    python ./ChemicalClock/Code/bench.py run -o cc.json
+    python ./ChemicalClock/Code/bench.py run --baseline cc.json
+"""
+import sys
+import numpy as np
+import shared
+from mod105.benchmark import Benchmark, main
+from chemicalclock import ChemicalClock, Threshold, event_time
+from mod105.conservation import conserved
+from mod105.ensemble import ensemble
+from mod105.logspace import log_space
+from mod105.sweep import sweep
+
+# The setup of stoptime.py.
+init_conc = np.array([1, 0, 1, 0, 0, 10, 0, 0])
+tau = np.linspace(0, 40, 1000)
+rates = np.array([1, 0.1])
+cc = ChemicalClock(init_conc, tau, rates, p_fast_factor=100, q_fast_factor=100)
+stop = Threshold('u', 1e-4, relative=True)
+state = np.array([0.9, 0.05, 0.5, 0.01, 0.1, 9, 0.02, 0.5])
+
+benchmarks = [
+    Benchmark('cc/rhs', lambda: cc.rhs(0, state), number=1000),
+    Benchmark('cc/jac', lambda: cc.jac(0, state), number=1000),
+    Benchmark('cc/solve', lambda: cc.solve(cache=False), params={'fast_factor': 100, 'method': 'LSODA'}),
+    Benchmark('cc/solve-stiff', lambda: cc.solve(stiff=True, cache=False),
+              params={'fast_factor': 100, 'method': 'BDF'}),
+    Benchmark('cc/solve-event', lambda: cc.solve(events=stop, cache=False),
+              params={'fast_factor': 100, 'method': 'LSODA'}),
+    Benchmark('cc/solve-sensitivities',
+              lambda: cc.solve(sensitivities=[('rates', 0), ('rates', 1), 'p_fast_factor', 'q_fast_factor'],
+                               cache=False),
+              params={'fast_factor': 100, 'method': 'LSODA', 'parameters': 4}),
+    # Four species left once the conservation laws are eliminated.
+    Benchmark('cc/solve-conserved', lambda: conserved(ChemicalClock)(init_conc, tau, rates).solve(cache=False),
+              params={'fast_factor': 100, 'method': 'LSODA', 'species': 4}),
+    # Explicit steps that dip below zero without the log-concentrations.
+    Benchmark('cc/solve-logspace',
+              lambda: log_space(ChemicalClock)(init_conc, tau, rates).solve(method='RK45', events=stop, cache=False),
+              params={'fast_factor': 100, 'method': 'RK45'}),
+    # The stop time curve of stoptime.py on a uniform grid.
+    Benchmark('cc/stoptime-sweep',
+              lambda: sweep(ChemicalClock, dict(init_conc=init_conc, t=tau, rates=rates),
+                            {('init_conc', 2): np.linspace(0.001, 10, 100)}, reducer=event_time,
+                            solve_options=dict(events=stop, cache=False)),
+              params={'points': 100}, repeat=1, memory=False),
+    # The fast factors over three decades, stiff at the top, as one
+    # fixed-grid ensemble.
+    Benchmark('cc/ensemble-fast-factors',
+              lambda: ensemble(ChemicalClock, dict(init_conc=init_conc, t=np.linspace(0, 40, 401), rates=rates),
+                               {'p_fast_factor': np.logspace(0, 3, 50), 'q_fast_factor': np.logspace(0, 3, 50)},
+                               method='ROS2'),
+              params={'points': 2500, 'steps': 400, 'method': 'ROS2'}, repeat=1),
+]
+
+if __name__ == '__main__':
+    sys.exit(main(benchmarks))
@@ -3,9 +3,85 @@ Implementation of the Chemical Clock model via
 cubic autocatalysis.
 """
 import numpy as np
-from scipy.integrate import solve_ivp
+from scipy.optimize import OptimizeResult
+import shared
+from mod105.reactionnetwork import Reaction, ReactionNetwork
+from mod105.densesolution import DenseSolution
+from mod105.sensitivity import Sensitivities
+from mod105.solvecache import cached
+from mod105.solvestats import STIFF_METHODS, select_method, solve_ivp
+
+
+class Threshold:
+    def __init__(self,
+                 species: str,
+                 level: float,
+                 crossing: str = 'below',
+                 relative: bool = False,
+                 terminal: bool = True,
+                 ) -> None:
+        """
+        An event fired when the concentration of a species crosses a level,
+        e.g. Threshold('u', 1e-4, relative=True) for the moment u is used
+        up, or Threshold('n', 1e-3, 'above') for iodine appearing.
+
+        Parameters
+        ----------
+        species : str
+            Name of the species in the network of the model.
+        level : float
+            The concentration at which the event fires.
+        crossing : str
+            'below' fires when the concentration falls below the level,
+            'above' when it rises above it and 'any' on both.
+        relative : bool
+            Whether level is relative to the initial concentration.
+        terminal : bool
+            Whether to stop integrating once the event fires.
+        """
+        if crossing not in ('below', 'above', 'any'):
+            raise ValueError(f"Unknown crossing {crossing!r}, use 'below', 'above' or 'any'.")
+        self.species = species
+        self.level = level
+        self.crossing = crossing
+        self.relative = relative
+        self.terminal = terminal
+
+    def event(self, model: 'ChemicalClock'):
+        """
+        The event function of the threshold for solve_ivp.
+        """
+        i = model.network.species.index(self.species)
+        level = self.level * model.init_conc[i] if self.relative else self.level
+
+        def event(t, state):
+            return state[i] - level
+        event.terminal = self.terminal
+        event.direction = {'below': -1, 'above': 1, 'any': 0}[self.crossing]
+        return event
+
+    def __repr__(self) -> str:
+        return (f"Threshold({self.species!r}, {self.level!r}, {self.crossing!r}, "
+                f"relative={self.relative!r}, terminal={self.terminal!r})")
+
+
+def event_time(sol, index: int = 0) -> float:
+    """
+    The time an event of a solution first fired, or NaN if it never did.
+    """
+    times = sol.t_events[index] if sol.t_events is not None else []
+    return times[0] if len(times) else np.nan
+
 
 class ChemicalClock:
+    network = ReactionNetwork(
+        ('m', 'n', 'u', 'v', 'w', 'x', 'y', 'z'),
+        ('p_slow', 'p_fast', 'q_slow', 'q_fast'),
+        [Reaction('p_slow', {'m': 1, 'u': 1}, {'v': 1}),
+         Reaction('p_fast', {'m': 1, 'v': 1}, {'n': 1, 'w': 1}),
+         Reaction('q_slow', {'x': 1, 'n': 1}, {'m': 1, 'y': 1}),
+         Reaction('q_fast', {'x': 1, 'y': 1}, {'m': 1, 'z': 1})])
+
     def __init__(self,
                  init_conc: np.ndarray,
                  t: np.ndarray,
@@ -24,6 +100,8 @@ class ChemicalClock:
         self.q_slow = rates[1]
         self.p_fast = rates[0] * p_fast_factor
         self.q_fast = rates[1] * q_fast_factor
+        self.p_fast_factor = p_fast_factor
+        self.q_fast_factor = q_fast_factor
         pass
 
     def model_eq(self, t: float, state: np.ndarray) -> np.ndarray:
@@ -52,16 +130,122 @@ class ChemicalClock:
         # Return the model equations
         return np.array([dmdt, dndt, dudt, dvdt, dwdt, dxdt, dydt, dzdt])
 
-    def solve(self):
+    def rhs(self, t: float, state: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Fast right-hand side of the model equations, generated from the
+        reaction network of the model.
+
+        Gives the same result as model_eq, which is kept as the slow reference.
+        state may also be a block of shape (8, k) as passed by
+        solve_ivp(..., vectorized=True). If out is given, the result is
+        written into it instead of a new array.
+        """
+        return self.network.rhs(t, state, self._constants(), out)
+
+    def jac(self, t: float, state: np.ndarray) -> np.ndarray:
+        """
+        Exact Jacobian of the model equations with respect to the state.
+        """
+        return self.network.jac(t, state, self._constants())
+
+    def parameter_jac(self, t: float, state: np.ndarray) -> np.ndarray:
+        """
+        Exact Jacobian of the model equations with respect to the rate
+        constants, in the order of the network parameters.
+        """
+        return self.network.parameter_jac(t, state, self._constants())
+
+    def sensitivity_parameters(self) -> dict:
+        """
+        The parameters solve can give sensitivities for, with the rate
+        constants they set, see sensitivity.chain.
+        """
+        return {('rates', 0): {0: 1, 1: self.p_fast_factor},
+                ('rates', 1): {2: 1, 3: self.q_fast_factor},
+                'p_fast_factor': {1: self.p_slow},
+                'q_fast_factor': {3: self.q_slow}}
+
+    def _constants(self):
+        """
+        The rate constants in the order of the network parameters.
+        """
+        return (self.p_slow, self.p_fast, self.q_slow, self.q_fast)
+
+    @cached
+    def solve(self, method: str | None = None, stiff: bool = False, events=None,
+              dense: bool = False, sensitivities=None, **options) -> OptimizeResult:
         """
         Solve the model equations.
+
+        The method defaults to LSODA, or to BDF if stiff is True. The stiff
+        methods (BDF, Radau, LSODA) are given the exact Jacobian. Any further
+        keyword arguments are passed on to solve_ivp.
+
+        events is a Threshold or a list of them, plain solve_ivp event
+        functions being allowed too. The solver locates every crossing
+        exactly on its dense interpolant, so the times in sol.t_events do
+        not depend on the resolution of t, and integration stops at the
+        first terminal event. See event_time.
+
+        With dense=True, sol.sol is a DenseSolution that evaluates the
+        concentrations at any times inside the solved interval, without
+        solving again.
+
+        sensitivities lists parameters, ('rates', i), 'p_fast_factor',
+        'q_fast_factor' or ('init_conc', i), whose derivatives dy/dtheta
+        are integrated alongside, see sensitivity.Sensitivities. They are
+        returned in sol.sensitivities, of shape (n_species,
+        len(sensitivities), len(sol.t)). Plain event functions are then
+        called with the extended state, which starts with the species.
+
+        Unless cache=False, the solution is looked up in the solution cache
+        first, see solvecache.
+
+        Returns
+        -------
+        OptimizeResult
+            The result of solve_ivp: the concentrations of the species of
+            the network in y, at the times t, which end at the first
+            terminal event, and success, status and message. t_events
+            and y_events hold the events, None without them. stats holds
+            the SolveStats of the solve, sol the DenseSolution of
+            dense=True, None otherwise, and sensitivities the derivatives
+            asked for, if any.
         """
-        sol = solve_ivp(self.model_eq, (self.t[0], self.t[-1]), 
-                        self.init_conc, method='LSODA', t_eval=self.t)
+        method = select_method(method, stiff, 'LSODA')
+        fun, y0 = self.rhs, self.init_conc
+        system = None
+        if sensitivities is not None:
+            system = Sensitivities(self, sensitivities)
+            fun, y0 = system.rhs, system.y0
+        if method in STIFF_METHODS:
+            options.setdefault('jac', self.jac if system is None else system.jacobian(method))
+            # Without an exact Jacobian, let the solver build the finite
+            # difference one from a single evaluation on a block of states.
+            if options['jac'] is None:
+                options.setdefault('vectorized', True)
+                if system is None:
+                    options.setdefault('jac_sparsity', self.network.sparsity)
+        if events is not None:
+            if not isinstance(events, (list, tuple)):
+                events = [events]
+            options['events'] = [e.event(self) if isinstance(e, Threshold) else e
+                                 for e in events]
+        if dense:
+            options['dense_output'] = True
+        sol = solve_ivp(fun, (self.t[0], self.t[-1]), 
+                        y0, method=method, t_eval=self.t, **options)
+        if dense and sol.sol is not None:
+            sol.sol = DenseSolution.from_ode(sol.sol, fun)
+        if system is not None:
+            system.split(sol)
         return sol
     
 
 class SimpleClock(ChemicalClock):
+    network = ReactionNetwork(('gamma', 'beta'), ('rate',),
+                              [Reaction('rate', {'gamma': 1, 'beta': 2}, {'beta': 3})])
+
     def __init__(self, init_conc: np.ndarray,
                   t: np.ndarray, rates: np.ndarray, 
                   p_fast_factor: float = 100, q_fast_factor: float = 100) -> None:
@@ -87,6 +271,9 @@ class SimpleClock(ChemicalClock):
 
         # Return the model equations
         return np.array([dgamma, dbeta])
-    
 
+    def sensitivity_parameters(self) -> dict:
+        return {('rates', 0): {0: 1}}
 
+    def _constants(self):
+        return (self.rate,)
@@ -0,0 +1,28 @@
+"""
+Check that the fused right-hand side gives the same derivatives
+as the reference model equations.
+"""
+import numpy as np
+from chemicalclock import ChemicalClock
+
+rng = np.random.default_rng(105)
+tau = np.linspace(0, 40, 1000)
+
+for rate_factor in [1, 10, 100]:
+    rates = np.array([rate_factor, 0.1/rate_factor])
+    clock = ChemicalClock(np.array([1, 0, 10, 0, 0, 10, 0, 0]), tau, rates,
+                          p_fast_factor=100, q_fast_factor=100)
+    states = rng.uniform(0, 10, size=(8, 50))
+
+    # Single states, with and without a preallocated buffer.
+    out = np.empty(8)
+    for state in states.T:
+        reference = clock.model_eq(0, state)
+        assert np.allclose(clock.rhs(0, state), reference, rtol=1e-12, atol=1e-12)
+        assert np.allclose(clock.rhs(0, state, out=out), reference, rtol=1e-12, atol=1e-12)
+
+    # A whole block of states, as used by solve_ivp(..., vectorized=True).
+    reference = np.array([clock.model_eq(0, state) for state in states.T]).T
+    assert np.allclose(clock.rhs(0, states), reference, rtol=1e-12, atol=1e-12)
+
+print("ChemicalClock: fused right-hand side matches the reference.")
@@ -3,13 +3,9 @@ Calculate the time at which the reaction
 stops for a given initial concentration of X.
 """
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-from matplotlib.legend_handler import HandlerTuple
-import palettable as pl
-import cmasher as cmr
-from chemicalclock import ChemicalClock
-from helper import find_stop
+from chemicalclock import ChemicalClock, Threshold, event_time
+import shared
+from mod105.adaptive import sample
 
 # Do the usual stuff.
 init_conc = lambda a: np.array([1, 0, a, 0, 0, 10, 0, 0])
@@ -23,29 +19,39 @@ fixed = 0.1
 second_par = fixed/rate_factor
 rates = np.array([rate_factor, second_par])
 
-solutions = []
-for i in np.linspace(0.001, 10, 100):
-    # Create the chemical clock.
-    clock = ChemicalClock(init_conc(i), tau, rates, p_fast_factor=100, q_fast_factor=100)
+x_range = np.linspace(0.001, 10, 1000)
 
-    # Solve the model equations.
-    sol = clock.solve()
 
-    # Normalize the solutions.
-    sol.y = sol.y / np.max(sol.y, axis=1)[:, None]
+def compute():
+    """
+    Samples the initial concentration of the fourth species (index 2) and
+    finds when its concentration drops to 1e-4 of the initial one. The
+    solver stops right at that moment. Samples are only added where the
+    stop time is not yet resolved to within 0.05.
+    """
+    return sample(ChemicalClock,
+                  base=dict(init_conc=init_conc(0), t=tau, rates=rates,
+                            p_fast_factor=100, q_fast_factor=100),
+                  bounds={('init_conc', 2): (0.001, 10)},
+                  reducer=event_time,
+                  tol=0.05,
+                  solve_options=dict(events=Threshold('u', 1e-4, relative=True)))
 
-    # Find the stop time.
-    stop_time = find_stop(sol.y[2])
 
-    # Plot the results.
-    solutions.append(stop_time)
+def plot(result) -> None:
+    import matplotlib.pyplot as plt
 
-# Plot the results.
-fig, ax = plt.subplots(1, 1)
-ax.plot(np.linspace(0.001, 10, 100), solutions, c="#97e364")
-ax.set_xlabel(r"Initial concentration of $x$")
-ax.set_ylabel(r"Stop time")
-plt.title(r"Stop time as a function of initial concentration of $x$")
-ax.grid(color="#424656", alpha=0.1)
-plt.show()
+    solutions = result.to_grid(x_range)
 
+    fig, ax = plt.subplots(1, 1)
+    ax.plot(x_range, solutions, c="#97e364")
+    ax.scatter(result.points[:, 0], result.values, s=4, c="#424656", alpha=0.5)
+    ax.set_xlabel(r"Initial concentration of $x$")
+    ax.set_ylabel(r"Stop time")
+    plt.title(r"Stop time as a function of initial concentration of $x$")
+    ax.grid(color="#424656", alpha=0.1)
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot(compute())
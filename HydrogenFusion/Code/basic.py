@@ -2,10 +2,6 @@
 Basic evaluation of the Hydrogen Fusion process.
 """
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import cmasher as cmr
-import palettable as pl
 from hydrogenfusion import HydrogenFusion
 from helper import *
 
@@ -21,78 +17,91 @@ rates2 = np.array([0.01, 2, 1, 0.1, 1])
 t_eval = np.linspace(0, 10, 1000)
 t_eval2 = np.linspace(0, 5, 1000)
 
-# Initialize the HydrogenFusion class
-hf = HydrogenFusion(init_conc, t_eval, rates)
 
-# Solve the rate equations
-sol = hf.solve()
+def compute():
+    """
+    Solves the rate equations for both sets of initial concentrations, as
+    relative concentrations.
+    """
+    # Initialize the HydrogenFusion class
+    hf = HydrogenFusion(init_conc, t_eval, rates)
 
-# Repeat for the second set of initial concentrations
-hf2 = HydrogenFusion(init_conc2, t_eval2, rates2)
-sol2 = hf2.solve()
+    # Solve the rate equations
+    sol = hf.solve()
 
-# Normalize the solutions to the sum of the initial concentrations
-# thus giving relative concentrations instead of absolute ones.
-sol.y = sol.y / np.sum(init_conc)
-sol2.y = sol2.y / np.sum(init_conc2)
+    # Repeat for the second set of initial concentrations
+    hf2 = HydrogenFusion(init_conc2, t_eval2, rates2)
+    sol2 = hf2.solve()
 
+    # Normalize the solutions to the sum of the initial concentrations
+    # thus giving relative concentrations instead of absolute ones.
+    sol.y = sol.y / np.sum(init_conc)
+    sol2.y = sol2.y / np.sum(init_conc2)
+    return sol, sol2
 
 
-# Plot the results
-fig, ax = plt.subplots(1, 2, figsize=(10, 5))
+def plot(sol, sol2) -> None:
+    import matplotlib.pyplot as plt
+    import cmasher as cmr
+    import palettable as pl
 
-cm = pl.colorbrewer.sequential.BuPu_7.mpl_colormap
-colors = cmr.take_cmap_colors(cm, 7, cmap_range=(0.2, 1), return_fmt='hex')
+    fig, ax = plt.subplots(1, 2, figsize=(10, 5))
 
-# --- Plot 1 ---
-ax[0].plot(sol.t, sol.y[0], label='$H_2$', color=colors[1], linestyle='--')
-ax[0].plot(sol.t, sol.y[1], label='$Br_2$', color=colors[5], linestyle='--')
-ax[0].plot(sol.t, sol.y[2], label='$HBr$', color=colors[3])
-ax[0].plot(sol.t, sol.y[3], label='$H$', color=colors[2], linestyle=':')
-ax[0].plot(sol.t, sol.y[4], label='$Br$', color=colors[4], linestyle=':')
+    cm = pl.colorbrewer.sequential.BuPu_7.mpl_colormap
+    colors = cmr.take_cmap_colors(cm, 7, cmap_range=(0.2, 1), return_fmt='hex')
 
-# NOTE: An idea is to make the curves dimensionless by normalizing to the sum
-# of the initial concentrations (thus giving relative concentrations).
+    # --- Plot 1 ---
+    ax[0].plot(sol.t, sol.y[0], label='$H_2$', color=colors[1], linestyle='--')
+    ax[0].plot(sol.t, sol.y[1], label='$Br_2$', color=colors[5], linestyle='--')
+    ax[0].plot(sol.t, sol.y[2], label='$HBr$', color=colors[3])
+    ax[0].plot(sol.t, sol.y[3], label='$H$', color=colors[2], linestyle=':')
+    ax[0].plot(sol.t, sol.y[4], label='$Br$', color=colors[4], linestyle=':')
 
-ax[0].set_xlabel('Time (arb. units)')
-ax[0].set_ylabel('Relative Concentration')
+    # NOTE: An idea is to make the curves dimensionless by normalizing to the sum
+    # of the initial concentrations (thus giving relative concentrations).
 
-# Add textbox with decay parameter and initial concentration
-textstr = '\n'.join((
-    # r'$\tau=%.2f$' % (par[1], ),
-    r'$x_0={}$'.format([str(x) for x in init_conc], ),
-    r'Rate: {}'.format([str(x) for x in rates], )))
+    ax[0].set_xlabel('Time (arb. units)')
+    ax[0].set_ylabel('Relative Concentration')
 
-props = dict(boxstyle='round', facecolor=colors[0], alpha=0.5)
-ax[0].text(0.30, 0.10, textstr, transform=ax[0].transAxes, fontsize=10,
-        verticalalignment='top', bbox=props)
+    # Add textbox with decay parameter and initial concentration
+    textstr = '\n'.join((
+        # r'$\tau=%.2f$' % (par[1], ),
+        r'$x_0={}$'.format([str(x) for x in init_conc], ),
+        r'Rate: {}'.format([str(x) for x in rates], )))
 
-ax[0].legend(loc="upper left", ncol=2)
-ax[0].grid(color="#424656", alpha=0.1)
+    props = dict(boxstyle='round', facecolor=colors[0], alpha=0.5)
+    ax[0].text(0.30, 0.10, textstr, transform=ax[0].transAxes, fontsize=10,
+            verticalalignment='top', bbox=props)
 
-# --- Plot 2 ---
-ax[1].plot(sol2.t, sol2.y[0], label='$H_2$', color=colors[1], linestyle='--')
-ax[1].plot(sol2.t, sol2.y[1], label='$Br_2$', color=colors[5], linestyle='--')
-ax[1].plot(sol2.t, sol2.y[2], label='$HBr$', color=colors[3])
-ax[1].plot(sol2.t, sol2.y[3], label='$H$', color=colors[2], linestyle=':')
-ax[1].plot(sol2.t, sol2.y[4], label='$Br$', color=colors[4], linestyle=':')
+    ax[0].legend(loc="upper left", ncol=2)
+    ax[0].grid(color="#424656", alpha=0.1)
 
-ax[1].set_xlabel('Time (s)')
-ax[1].set_ylabel('Concentration (M)')
+    # --- Plot 2 ---
+    ax[1].plot(sol2.t, sol2.y[0], label='$H_2$', color=colors[1], linestyle='--')
+    ax[1].plot(sol2.t, sol2.y[1], label='$Br_2$', color=colors[5], linestyle='--')
+    ax[1].plot(sol2.t, sol2.y[2], label='$HBr$', color=colors[3])
+    ax[1].plot(sol2.t, sol2.y[3], label='$H$', color=colors[2], linestyle=':')
+    ax[1].plot(sol2.t, sol2.y[4], label='$Br$', color=colors[4], linestyle=':')
 
-# Add textbox with decay parameter and initial concentration
-textstr = '\n'.join((
-    # r'$\tau=%.2f$' % (par[1], ),
-    r'$x_0={}$'.format([str(x) for x in init_conc2], ),
-    r'Rate: {}'.format([str(x) for x in rates2], )))
-props = dict(boxstyle='round', facecolor=colors[0], alpha=0.5)
-ax[1].text(0.38, 0.45, textstr, transform=ax[1].transAxes, fontsize=10,
-        verticalalignment='top', bbox=props)
+    ax[1].set_xlabel('Time (s)')
+    ax[1].set_ylabel('Concentration (M)')
 
-ax[1].legend()
-ax[1].grid(color="#424656", alpha=0.1)
+    # Add textbox with decay parameter and initial concentration
+    textstr = '\n'.join((
+        # r'$\tau=%.2f$' % (par[1], ),
+        r'$x_0={}$'.format([str(x) for x in init_conc2], ),
+        r'Rate: {}'.format([str(x) for x in rates2], )))
+    props = dict(boxstyle='round', facecolor=colors[0], alpha=0.5)
+    ax[1].text(0.38, 0.45, textstr, transform=ax[1].transAxes, fontsize=10,
+            verticalalignment='top', bbox=props)
 
-plt.suptitle("Example of the exact solution to the rate equations for the synthesis of HBr")
-plt.subplots_adjust(top=0.93, bottom=0.09, left=0.06, right=0.98)
-plt.show()
+    ax[1].legend()
+    ax[1].grid(color="#424656", alpha=0.1)
 
+    plt.suptitle("Example of the exact solution to the rate equations for the synthesis of HBr")
+    plt.subplots_adjust(top=0.93, bottom=0.09, left=0.06, right=0.98)
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot(*compute())
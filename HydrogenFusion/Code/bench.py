@@ -0,0 +1,74 @@
+"""
+Benchmarks of the HydrogenFusion models, see mod105/benchmark.py. Run from the
+repository root, e.g.
+
+    python ./HydrogenFusion/Code/bench.py run -o hf.json
+    python ./HydrogenFusion/Code/bench.py run --baseline hf.json
+"""
+import sys
+import numpy as np
+import shared
+from mod105.benchmark import Benchmark, main
+from hydrogenfusion import HydrogenFusion, HydrogenFusionStationaryH, HydrogenFusionStationaryBr
+from mod105.conservation import conserved
+from mod105.ensemble import ensemble
+from mod105.logspace import log_space
+from mod105.sweep import sweep
+
+# The usual setup of the scripts.
+init_conc = np.array([1, 1, 0, 0, 0])
+rates = np.array([1, 1, 1, 1, 1])
+t_eval = np.linspace(0, 10, 1000)
+hf = HydrogenFusion(init_conc, t_eval, rates)
+
+# The long horizon of experimentation.py.
+hf_long = HydrogenFusion(np.array([1, 1, 0, 10, 0]), np.linspace(0, 1000, 10000),
+                         np.array([2, 0.5, 1, 1, 0.1]))
+
+state = np.array([0.8, 0.7, 0.4, 0.01, 0.02])
+block = np.random.default_rng(0).random((5, 1000))
+
+benchmarks = [
+    Benchmark('hf/rhs', lambda: hf.rhs(0, state), number=1000),
+    Benchmark('hf/rhs-block', lambda: hf.rhs(0, block), params={'states': 1000}, number=100),
+    Benchmark('hf/jac', lambda: hf.jac(0, state), number=1000),
+    Benchmark('hf/solve', lambda: hf.solve(cache=False), params={'t': 10, 'method': 'RK45'}),
+    Benchmark('hf/solve-stiff', lambda: hf.solve(stiff=True, cache=False), params={'t': 10, 'method': 'BDF'}),
+    Benchmark('hf/solve-dense', lambda: hf.solve(dense=True, cache=False), params={'t': 10}),
+    # Derivatives by all rates and both initial reactants in one solve.
+    Benchmark('hf/solve-sensitivities',
+              lambda: hf.solve(sensitivities=[('rates', i) for i in range(5)] + [('init_conc', 0), ('init_conc', 1)],
+                               cache=False),
+              params={'t': 10, 'method': 'RK45', 'parameters': 7}),
+    Benchmark('hf/solve-conserved',
+              lambda: conserved(HydrogenFusion)(init_conc, t_eval, rates).solve(stiff=True, cache=False),
+              params={'t': 10, 'method': 'BDF', 'species': 3}),
+    # The HBr-rich start of rate-of-synthesis.py, with the radicals at zero.
+    Benchmark('hf/solve-logspace',
+              lambda: log_space(HydrogenFusion)(np.array([1, 1, 1e3, 0, 0]), t_eval, rates).solve(cache=False),
+              params={'t': 10, 'method': 'RK45'}),
+    Benchmark('hf/stationary-h', lambda: HydrogenFusionStationaryH(init_conc, t_eval, rates).solve(cache=False)),
+    Benchmark('hf/stationary-br', lambda: HydrogenFusionStationaryBr(init_conc, t_eval, rates).solve(cache=False)),
+    Benchmark('hf/experimentation', lambda: hf_long.solve(cache=False),
+              params={'t': 1000, 'points': 10000, 'method': 'RK45'}, repeat=3),
+    Benchmark('hf/experimentation-stiff', lambda: hf_long.solve(stiff=True, cache=False),
+              params={'t': 1000, 'points': 10000, 'method': 'BDF'}, repeat=3),
+    # The 100x100 rate grid of quintic-pars.py.
+    Benchmark('hf/sweep-10k',
+              lambda: sweep(HydrogenFusion, dict(init_conc=init_conc, t_eval=t_eval, rates=rates),
+                            {('rates', 0): np.linspace(0.1, 10, 100), ('rates', 1): np.linspace(0.1, 10, 100)},
+                            reducer=lambda sol: sol.y[2, -1], solve_options=dict(cache=False)),
+              params={'points': 10000}, repeat=1, memory=False),
+    # The same grid as one fixed-grid ensemble, on the 101 point grid of the
+    # screening runs.
+    *[Benchmark(f'hf/ensemble-10k-{method.lower()}',
+                lambda method=method: ensemble(HydrogenFusion,
+                                               dict(init_conc=init_conc, t_eval=np.linspace(0, 10, 101), rates=rates),
+                                               {('rates', 0): np.linspace(0.1, 10, 100),
+                                                ('rates', 1): np.linspace(0.1, 10, 100)}, method=method),
+                params={'points': 10000, 'steps': 100}, repeat=3)
+      for method in ('BS3', 'DOPRI5', 'ROS2')],
+]
+
+if __name__ == '__main__':
+    sys.exit(main(benchmarks))
@@ -0,0 +1,75 @@
+"""
+Check that repeated solves are served from the solution cache as copies,
+that other parameters, options or equations miss it, and that the disk
+tier serves the solutions of an earlier process.
+"""
+import inspect
+import tempfile
+import numpy as np
+from hydrogenfusion import HydrogenFusion
+import shared
+from mod105 import solvecache
+from mod105.solvecache import SolutionCache, equations_version, solution_key
+
+init_conc = np.array([1, 1, 0, 0, 0])
+t_eval = np.linspace(0, 5, 50)
+rates = np.array([1, 2, 1, 0.5, 3])
+
+solvecache.default_cache = SolutionCache()
+first = HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True)
+second = HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True)
+assert not first.stats.cached and second.stats.cached
+assert np.array_equal(first.y, second.y)
+
+# A hit has the same fields as the solve, also those that are None, such as
+# sol without dense output and the events of a solve without any.
+assert set(second) == set(first)
+assert second.sol is None and second.t_events is None and second.y_events is None
+
+# Changing a solution must not change the cached one.
+second.y[:] = -1
+assert np.array_equal(HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True).y, first.y)
+first.y[:] = -1
+assert np.all(HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True).y >= 0)
+
+# Other rates, options or an explicit cache=False solve again.
+assert not HydrogenFusion(init_conc, t_eval, rates * 2).solve(stiff=True).stats.cached
+assert not HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True, rtol=1e-6).stats.cached
+assert not HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True, cache=False).stats.cached
+
+solvecache.default_cache.invalidate(HydrogenFusion)
+assert not HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True).stats.cached
+print("HydrogenFusion: repeated solves are served from the cache as copies.")
+
+# Editing the model or any of the shared solver modules changes the keys.
+model = HydrogenFusion(init_conc, t_eval, rates)
+key = solution_key(model, 'solve', stiff=True)
+source = inspect.getsource
+for edited in ['hydrogenfusion', 'mod105.sensitivity']:
+    inspect.getsource = lambda module: source(module) + ('#' if module.__name__ == edited else '')
+    equations_version.cache_clear()
+    try:
+        assert solution_key(model, 'solve', stiff=True) != key
+    finally:
+        inspect.getsource = source
+        equations_version.cache_clear()
+assert solution_key(model, 'solve', stiff=True) == key
+print("HydrogenFusion: editing the equations or the solver invalidates the cache.")
+
+with tempfile.TemporaryDirectory() as directory:
+    solvecache.default_cache = SolutionCache(disk_bytes=2**20, directory=directory)
+    first = HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True)
+
+    # A new process starts with an empty memory tier.
+    solvecache.default_cache = SolutionCache(disk_bytes=2**20, directory=directory)
+    second = HydrogenFusion(init_conc, t_eval, rates).solve(stiff=True)
+    assert second.stats.cached and set(second) == set(first) and second.sol is None
+    assert np.array_equal(first.y, second.y)
+
+    # Beyond the limit, the least recently used files are evicted.
+    cache = SolutionCache(disk_bytes=64 * 2**10, directory=directory)
+    for i in range(20):
+        cache.put(f'HydrogenFusion-{i}', np.full(1000, i, dtype=float))
+    assert cache._scan()[1] <= cache.disk_bytes
+    assert cache.get('HydrogenFusion-19') is not None
+print("HydrogenFusion: the disk tier serves the solutions of earlier processes.")
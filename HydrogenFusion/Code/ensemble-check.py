@@ -0,0 +1,41 @@
+"""
+Check that the fixed-grid ensembles match solve_ivp for every member,
+to the order of their schemes, and that they flag the members a grid is
+too coarse for.
+"""
+import numpy as np
+from hydrogenfusion import HydrogenFusion
+import shared
+from mod105.ensemble import ensemble
+from mod105.sweep import grid_point
+
+base = dict(init_conc=np.array([1, 1, 0, 0, 0]), t_eval=np.linspace(0, 5, 501), rates=np.array([1, 2, 1, 0.5, 3]))
+axes = {('rates', 0): np.linspace(0.5, 2, 3), ('rates', 4): np.array([1, 10, 100])}
+
+reference = np.stack([HydrogenFusion(**grid_point(base, axes, i)).solve(method='Radau', rtol=1e-10, atol=1e-12,
+                                                                         cache=False).y for i in range(9)], axis=1)
+reference = reference.reshape((5, 3, 3, -1))
+
+# The steps are 0.01 long, the stiff members at rates[4] = 100 are still
+# resolved by the explicit pairs.
+for method, rtol, tolerance in [('DOPRI5', 1e-8, 1e-8), ('BS3', 1e-5, 1e-5), ('ROS2', 1e-2, 1e-3)]:
+    sol = ensemble(HydrogenFusion, base, axes, method=method, rtol=rtol, atol=rtol)
+    assert sol.y.shape == reference.shape and sol.success.all()
+    assert np.allclose(sol.y, reference, rtol=tolerance, atol=tolerance)
+
+    single = ensemble(HydrogenFusion, base, axes, method=method, rtol=rtol, atol=rtol, dtype=np.float32)
+    assert single.y.dtype == np.float32
+    assert np.allclose(single.y, sol.y, rtol=1e-6, atol=1e-6)
+print("HydrogenFusion: fixed-grid ensembles match solve_ivp.")
+
+# One step per output time of 0.5 is too coarse for all members, the
+# faster ones break down.
+coarse = dict(base, t_eval=np.linspace(0, 5, 11))
+sol = ensemble(HydrogenFusion, coarse, axes, method='DOPRI5', rtol=1e-8, atol=1e-8)
+assert not sol.success.any() and (sol.status == -1).any()
+assert np.all(sol.error[sol.status == 1] > 1)
+assert np.isnan(sol.y[:, sol.status == -1, -1]).all()
+sol = ensemble(HydrogenFusion, coarse, axes, method='DOPRI5', rtol=1e-8, atol=1e-8, max_step=0.01)
+assert sol.success.all()
+assert np.allclose(sol.y, reference[..., ::50], rtol=1e-6, atol=1e-6)
+print("HydrogenFusion: fixed-grid ensembles flag the members the grid is too coarse for.")
@@ -0,0 +1,56 @@
+"""
+Check that find_best_fit picks the same parameters as the plain loop over
+every pair of (k, m) it replaced, and that the zoom and the refinement
+recover the rate constants of a rate law from its own curve.
+"""
+import numpy as np
+from helper import _best_candidate, distance, find_best_fit, hbr_rate_law
+from hydrogenfusion import HydrogenFusion
+
+t_eval = np.linspace(0, 10, 200)
+sol = HydrogenFusion(np.array([1, 1, 0, 0, 0]), t_eval, np.array([1, 1, 1, 1, 1])).solve(cache=False)
+H2, Br2, HBr = sol.y[:3]
+rate_law, rate_law_jac = hbr_rate_law(H2, Br2, HBr)
+
+
+def brute_force(func, data, k_range, m_range):
+    """
+    The loop find_best_fit replaced, over every pair of k and m.
+    """
+    best_k, best_m, best_dist = 0, 0, np.inf
+    for k in k_range:
+        for m in m_range:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                dist = distance(func(k, m), data)
+            if dist < best_dist:
+                best_k, best_m, best_dist = k, m, dist
+    return best_k, best_m
+
+
+k_range = m_range = np.linspace(0, 10, 41)
+candidates = np.stack(np.meshgrid(k_range, m_range, indexing='ij'), axis=-1).reshape(-1, 2)
+rng = np.random.default_rng(0)
+for k, m, noise in [(2.5, 0.75, 0), (2.37, 0.613, 0), (2.5, 0.75, 0.05)]:
+    data = rate_law(k, m) * (1 + noise * rng.standard_normal(len(t_eval)))
+    expected = brute_force(rate_law, data, k_range, m_range)
+    # Small blocks split the candidates over several evaluations.
+    for block in [2**22, 5 * len(t_eval)]:
+        best, _ = _best_candidate(rate_law, data, candidates, block)
+        assert tuple(best) == expected
+    assert find_best_fit(rate_law, data, ((0, 10), (0, 10)), points=41, levels=0, refine=False) == expected
+print("HydrogenFusion: the grid scan of find_best_fit matches the plain loop.")
+
+# The zoom and the refinement go beyond the grid, to the exact constants.
+for k, m in [(2.5, 0.75), (2.37, 0.613), (700, 440)]:
+    data = rate_law(k, m)
+    for jac in [rate_law_jac, None]:
+        assert np.allclose(find_best_fit(rate_law, data, jac=jac), (k, m), rtol=1e-4)
+
+# With noise there is no exact fit, the refinement only keeps what lowers
+# the distance.
+data = rate_law(2.37, 0.613) * (1 + 0.05 * rng.standard_normal(len(t_eval)))
+grid = find_best_fit(rate_law, data, refine=False)
+refined = find_best_fit(rate_law, data, jac=rate_law_jac)
+assert distance(rate_law(*refined), data) <= distance(rate_law(*grid), data)
+assert np.allclose(refined, (2.37, 0.613), rtol=0.1)
+print("HydrogenFusion: find_best_fit recovers the constants of the rate law.")
@@ -3,7 +3,7 @@ A source file containing helper functions that can be used
 across the project.
 """
 import numpy as np
-from scipy.optimize import curve_fit
+from scipy.optimize import curve_fit, least_squares
 
 def exp(x, a, b):
     """
@@ -28,6 +28,68 @@ def fit_func(x, y, func):
     return curve, popt, pcov
 
 
+def fit_basis(x, y, degree=5, basis='chebyshev', power=True):
+    """
+    Least-squares fit of a polynomial to a whole batch of curves that share
+    the same x, e.g. every point of a sweep, with a single factorization.
+    The covariances match those of curve_fit.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The common sample points, of shape (n,).
+    y : np.ndarray
+        The curves, of shape (..., n).
+    degree : int
+        Degree of the polynomial.
+    basis : str
+        The basis the fit is done in: 'power', 'chebyshev' or 'legendre'.
+        The orthogonal bases are taken over the range of x and are much
+        better conditioned than the powers of x.
+    power : bool
+        Whether to return the coefficients of the powers of x, in the order
+        of quintic, instead of those of the fitting basis.
+
+    Returns
+    -------
+    tuple
+        The coefficients, of shape (..., degree + 1), and their covariance
+        matrices, of shape (..., degree + 1, degree + 1).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    domain = [x.min(), x.max()]
+    kinds = {'power': np.polynomial.Polynomial,
+             'chebyshev': np.polynomial.Chebyshev,
+             'legendre': np.polynomial.Legendre}
+    if basis not in kinds:
+        raise ValueError(f"Unknown basis {basis!r}, use one of {list(kinds)}.")
+    kind = kinds[basis]
+    if basis == 'power':
+        domain = [-1, 1]
+    functions = [kind.basis(j, domain=domain) for j in range(degree + 1)]
+
+    # Design matrix and its QR factorization, shared by every curve.
+    A = np.stack([f(x) for f in functions], axis=-1)
+    Q, R = np.linalg.qr(A)
+    R_inv = np.linalg.inv(R)
+
+    coefs = y @ Q @ R_inv.T
+    residuals = y - coefs @ A.T
+    variance = np.sum(residuals**2, axis=-1) / (len(x) - degree - 1)
+    covs = variance[..., None, None] * (R_inv @ R_inv.T)
+
+    if power and basis != 'power':
+        # Column j holds basis function j written in powers of x.
+        T = np.zeros((degree + 1, degree + 1))
+        for j, f in enumerate(functions):
+            c = f.convert(kind=np.polynomial.Polynomial).coef
+            T[:len(c), j] = c
+        coefs = coefs @ T.T
+        covs = T @ covs @ T.T
+    return coefs, covs
+
+
 def find_decay_parameter(tau, sol, return_curve_fit=False):
     """
     Find the decay parameter of a solution by
@@ -45,37 +107,124 @@ def find_decay_parameter(tau, sol, return_curve_fit=False):
         return popt[1]
     
 
-def distance(a, b):
+def distance(a, b, axis=None):
     # Make weighted sum where points closer to the origin are weighted more
     # heavily
-    return np.sum(np.abs(a - b) / np.abs(b))
+    return np.sum(np.abs(a - b) / np.abs(b), axis=axis)
 
-def find_best_fit(func, data):
-    # Define the range of parameters to search over
-    k_range = np.linspace(0, 1000, 1000)
-    m_range = np.linspace(0, 1000, 1000)
 
-    # Initialize the best fit parameters
-    best_k = 0
-    best_m = 0
+def hbr_rate_law(H2, Br2, HBr):
+    """
+    The rate law k*H2*Br2^(3/2)/(m*Br2 + HBr) for the given concentration
+    curves, as a function of (k, m) and its analytic derivatives. Both
+    broadcast over arrays of k and m, as find_best_fit expects.
+    """
+    numerator = H2 * Br2**(3/2)
 
-    # Initialize the best fit distance
-    best_dist = np.inf
+    def rate_law(k, m):
+        return k * numerator / (m*Br2 + HBr)
 
-    # Loop over all parameters
-    for i, k in enumerate(k_range):
-        for j, m in enumerate(m_range):
-            print(f"Now calculating {i}/{len(k_range)} and {j}/{len(m_range)}")
-            # Calculate the fit
-            fit = func(k, m)
+    def rate_law_jac(k, m):
+        denominator = m*Br2 + HBr
+        return np.stack(np.broadcast_arrays(numerator / denominator,
+                                            -k * numerator * Br2 / denominator**2), axis=-1)
 
-            # Calculate the distance between the fit and the data
-            dist = distance(fit, data)
+    return rate_law, rate_law_jac
 
-            # Update the best fit parameters
-            if dist < best_dist:
-                best_dist = dist
-                best_k = k
-                best_m = m
 
-    return best_k, best_m
+def find_best_fit(func, data, ranges=((0, 1000), (0, 1000)), points=64, levels=6,
+                  jac=None, refine=True, block=2**22):
+    """
+    Find the parameters for which func fits the data best, measured by
+    distance. Works for any number of parameters.
+
+    The parameter space is first scanned on a coarse grid, evaluating
+    blocks of candidates at once, then repeatedly zoomed in around the
+    best candidate and finally refined by a least squares fit.
+
+    Parameters
+    ----------
+    func : callable
+        func(*params) returns the fitted curve. Each parameter is passed as
+        an array of shape (n, 1) and the result must broadcast to
+        (n, len(data)), which plain NumPy expressions of the parameters do.
+    data : np.ndarray
+        The data to fit.
+    ranges : sequence of (float, float)
+        Search range of every parameter.
+    points : int
+        Grid points per parameter on every level.
+    levels : int
+        Number of zoom levels after the coarse scan.
+    jac : callable, optional
+        jac(*params) returns the derivatives of the curve with respect to
+        the parameters, with shape (len(data), n_params). Finite
+        differences are used for the refinement if it is not given.
+    refine : bool
+        Whether to refine the grid result with a least squares fit of the
+        relative residuals, which is kept if it lowers distance.
+    block : int
+        Maximum number of curve values evaluated at once.
+
+    Returns
+    -------
+    tuple
+        The best fit parameters.
+    """
+    data = np.asarray(data, dtype=float)
+    bounds = np.array(ranges, dtype=float)
+    lower, upper = bounds[:, 0].copy(), bounds[:, 1].copy()
+
+    best, best_dist = None, np.inf
+    for level in range(levels + 1):
+        axes = [np.linspace(lo, hi, points) for lo, hi in zip(lower, upper)]
+        candidates = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(axes))
+        params, dist = _best_candidate(func, data, candidates, block)
+        if dist < best_dist:
+            best, best_dist = params, dist
+
+        # Zoom in to one grid spacing around the best candidate.
+        spacing = (upper - lower) / (points - 1)
+        lower = np.maximum(bounds[:, 0], best - spacing)
+        upper = np.minimum(bounds[:, 1], best + spacing)
+
+    if refine:
+        # distance has kinks wherever a residual changes sign, which a
+        # gradient based minimizer cannot step across, and the grid may end
+        # up anywhere along a flat valley of it. The refinement is therefore
+        # a least squares fit of the relative residuals, kept only if it
+        # also lowers distance.
+        scale = np.abs(data)
+
+        def residual(params):
+            return (func(*params) - data) / scale
+
+        def residual_jac(params):
+            return jac(*params) / scale[:, None]
+
+        result = least_squares(residual, best, jac='2-point' if jac is None else residual_jac,
+                               bounds=(bounds[:, 0], bounds[:, 1]), x_scale='jac')
+        if result.success and distance(func(*result.x), data) < best_dist:
+            best = result.x
+
+    return tuple(best)
+
+
+def _best_candidate(func, data, candidates, block):
+    """
+    Evaluates func for blocks of candidate parameters at once and returns
+    the candidate with the smallest distance to the data.
+    """
+    size = max(1, block // data.size)
+    best, best_dist = candidates[0], np.inf
+    for start in range(0, len(candidates), size):
+        chunk = candidates[start:start + size]
+        # Candidates such as m = 0 may divide by zero, they just lose.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            curves = func(*(chunk[:, i, None] for i in range(chunk.shape[1])))
+            dist = distance(np.broadcast_to(curves, (len(chunk), data.size)), data, axis=-1)
+        dist = np.where(np.isnan(dist), np.inf, dist)
+        i = np.argmin(dist)
+        if dist[i] < best_dist:
+            best, best_dist = chunk[i], dist[i]
+    return best, best_dist
@@ -3,10 +3,33 @@ Contains the base class HydrogenFusion, which is responsible for
 running the simulation of the second task.
 """
 import numpy as np
-from scipy.integrate import solve_ivp
+from scipy.optimize import OptimizeResult
 from typing import Iterable
+import shared
+from mod105.reactionnetwork import Reaction, ReactionNetwork
+from mod105.densesolution import DenseSolution
+from mod105.solvecache import cached
+from mod105.sensitivity import Sensitivities
+from mod105.solvestats import STIFF_METHODS, select_method, solve_ivp
+from mod105.steadystate import steady_state
+
+
+SPECIES = ('H2', 'Br2', 'HBr', 'H', 'Br')
+RATES = ('p', 'q', 'r', 's', 't')
+
+# The reactions behind the rate equations, with the effective
+# stoichiometry used in the dimensionless model.
+DISSOCIATION = Reaction('p', {'Br2': 1}, change={'Br2': -1, 'Br': 1})
+RECOMBINATION = Reaction('q', {'Br': 2}, change={'Br2': 1, 'Br': -1})
+FORWARD = Reaction('r', {'H2': 1, 'Br': 1}, change={'H2': -1, 'HBr': 0.5, 'H': 0.5})
+BACKWARD = Reaction('s', {'HBr': 1, 'H': 1}, change={'H2': 1, 'HBr': -0.5, 'H': -0.5})
+BROMINATION = Reaction('t', {'Br2': 1, 'H': 1}, change={'Br2': -0.5, 'HBr': 0.5, 'H': -0.5, 'Br': 0.5})
+
 
 class HydrogenFusion:
+    network = ReactionNetwork(SPECIES, RATES,
+                              [DISSOCIATION, RECOMBINATION, FORWARD, BACKWARD, BROMINATION])
+
     def __init__(self,
                  init_conc: Iterable[float],
                  t_eval: Iterable[float],
@@ -28,18 +51,123 @@ class HydrogenFusion:
                          self._dx(t_eval, state),
                          self._dy(t_eval, state),
                          self._dz(t_eval, state)])
+
+    def rhs(self, t_eval, state, out=None):
+        """
+        Fast right-hand side of the rate equations, generated from the
+        reaction network of the model.
+
+        Gives the same result as rate_eq, which is kept as the slow reference.
+        state may also be a block of shape (5, m) as passed by
+        solve_ivp(..., vectorized=True), and rates may then hold one column
+        per member. If out is given, the result is written into it instead
+        of a new array.
+        """
+        return self.network.rhs(t_eval, state, self.rates, out)
+
+    def jac(self, t_eval, state):
+        """
+        Exact Jacobian of the rate equations with respect to the state.
+        """
+        return self.network.jac(t_eval, state, self.rates)
+
+    def parameter_jac(self, t_eval, state):
+        """
+        Exact Jacobian of the rate equations with respect to the rates.
+        """
+        return self.network.parameter_jac(t_eval, state, self.rates)
+
+    def sensitivity_parameters(self):
+        """
+        The parameters solve can give sensitivities for, with the rates
+        they set, see sensitivity.chain.
+        """
+        return {('rates', i): {i: 1} for i in range(len(RATES))}
     
-    def solve(self):
+    @cached
+    def solve(self, method: str | None = None, stiff: bool = False, dense: bool = False,
+              sensitivities=None, **options) -> OptimizeResult:
         """
         Solve the rate equations using scipy's solve_ivp function.
+
+        The method defaults to RK45, or to BDF if stiff is True. The stiff
+        methods (BDF, Radau, LSODA) are given the exact Jacobian. Any further
+        keyword arguments are passed on to solve_ivp.
+
+        With dense=True, sol.sol is a DenseSolution that evaluates the
+        concentrations at any times between t_eval[0] and t_eval[-1],
+        without solving again.
+
+        sensitivities lists parameters, ('rates', i) or ('init_conc', i),
+        whose derivatives dy/dtheta are integrated alongside, see
+        sensitivity.Sensitivities. They are returned in sol.sensitivities,
+        of shape (5, len(sensitivities), len(t_eval)).
+
+        Unless cache=False, the solution is looked up in the solution cache
+        first, see solvecache.
+
+        Returns
+        -------
+        OptimizeResult
+            The result of solve_ivp: the concentrations of SPECIES in y, of
+            shape (5, len(t_eval)), at the times t, and success, status and
+            message. stats holds the SolveStats of the solve, sol the
+            DenseSolution of dense=True, None otherwise, and
+            sensitivities the derivatives asked for, if any.
         """
-        sol = solve_ivp(self.rate_eq,
+        method = select_method(method, stiff)
+        fun, y0 = self.rhs, self.init_conc
+        system = None
+        if sensitivities is not None:
+            system = Sensitivities(self, sensitivities)
+            fun, y0 = system.rhs, system.y0
+        if method in STIFF_METHODS:
+            options.setdefault('jac', self.jac if system is None else system.jacobian(method))
+            # Without an exact Jacobian, let the solver build the finite
+            # difference one from a single evaluation on a block of states.
+            if options['jac'] is None:
+                options.setdefault('vectorized', True)
+                if system is None:
+                    options.setdefault('jac_sparsity', self.network.sparsity)
+        if dense:
+            options['dense_output'] = True
+        sol = solve_ivp(fun,
                         t_span=(self.t_eval[0], self.t_eval[-1]),
-                        y0=self.init_conc,
-                        t_eval=self.t_eval,)
+                        y0=y0,
+                        t_eval=self.t_eval,
+                        method=method,
+                        **options)
+        if dense and sol.sol is not None:
+            sol.sol = DenseSolution.from_ode(sol.sol, fun)
+        if system is not None:
+            system.split(sol)
         return sol
         
 
+    def steady_state(self, guess=None, tol: float = 1e-10, max_iter: int = 50,
+                     ptc: bool = True, max_steps: int = 1000):
+        """
+        Finds the steady state the system settles into, directly instead
+        of integrating to long times.
+
+        Newton's method is run on the rate equations together with the
+        conservation laws of the initial concentrations, falling back to
+        pseudo-transient continuation where it does not converge, see
+        mod105.steadystate.steady_state. init_conc and rates may hold a whole
+        grid, of shape (5, ...), e.g. a map over the initial H2 and Br2,
+        which is then solved at once.
+
+        Returns
+        -------
+        OptimizeResult
+            x holds the concentrations, of shape (5, ...), and success,
+            nit, ptc and residual tell how every member went. A variant
+            without a fixed point, e.g. the stationary ones for most
+            initial concentrations, reports success False.
+        """
+        return steady_state(self, self.rates, guess, tol=tol,
+                            max_iter=max_iter, ptc=ptc, max_steps=max_steps)
+
     def _du(self, t_eval, state):
         # Unpack the state vector
         u, v, x, y, z = state
@@ -86,6 +214,12 @@ class HydrogenFusion:
         return 0.5*t*v*y + p*v - q*z**2
     
 class HydrogenFusionStationaryH(HydrogenFusion):
+    network = ReactionNetwork(SPECIES, RATES, [
+        DISSOCIATION,
+        RECOMBINATION,
+        Reaction('t', {'Br2': 1, 'H': 1}, change={'H2': -0.5, 'Br2': -0.5, 'HBr': 1, 'Br': 0.5}),
+    ])
+
     def __init__(self, init_conc: Iterable[float], t_eval: Iterable[float], rates: Iterable[float]) -> None:
         """
         A stationary solution for the rate equations where the concentration of
@@ -142,6 +276,13 @@ class HydrogenFusionStationaryH(HydrogenFusion):
         return 0.5 * t*v*y + p*v - q*z**2
     
 class HydrogenFusionStationaryBr(HydrogenFusion):
+    network = ReactionNetwork(SPECIES, RATES, [
+        Reaction('p', {'Br2': 1}, change={'HBr': -1, 'H': 1}),
+        Reaction('q', {'Br': 2}, change={'HBr': 1, 'H': -1}),
+        FORWARD,
+        BACKWARD,
+    ])
+
     def __init__(self, init_conc: Iterable[float], t_eval: Iterable[float], rates: Iterable[float]) -> None:
         """
         A stationary solution for the rate equations where the concentration of
@@ -2,14 +2,12 @@
 Plot the rate of synthesis of HBr as a function of time
 for different initial concentrations of H2 and Br2.
 """
+import argparse
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-import cmasher as cmr
-import palettable as pl
 from helper import *
 from hydrogenfusion import HydrogenFusion
+import shared
+from mod105.sweep import sweep
 
 # Do the usual initialization.
 init_conc = np.array([1, 1, 0, 0, 0])
@@ -21,85 +19,108 @@ init_conc2 = np.array([1, 1, 0, 0, 0])
 init_conc3 = np.array([1, 100, 0, 0, 0])
 init_conc4 = np.array([1, 1, 1e3, 0, 0])
 
-hf1 = HydrogenFusion(init_conc1, t_eval, rates)
-hf2 = HydrogenFusion(init_conc2, t_eval, rates)
-hf3 = HydrogenFusion(init_conc3, t_eval, rates)
-hf4 = HydrogenFusion(init_conc4, t_eval, rates)
+# --- Continuous plot ---
+# Define the initial concentrations.
+H2_range = np.linspace(0.001, 100, 100)
+Br2_range = np.linspace(0.001, 100, 100)
 
-sol1 = hf1.solve()
-sol2 = hf2.solve()
-sol3 = hf3.solve()
-sol4 = hf4.solve()
 
-# Normalize the solutions to the sum of the initial concentrations
-sol1.y = sol1.y / np.sum(init_conc1)
-sol2.y = sol2.y / np.sum(init_conc2)
-sol3.y = sol3.y / np.sum(init_conc3)
-sol4.y = sol4.y / np.sum(init_conc4)
+def normalized_hbr(sol) -> np.ndarray:
+    """
+    The HBr concentration relative to the initial molecules.
+    """
+    return sol.y[2] / np.sum(sol.y[:, 0])
+
+
+def compute() -> tuple:
+    """
+    Solves the rate equations for the four initial concentrations, as
+    relative concentrations.
+    """
+    solutions = []
+    for conc in (init_conc1, init_conc2, init_conc3, init_conc4):
+        sol = HydrogenFusion(conc, t_eval, rates).solve()
+        # Normalize the solutions to the sum of the initial concentrations
+        sol.y = sol.y / np.sum(conc)
+        solutions.append(sol)
+    return tuple(solutions)
+
+
+def compute_leading() -> np.ndarray:
+    """
+    The leading quintic coefficient of the normalized HBr concentration
+    over the grid of initial H2 and Br2.
+    """
+    result = sweep(HydrogenFusion,
+                   base=dict(init_conc=np.array([0, 0, 0, 0, 0]), t_eval=t_eval, rates=rates),
+                   grid={('init_conc', 0): H2_range, ('init_conc', 1): Br2_range},
+                   reducer=normalized_hbr,
+                   progress=True)
+    coefs, covs = fit_basis(t_eval, result.values, degree=5)
+    return coefs[..., -1]
+
+
+def save_leading(solutions: np.ndarray) -> None:
+    import pandas as pd
 
-# Plot
-fig, ax = plt.subplots(1, 2, figsize=(10, 5))
+    df = pd.DataFrame(solutions, index=H2_range, columns=Br2_range)
+    df.to_hdf('./HydrogenFusion/Results/synthesis-leading.h5', key='Synthesis', mode='w', complevel=9)
 
-# Define the colors.
-custom_colors = ["#9750a1", "#00c9bf", "#48817c"]
 
-ax[0].plot(sol1.t, sol1.y[2], color=custom_colors[0], label=r'$\frac{\mathrm{H}_2}{\mathrm{Br}_2} = 100$')
-ax[0].plot(sol2.t, sol2.y[2], color=custom_colors[1], label=r'$\frac{\mathrm{H}_2}{\mathrm{Br}_2} = 1$')
-ax[0].plot(sol3.t, sol3.y[2], color=custom_colors[2], label=r'$\frac{\mathrm{H}_2}{\mathrm{Br}_2} = 0.01$')
-ax[0].plot(sol4.t, sol4.y[2], color="#97e364", label=r'$\frac{\mathrm{HBr}}{\mathrm{Br}_2} = 10^3$')
+def load_leading() -> np.ndarray:
+    import pandas as pd
 
-ax[0].set_xlabel('Time [arb. units]')
-ax[0].set_ylabel('Relative Concentration')
+    return pd.read_hdf('./HydrogenFusion/Results/synthesis-leading.h5', key='Synthesis').values
 
-ax[0].legend(loc='center left', ncol=1, frameon=False)
-ax[0].grid(color="#424656", alpha=0.1)
 
-ax[0].set_title("Rate of Synthesis of $HBr$ in the\nPresence of Different Initial Concentrations")
+def plot(sol1, sol2, sol3, sol4, solutions: np.ndarray) -> None:
+    import matplotlib.pyplot as plt
+    import matplotlib as mpl
+    import palettable as pl
 
-# --- Continuous plot ---
-# Define the initial concentrations.
-solutions = []
-H2_range = np.linspace(0.001, 100, 100)
-Br2_range = np.linspace(0.001, 100, 100)
+    fig, ax = plt.subplots(1, 2, figsize=(10, 5))
 
-if False:
-    for i, H2 in enumerate(H2_range):
-        print(f"Progress: {i}/{len(H2_range)}")
-        column = []
-        for Br2 in Br2_range:
-            init_conc = np.array([H2, Br2, 0, 0, 0])
-            hf = HydrogenFusion(init_conc, t_eval, rates)
-            sol = hf.solve()
-            sol.y = sol.y / np.sum(init_conc)
-            column.append(fit_func(sol.t, sol.y[2], quintic)[1][-1])
-    
-        solutions.append(column)
-    
-    solutions = np.array(solutions)
-    df = pd.DataFrame(solutions, index=H2_range, columns=Br2_range)
-    df.to_hdf('./HydrogenFusion/Results/synthesis-leading.h5', key='Synthesis', mode='w', complevel=9)
-    quit()
+    # Define the colors.
+    custom_colors = ["#9750a1", "#00c9bf", "#48817c"]
+
+    ax[0].plot(sol1.t, sol1.y[2], color=custom_colors[0], label=r'$\frac{\mathrm{H}_2}{\mathrm{Br}_2} = 100$')
+    ax[0].plot(sol2.t, sol2.y[2], color=custom_colors[1], label=r'$\frac{\mathrm{H}_2}{\mathrm{Br}_2} = 1$')
+    ax[0].plot(sol3.t, sol3.y[2], color=custom_colors[2], label=r'$\frac{\mathrm{H}_2}{\mathrm{Br}_2} = 0.01$')
+    ax[0].plot(sol4.t, sol4.y[2], color="#97e364", label=r'$\frac{\mathrm{HBr}}{\mathrm{Br}_2} = 10^3$')
+
+    ax[0].set_xlabel('Time [arb. units]')
+    ax[0].set_ylabel('Relative Concentration')
+
+    ax[0].legend(loc='center left', ncol=1, frameon=False)
+    ax[0].grid(color="#424656", alpha=0.1)
+
+    ax[0].set_title("Rate of Synthesis of $HBr$ in the\nPresence of Different Initial Concentrations")
 
-# Load the data 
-df = pd.read_hdf('./HydrogenFusion/Results/synthesis-leading.h5', key='Synthesis')
-solutions = df.values
-# Define the colors.
-norm = mpl.colors.Normalize(vmin=solutions.min(), vmax=solutions.max())
-cm = pl.colorbrewer.sequential.BuPu_7.mpl_colormap
+    # Define the colors.
+    norm = mpl.colors.Normalize(vmin=solutions.min(), vmax=solutions.max())
+    cm = pl.colorbrewer.sequential.BuPu_7.mpl_colormap
 
-ax[1].contourf(H2_range, Br2_range, solutions, levels=100, cmap=cm, norm=norm)
-ax[1].contour(H2_range, Br2_range, solutions, levels=20, linewidths=0.1, colors='k')
+    ax[1].contourf(H2_range, Br2_range, solutions, levels=100, cmap=cm, norm=norm)
+    ax[1].contour(H2_range, Br2_range, solutions, levels=20, linewidths=0.1, colors='k')
 
-ax[1].set_xlabel(r'Initial concentration of $H_2$')
-ax[1].set_ylabel(r'Initial concentration of $Br_2$')
+    ax[1].set_xlabel(r'Initial concentration of $H_2$')
+    ax[1].set_ylabel(r'Initial concentration of $Br_2$')
 
-ax[1].set_title("Size of the Leading Coefficient in the\nQuintic Expansion for the Rate of Synthesis of $HBr$")
+    ax[1].set_title("Size of the Leading Coefficient in the\nQuintic Expansion for the Rate of Synthesis of $HBr$")
 
-sm = plt.cm.ScalarMappable(cmap=cm, norm=norm)
-cbar = plt.colorbar(sm, ax=ax[1])
-cbar.set_label('Size of the leading coefficient\nin the quintic expansion')
+    sm = plt.cm.ScalarMappable(cmap=cm, norm=norm)
+    cbar = plt.colorbar(sm, ax=ax[1])
+    cbar.set_label('Size of the leading coefficient\nin the quintic expansion')
 
-plt.subplots_adjust(left=0.06, right=0.93, bottom=0.1,)
-plt.show()
+    plt.subplots_adjust(left=0.06, right=0.93, bottom=0.1,)
+    plt.show()
 
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sweep', action='store_true',
+                        help="run the sweep and store the leading coefficients, instead of plotting the stored ones")
+    if parser.parse_args().sweep:
+        save_leading(compute_leading())
+    else:
+        plot(*compute(), load_leading())
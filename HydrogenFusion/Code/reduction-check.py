@@ -0,0 +1,65 @@
+"""
+Check the reduced models against tightly converged solves of the full
+model: the quasi-steady-state reduction to its first order error estimate
+and the elimination of the conservation laws and the log-space solves to
+the tolerances.
+"""
+import numpy as np
+from hydrogenfusion import HydrogenFusion
+import shared
+from mod105.conservation import conserved, drift
+from mod105.logspace import log_space
+from mod105.qssa import quasi_steady
+
+init_conc = np.array([1, 1, 0, 0, 0])
+t_eval = np.linspace(0, 10, 50)
+tight = dict(method='Radau', rtol=1e-10, atol=1e-12, cache=False)
+
+# The radicals get faster with the recombination, the bromine atoms
+# staying at sqrt(p/q) Br2.
+reduced = quasi_steady(HydrogenFusion, ['H', 'Br'])
+errors = []
+for scale in [1, 10, 100]:
+    rates = np.array([1, 1e4 * scale**2, 10 * scale, 10 * scale, 100 * scale])
+    full = HydrogenFusion(init_conc, t_eval, rates).solve(**tight)
+    sol = reduced(init_conc, t_eval, rates).solve(rtol=1e-8, atol=1e-10, cache=False)
+    assert sol.success and sol.reduced
+
+    # The initial layer of the radicals is left out of the estimate, so
+    # they only agree after the first output time.
+    difference = full.y - sol.y
+    assert np.abs(difference[:3]).max() <= 1.1 * sol.error_max
+    assert np.abs(difference[:, 1:] - sol.error[:, 1:]).max() <= 0.05 * sol.error_max
+    errors.append(sol.error_max)
+assert errors[0] > 5 * errors[1] > 25 * errors[2]
+print("HydrogenFusion: the quasi-steady-state reduction matches the full solve to its error estimate.")
+
+rates = np.array([1, 2, 1, 0.5, 3])
+full = HydrogenFusion(init_conc, t_eval, rates).solve(**tight)
+for dependent in [None, ['H2', 'Br2']]:
+    reduced = conserved(HydrogenFusion, dependent)
+    # With jac=None the Jacobian comes from finite differences on the
+    # sparsity of the reduced rates.
+    for options in [dict(method='RK45'), dict(method='LSODA'), dict(method='BDF'), dict(method='Radau', jac=None)]:
+        sol = reduced(init_conc, t_eval, rates).solve(rtol=1e-9, atol=1e-11, cache=False, **options)
+        assert sol.success and sol.y.shape == full.y.shape
+        assert np.allclose(sol.y, full.y, rtol=1e-6, atol=1e-8)
+        assert np.abs(sol.drift).max() < 1e-12
+assert np.abs(drift(HydrogenFusion(init_conc, t_eval, rates), full)).max() < 1e-8
+print("HydrogenFusion: eliminating the conservation laws matches the full solve.")
+
+# The radicals stay tiny, which the log-concentrations resolve to the
+# relative tolerance. The radicals start from a floor far below atol.
+full = HydrogenFusion(init_conc, t_eval, rates).solve(method='Radau', rtol=1e-12, atol=1e-20, cache=False)
+reduced = log_space(HydrogenFusion)
+for options in [dict(method='RK45'), dict(method='BDF'), dict(method='Radau', jac=None)]:
+    sol = reduced(init_conc, t_eval, rates).solve(rtol=1e-8, atol=1e-14, cache=False, **options)
+    assert sol.success and np.all(sol.y > 0)
+    assert np.allclose(sol.y, full.y, rtol=1e-5, atol=1e-13)
+
+# The dense solution holds the concentrations and their rates.
+model = reduced(init_conc, t_eval, rates)
+dense = model.solve(rtol=1e-8, atol=1e-14, dense=True, cache=False).sol
+assert np.all(dense.y > 0)
+assert np.allclose(dense.dy, HydrogenFusion.rhs(model, 0, dense.y), rtol=1e-9, atol=1e-15)
+print("HydrogenFusion: the log-space solves match the full solve.")
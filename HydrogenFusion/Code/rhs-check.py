@@ -0,0 +1,27 @@
+"""
+Check that the fused right-hand sides give the same derivatives
+as the reference rate equations built from the _d* methods.
+"""
+import numpy as np
+from hydrogenfusion import HydrogenFusion, HydrogenFusionStationaryH, HydrogenFusionStationaryBr
+
+rng = np.random.default_rng(105)
+t_eval = np.linspace(0, 10, 1000)
+
+for model in (HydrogenFusion, HydrogenFusionStationaryH, HydrogenFusionStationaryBr):
+    for rates in [np.array([1, 1, 1, 1, 1]), np.array([10, 1, 10, 0.1, 20]), rng.uniform(0.01, 100, 5)]:
+        hf = model(np.array([1, 1, 0, 0, 0]), t_eval, rates)
+        states = rng.uniform(0, 10, size=(5, 50))
+
+        # Single states, with and without a preallocated buffer.
+        out = np.empty(5)
+        for state in states.T:
+            reference = hf.rate_eq(0, state)
+            assert np.allclose(hf.rhs(0, state), reference, rtol=1e-12, atol=1e-12)
+            assert np.allclose(hf.rhs(0, state, out=out), reference, rtol=1e-12, atol=1e-12)
+
+        # A whole block of states, as used by solve_ivp(..., vectorized=True).
+        reference = np.array([hf.rate_eq(0, state) for state in states.T]).T
+        assert np.allclose(hf.rhs(0, states), reference, rtol=1e-12, atol=1e-12)
+
+    print(f"{model.__name__}: fused right-hand side matches the reference.")
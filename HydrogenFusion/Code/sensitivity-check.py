@@ -0,0 +1,29 @@
+"""
+Check that the forward sensitivities of a solve match central finite
+differences of tightly converged solves with perturbed parameters, for
+every method.
+"""
+import numpy as np
+from hydrogenfusion import HydrogenFusion, HydrogenFusionStationaryH
+import shared
+from mod105.sweep import point_kwargs
+
+base = dict(init_conc=np.array([1, 1, 0.1, 0, 0]), t_eval=np.linspace(0, 5, 50), rates=np.array([1, 2, 1, 0.5, 3]))
+parameters = [('rates', 0), ('rates', 2), ('rates', 4), ('init_conc', 0), ('init_conc', 1)]
+tolerances = dict(rtol=1e-10, atol=1e-12, cache=False)
+
+for model in (HydrogenFusion, HydrogenFusionStationaryH):
+    reference = []
+    for name, i in parameters:
+        h = 1e-5 * max(1, abs(base[name][i]))
+        up = model(**point_kwargs(base, {(name, i): base[name][i] + h})).solve(method='Radau', **tolerances)
+        down = model(**point_kwargs(base, {(name, i): base[name][i] - h})).solve(method='Radau', **tolerances)
+        reference.append((up.y - down.y) / (2*h))
+    reference = np.stack(reference, axis=1)
+
+    for method in ['RK45', 'BDF', 'Radau', 'LSODA']:
+        sol = model(**base).solve(method=method, sensitivities=parameters, **tolerances)
+        assert sol.success and sol.sensitivities.shape == (5, len(parameters), len(base['t_eval']))
+        assert np.allclose(sol.sensitivities, reference, rtol=1e-4, atol=1e-6)
+
+    print(f"{model.__name__}: sensitivities match the finite differences.")
@@ -0,0 +1,11 @@
+"""
+Puts the repository root on the path, so the scripts of this directory,
+which run as plain files, can import the shared mod105 package. Import it
+before anything from mod105.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,52 @@
+"""
+Map the steady state of the reaction over the initial concentrations of
+H2 and Br2. Every point is found directly by a nonlinear solve, instead
+of integrating the rate equations to long times.
+"""
+import numpy as np
+from hydrogenfusion import HydrogenFusion
+
+# Define the rate coefficients.
+rates = np.array([1, 1, 1, 1, 1])
+
+H2_range = np.linspace(0.01, 2, 200)
+Br2_range = np.linspace(0.01, 2, 200)
+
+
+def compute() -> np.ndarray:
+    """
+    The share of the initial molecules that ends up as HBr, over the grid
+    of initial concentrations, NaN where no steady state was found.
+    """
+    # The whole grid of initial concentrations is solved at once.
+    H2, Br2 = np.meshgrid(H2_range, Br2_range, indexing='ij')
+    zeros = np.zeros_like(H2)
+    init_conc = np.array([H2, Br2, zeros, zeros, zeros])
+
+    result = HydrogenFusion(init_conc, None, rates).steady_state()
+    print(result.stats)
+    if not np.all(result.success):
+        print(f"No steady state found for {np.sum(~result.success)} points.")
+
+    return np.where(result.success, result.x[2], np.nan) / (H2 + Br2)
+
+
+def plot(HBr: np.ndarray) -> None:
+    import matplotlib.pyplot as plt
+    import palettable as pl
+
+    fig, ax = plt.subplots()
+
+    cm = pl.colorbrewer.sequential.BuPu_7.mpl_colormap
+    img = ax.contourf(H2_range, Br2_range, HBr.T, levels=100, cmap=cm)
+    fig.colorbar(img, ax=ax, label='Relative HBr concentration')
+
+    ax.set_xlabel(r'Initial concentration of $H_2$')
+    ax.set_ylabel(r'Initial concentration of $Br_2$')
+
+    plt.title("Steady state HBr concentration")
+    plt.show()
+
+
+if __name__ == '__main__':
+    plot(compute())
@@ -0,0 +1,29 @@
+"""
+Check that the steady states found directly match the end of long
+integrations, for single points and for a whole grid at once.
+"""
+import numpy as np
+from hydrogenfusion import HydrogenFusion
+
+t_eval = np.array([0, 1e5])
+
+points = []
+for rates in [np.array([1, 1, 1, 1, 1]), np.array([0.1, 10, 5, 0.5, 20])]:
+    for init_conc in [np.array([1, 1, 0, 0, 0]), np.array([2, 0.5, 0, 0, 0]), np.array([0.5, 2, 0.3, 0, 0])]:
+        hf = HydrogenFusion(init_conc, t_eval, rates)
+        result = hf.steady_state()
+        assert result.success
+        assert np.abs(hf.rhs(0, result.x)).max() < 1e-9
+
+        long = hf.solve(method='Radau', rtol=1e-10, atol=1e-14, cache=False)
+        assert long.success
+        assert np.allclose(result.x, long.y[:, -1], rtol=1e-6, atol=1e-8)
+        points.append((init_conc, rates, result.x))
+print("HydrogenFusion: steady states match long integrations.")
+
+# The same points as one batch, with one column per point.
+init_conc, rates, x = (np.stack(column, axis=1) for column in zip(*points))
+result = HydrogenFusion(init_conc, None, rates).steady_state()
+assert np.all(result.success)
+assert np.allclose(result.x, x, rtol=1e-9, atol=1e-12)
+print("HydrogenFusion: a batch of steady states matches the single points.")
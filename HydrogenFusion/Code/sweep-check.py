@@ -0,0 +1,69 @@
+"""
+Check that a sweep gives the same values however it is split into chunks
+and worker processes, that a sweep into a store resumes by solving only
+the chunks that are missing, that continuation along an axis agrees
+with solving every point from scratch, and that scattered points solved
+in a shared pool match those solved in this process.
+"""
+import os
+import tempfile
+import numpy as np
+from hydrogenfusion import HydrogenFusion
+import shared
+from mod105.sweep import Final, sweep, sweep_points, worker_pool
+from mod105.sweepstore import SweepStore
+
+base = dict(init_conc=np.array([1, 1, 0, 0, 0]), t_eval=np.linspace(0, 5, 50), rates=np.array([1, 1, 1, 1, 1]))
+grid = {('rates', 0): np.linspace(0.5, 2, 4), ('rates', 4): np.linspace(1, 10, 5)}
+options = dict(solve_options=dict(cache=False), reducer=Final())
+
+# The reference, one point after the other.
+reference = np.array([[HydrogenFusion(base['init_conc'], base['t_eval'], np.array([p, 1, 1, 1, t]))
+                       .solve(cache=False).y[:, -1] for t in grid[('rates', 4)]]
+                      for p in grid[('rates', 0)]])
+
+for processes, chunksize in [(1, None), (1, 3), (2, 1), (2, 7)]:
+    result = sweep(HydrogenFusion, base, grid, processes=processes, chunksize=chunksize, **options)
+    assert not result.errors
+    assert np.array_equal(result.values, reference)
+print("HydrogenFusion: chunked sweeps match the point by point solves.")
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'store')
+    result = sweep(HydrogenFusion, base, grid, processes=1, store=path, store_chunks=(2, 5), **options)
+    assert np.array_equal(result.values[...], reference)
+
+    # Forget a chunk, as if the sweep had been interrupted before it.
+    store = SweepStore(path)
+    store.completed.discard((1, 0, 0))
+    store._flush()
+
+    result = sweep(HydrogenFusion, base, grid, processes=1, store=path, store_chunks=(2, 5), **options)
+    solved = ~np.isnan(result.stats['wall_time'])
+    assert solved[2:].all() and not solved[:2].any()
+    assert SweepStore(path).complete
+    assert np.array_equal(result.values[...], reference)
+print("HydrogenFusion: an interrupted sweep resumes with the missing chunks only.")
+
+# Warm starts change the steps, so the values only agree to the tolerances.
+tolerances = dict(rtol=1e-8, atol=1e-10)
+for method in ['RK45', 'BDF', 'Radau']:
+    solve_options = dict(cache=False, method=method, **tolerances)
+    scratch = sweep(HydrogenFusion, base, grid, processes=1, solve_options=solve_options, reducer=Final()).values
+    for processes, chunksize in [(1, 1), (2, None)]:
+        result = sweep(HydrogenFusion, base, grid, processes=processes, chunksize=chunksize,
+                       continuation=('rates', 4), solve_options=solve_options, reducer=Final())
+        assert not result.errors
+        assert np.allclose(result.values, scratch, rtol=1e-6, atol=1e-8)
+print("HydrogenFusion: continuation sweeps match the sweeps from scratch.")
+
+# Scattered points, as adaptive.sample asks for them, in one pool for
+# several rounds.
+points = [{('rates', 0): p, ('rates', 4): t} for p in grid[('rates', 0)] for t in grid[('rates', 4)]]
+with worker_pool(2) as pool:
+    for start in (0, 7):
+        values, errors = sweep_points(HydrogenFusion, base, points[start:], Final(), processes=2,
+                                      chunksize=3, solve_options=dict(cache=False), pool=pool)
+        assert not errors
+        assert np.array_equal(values, reference.reshape(-1, 5)[start:])
+print("HydrogenFusion: scattered points share a pool of workers.")
@@ -0,0 +1,8 @@
+"""
+The modules shared by the three models, BinaryReactions, HydrogenFusion
+and ChemicalClock: reaction networks, solution caching and statistics,
+dense output, sensitivities, steady states, the reductions, ensembles,
+sweeps and their continuation, adaptive sampling and the benchmark
+harness. The model of every project and its scripts live in its Code
+directory, which puts this package on the path through its shared.py.
+"""
@@ -0,0 +1,209 @@
+"""
+Adaptive sampling of a reduced quantity over parameter space. Sampling
+starts on a coarse grid and only the cells where the quantity is not
+reproduced by linear interpolation are split further, so the solves go
+where the structure is instead of being spread over a uniform grid.
+"""
+import contextlib
+import itertools
+import numpy as np
+from scipy.interpolate import griddata
+from typing import Any, Callable, Hashable, Mapping, Sequence
+from .sweep import sweep_points, worker_pool
+
+
+class AdaptiveResult:
+    def __init__(self,
+                 bounds: Mapping[Hashable, tuple],
+                 points: np.ndarray,
+                 values: np.ndarray,
+                 errors: Mapping[int, str],
+                 converged: bool,
+                 ) -> None:
+        """
+        The scattered samples of an adaptive sampling run.
+
+        Parameters
+        ----------
+        bounds : Mapping[Hashable, tuple]
+            The sampled parameters and their (lower, upper) bounds.
+        points : np.ndarray
+            The sampled parameter points, of shape (n_points, n_parameters).
+        values : np.ndarray
+            The reduced value at every point, of shape (n_points,) + the
+            shape of a single value. Failed points are NaN.
+        errors : Mapping[int, str]
+            Error messages of the failed points, by point index.
+        converged : bool
+            False if the sampling stopped at max_depth or max_points
+            before every cell met the tolerance.
+        """
+        self.bounds = dict(bounds)
+        self.points = points
+        self.values = values
+        self.errors = dict(errors)
+        self.converged = converged
+
+    def to_grid(self, *axes: Sequence[float], method: str = 'linear') -> np.ndarray:
+        """
+        Interpolates the samples onto a regular grid, e.g. for plotting.
+
+        Parameters
+        ----------
+        *axes : Sequence[float]
+            The grid values of every parameter, in the order of bounds.
+        method : str
+            Interpolation method of scipy.interpolate.griddata. One
+            dimensional samples are always interpolated linearly.
+
+        Returns
+        -------
+        np.ndarray
+            The values with shape grid shape + the shape of a single value.
+        """
+        if len(axes) != self.points.shape[1]:
+            raise ValueError(f"Expected {self.points.shape[1]} axes, got {len(axes)}.")
+        axes = [np.asarray(axis, dtype=float) for axis in axes]
+        value_shape = self.values.shape[1:]
+        values = self.values.reshape(len(self.values), -1)
+        shape = tuple(len(axis) for axis in axes)
+
+        if len(axes) == 1:
+            order = np.argsort(self.points[:, 0])
+            grid = np.stack([np.interp(axes[0], self.points[order, 0], column[order])
+                             for column in values.T], axis=-1)
+        else:
+            mesh = np.stack([m.ravel() for m in np.meshgrid(*axes, indexing='ij')], axis=-1)
+            grid = griddata(self.points, values, mesh, method=method)
+        return grid.reshape(shape + value_shape)
+
+    def __repr__(self) -> str:
+        return (f"AdaptiveResult(parameters={list(self.bounds)}, points={len(self.points)}, "
+                f"failed={len(self.errors)}, converged={self.converged})")
+
+
+def sample(model: type,
+           base: Mapping[str, Any],
+           bounds: Mapping[Hashable, tuple],
+           reducer: Callable,
+           tol: float,
+           rtol: float = 0,
+           initial: int = 5,
+           max_depth: int = 6,
+           max_points: int = 4096,
+           processes: int = None,
+           solve_options: Mapping[str, Any] = None,
+           progress: bool = False,
+           ) -> AdaptiveResult:
+    """
+    Samples a reduced quantity of a model adaptively over a box of
+    parameter space.
+
+    The box starts out as a grid of cells. In every round, each cell is
+    sampled at its center and at the midpoints of its edges and faces,
+    and split in half along every parameter if any of these values
+    deviates from the multilinear interpolation of its corners by more
+    than tol + rtol * |value|. Cells where only some of the points fail
+    are split as well, since they straddle the edge of a region.
+
+    Parameters
+    ----------
+    model, base, reducer, processes, solve_options
+        As in sweep.sweep.
+    bounds : Mapping[Hashable, tuple]
+        The (lower, upper) bounds of every sampled parameter, keyed as
+        the grid of sweep.sweep.
+    tol : float
+        Absolute tolerance of the interpolation error.
+    rtol : float
+        Relative tolerance of the interpolation error.
+    initial : int
+        Number of points along every parameter on the coarse grid.
+    max_depth : int
+        Maximum number of times a cell of the coarse grid is split.
+    max_points : int
+        Maximum number of points to solve.
+    progress : bool
+        Print the number of points and cells after every round.
+
+    Returns
+    -------
+    AdaptiveResult
+        The scattered samples.
+    """
+    keys = list(bounds)
+    lower = np.array([bounds[key][0] for key in keys], dtype=float)
+    upper = np.array([bounds[key][1] for key in keys], dtype=float)
+    d = len(keys)
+    if initial < 2:
+        raise ValueError("At least 2 initial points per parameter are needed.")
+
+    # Points live on an integer lattice as fine as the deepest split, so
+    # that points shared by neighbouring cells are only solved once.
+    size = 2**max_depth
+    n = (initial - 1) * size
+    index = {}
+    points = []
+    values = []
+    errors = {}
+
+    def evaluate(lattice):
+        new = [p for p in dict.fromkeys(lattice) if p not in index]
+        if not new:
+            return
+        x = lower + (upper - lower) * np.array(new) / n
+        batch, batch_errors = sweep_points(model, base, [dict(zip(keys, row)) for row in x],
+                                           reducer, processes, solve_options=solve_options, pool=pool)
+        for i, p in enumerate(new):
+            index[p] = len(points)
+            points.append(x[i])
+            values.append(np.asarray(batch[i], dtype=float))
+        errors.update({index[new[i]]: message for i, message in batch_errors.items()})
+
+    # One pool of workers serves all rounds.
+    pool = worker_pool(processes) if processes != 1 else None
+    with pool or contextlib.nullcontext():
+        evaluate(list(itertools.product(range(0, n + 1, size), repeat=d)))
+        cells = list(itertools.product(range(0, n, size), repeat=d))
+
+        # Multilinear weights of the 2^d corners at the 3^d points of a cell.
+        offsets = list(itertools.product(range(3), repeat=d))
+        corners = list(itertools.product(range(2), repeat=d))
+        weights = np.array([[np.prod([t/2 if c else 1 - t/2 for t, c in zip(offset, corner)])
+                             for corner in corners] for offset in offsets])
+        tests = [i for i, offset in enumerate(offsets) if any(t == 1 for t in offset)]
+
+        converged = True
+        for depth in range(max_depth):
+            if not cells:
+                break
+            half = size // 2
+            lattice = [tuple(c + half*t for c, t in zip(cell, offset)) for cell in cells for offset in offsets]
+            if len(index) + len(set(lattice) - set(index)) > max_points:
+                converged = False
+                break
+            evaluate(lattice)
+
+            refine = []
+            for cell in cells:
+                f = np.stack([values[index[tuple(c + half*t for c, t in zip(cell, offset))]]
+                              for offset in offsets]).reshape(len(offsets), -1)
+                corner_values = f[[offsets.index(tuple(2*c for c in corner)) for corner in corners]]
+                missing = np.isnan(f)
+                if missing.all():
+                    continue
+                if missing.any():
+                    refine.append(cell)
+                    continue
+                deviation = np.abs(f[tests] - (weights @ corner_values)[tests])
+                if np.any(deviation > tol + rtol*np.abs(f[tests])):
+                    refine.append(cell)
+
+            size = half
+            cells = [tuple(c + size*t for c, t in zip(cell, corner)) for cell in refine for corner in corners]
+            if progress:
+                print(f"Depth {depth + 1}: {len(points)} points, {len(refine)} cells split")
+    if cells and size == 1:
+        converged = False
+
+    return AdaptiveResult(bounds, np.array(points).reshape(-1, d), np.array(values), errors, converged)
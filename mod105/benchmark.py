@@ -0,0 +1,218 @@
+"""
+A small benchmark harness. Benchmarks are timed, their solver statistics
+and peak memory recorded, and the results written as JSON, so that runs
+on different commits can be compared and regressions flagged:
+
+    python -m mod105.benchmark compare baseline.json current.json
+
+The benchmarks themselves live in the bench.py script of every project.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import scipy
+from typing import Any, Callable, Mapping, Sequence
+
+
+class Benchmark:
+    def __init__(self,
+                 name: str,
+                 func: Callable,
+                 params: Mapping[str, Any] = None,
+                 repeat: int = 5,
+                 number: int = 1,
+                 memory: bool = True,
+                 ) -> None:
+        """
+        A single benchmark.
+
+        Parameters
+        ----------
+        name : str
+            Unique name of the benchmark, used to match runs.
+        func : Callable
+            The code to time, called without arguments. If it returns a
+            solution, its nfev, njev and nlu are recorded.
+        params : Mapping[str, Any], optional
+            JSON serializable description of the benchmarked regime.
+        repeat : int
+            Number of timed repetitions.
+        number : int
+            Number of calls per repetition, for very fast code.
+        memory : bool
+            Whether to measure the peak memory in an extra traced call.
+            For slow benchmarks, e.g. whole sweeps, the extra calls are
+            skipped: there is no warm-up call and no memory record.
+        """
+        self.name = name
+        self.func = func
+        self.params = dict(params or {})
+        self.repeat = repeat
+        self.number = number
+        self.memory = memory
+
+    def run(self) -> dict:
+        """
+        Runs the benchmark and returns its record.
+        """
+        # Warm up, e.g. loading generated kernels, and collect the stats.
+        result = self.func() if self.memory else None
+
+        times = []
+        for _ in range(self.repeat):
+            gc.collect()
+            start = time.perf_counter()
+            for _ in range(self.number):
+                value = self.func()
+            times.append((time.perf_counter() - start) / self.number)
+
+        record = {'name': self.name,
+                  'params': self.params,
+                  'time': {'min': min(times), 'median': float(np.median(times)),
+                           'mean': float(np.mean(times)), 'repeat': self.repeat, 'number': self.number},
+                  **_counts(value if result is None else result)}
+
+        if self.memory:
+            # Memory is traced in a separate call, as tracing slows it down.
+            gc.collect()
+            tracemalloc.start()
+            self.func()
+            record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return record
+
+
+def _counts(result: Any) -> dict:
+    """
+    The evaluation counts of a solution, if it has them.
+    """
+    counts = {}
+    for name in ('nfev', 'njev', 'nlu'):
+        value = getattr(result, name, None)
+        if value is not None:
+            counts[name] = int(value)
+    return counts
+
+
+def environment() -> dict:
+    """
+    Describes the machine and code a run was made on.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'system': platform.platform()}
+
+
+def run(benchmarks: Sequence[Benchmark], select: str = None, progress: bool = True) -> dict:
+    """
+    Runs the benchmarks whose names contain select, or all of them.
+    """
+    records = []
+    for benchmark in benchmarks:
+        if select is not None and select not in benchmark.name:
+            continue
+        record = benchmark.run()
+        records.append(record)
+        if progress:
+            counts = ' '.join(f"{key}={record[key]}" for key in ('nfev', 'njev', 'nlu') if key in record)
+            memory = f"{record['peak_memory']/2**20:8.2f} MiB" if 'peak_memory' in record else ' '*12
+            print(f"{benchmark.name:<40} {record['time']['median']*1e3:10.3f} ms  {memory}  {counts}")
+    return {'environment': environment(), 'records': records}
+
+
+def save(results: Mapping[str, Any], path: str) -> None:
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: Mapping[str, Any], current: Mapping[str, Any], threshold: float = 0.1) -> list:
+    """
+    Compares two runs benchmark by benchmark.
+
+    A benchmark regresses if its median time grew by more than threshold,
+    relative to the baseline, or if it needs more evaluations or memory.
+
+    Returns
+    -------
+    list
+        (name, quantity, baseline, current) for every regression.
+    """
+    old = {record['name']: record for record in baseline['records']}
+    regressions = []
+    for record in current['records']:
+        reference = old.get(record['name'])
+        if reference is None:
+            continue
+        before, after = reference['time']['median'], record['time']['median']
+        if after > before * (1 + threshold):
+            regressions.append((record['name'], 'time', before, after))
+        for key in ('nfev', 'njev', 'nlu'):
+            if key in record and key in reference and record[key] > reference[key]:
+                regressions.append((record['name'], key, reference[key], record[key]))
+        if ('peak_memory' in record and 'peak_memory' in reference
+                and record['peak_memory'] > reference['peak_memory'] * (1 + threshold)):
+            regressions.append((record['name'], 'peak_memory', reference['peak_memory'],
+                                record['peak_memory']))
+    return regressions
+
+
+def main(benchmarks: Sequence[Benchmark] = None, argv: Sequence[str] = None) -> int:
+    """
+    Command line entry point of bench.py scripts, and of this module for
+    comparing two saved runs.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    if benchmarks is not None:
+        runner = commands.add_parser('run', help="run the benchmarks")
+        runner.add_argument('-o', '--output', help="write the records to this JSON file")
+        runner.add_argument('-k', '--select', help="only run benchmarks whose name contains this")
+        runner.add_argument('--baseline', help="compare against this saved run")
+        runner.add_argument('--threshold', type=float, default=0.1)
+    comparer = commands.add_parser('compare', help="compare two saved runs")
+    comparer.add_argument('baseline')
+    comparer.add_argument('current')
+    comparer.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        current = run(benchmarks, args.select)
+        if args.output:
+            save(current, args.output)
+        if not args.baseline:
+            return 0
+        baseline = load(args.baseline)
+    else:
+        baseline, current = load(args.baseline), load(args.current)
+
+    regressions = compare(baseline, current, args.threshold)
+    for name, quantity, before, after in regressions:
+        print(f"REGRESSION {name}: {quantity} {before:.6g} -> {after:.6g}")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
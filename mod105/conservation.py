@@ -0,0 +1,299 @@
+"""
+Linear conservation laws of the models. Every law L y = const ties one
+species to the others, so it can be eliminated and recovered afterwards,
+leaving a smaller system with a cheaper Jacobian and one stiff mode fewer
+per law. Species with identical rate equations, like b and c of
+BinaryReaction, are the special case y_i - y_j = const and are lumped into
+one. The laws also give a drift monitor for the full models, measuring how
+far a solution strays from them.
+"""
+import inspect
+import numpy as np
+from .densesolution import DenseSolution
+from .solvecache import _arguments, _name_variant
+from typing import Iterable
+
+
+class Invariants:
+    def __init__(self, model, dependent: Iterable = None, tol: float = 1e-9) -> None:
+        """
+        The linear conservation laws of a model.
+
+        For models with a reaction network they are the left null space of
+        the stoichiometric matrix. For the others they are found from the
+        rates at a set of random states, which every law has to annihilate.
+
+        Parameters
+        ----------
+        model
+            The model instance.
+        dependent : Iterable, optional
+            Species to eliminate, by name or index, at most one per law. The
+            others are picked by largest initial concentration, over all
+            members of a batch of them, as those lose the least to
+            cancellation when recovered.
+        tol : float
+            Tolerance, relative to the largest singular value, below which
+            a direction counts as conserved.
+
+        Attributes
+        ----------
+        laws : np.ndarray
+            The laws in reduced row echelon form, of shape (n_laws,
+            n_species), with the identity in the dependent columns.
+        dependent, independent : np.ndarray
+            Indices of the eliminated and of the integrated species.
+        identical : list
+            Groups of species with identical rate equations.
+        """
+        network = getattr(model, 'network', None)
+        y0 = np.asarray(model.init_conc, dtype=float)
+        n = len(y0)
+        self.names = network.species if network is not None else tuple(str(i) for i in range(n))
+
+        if network is not None:
+            rates = network.stoichiometry
+        else:
+            states = np.random.default_rng(0).uniform(0.1, 1.0, (n, 4 * n))
+            rates = model.rhs(0.0, states)
+        U, s, _ = np.linalg.svd(np.asarray(rates, dtype=float))
+        rank = int(np.sum(s > tol * s.max())) if s.size and s.max() > 0 else 0
+        basis = U[:, rank:].T
+
+        largest = np.abs(y0).reshape(n, -1).max(axis=1, initial=0)
+        order = [int(i) for i in np.argsort(-largest, kind='stable')]
+        if dependent is not None:
+            dependent = [self.names.index(d) if isinstance(d, str) else int(d) for d in dependent]
+            order = dependent + [i for i in order if i not in dependent]
+        self.laws, pivots = _echelon(basis, order, tol)
+        if dependent is not None and not set(dependent) <= set(pivots):
+            raise ValueError(f"The species {[self.names[d] for d in dependent]} cannot all be "
+                             f"eliminated, the {len(pivots)} laws fix {[self.names[p] for p in pivots]}.")
+        self.dependent = np.array(pivots, dtype=int)
+        self.independent = np.setdiff1d(np.arange(n), self.dependent)
+        self.identical = _identical(basis, n, tol)
+
+        # y = embedding @ y_independent + offset(totals).
+        self.embedding = np.zeros((n, len(self.independent)))
+        self.embedding[self.independent, np.arange(len(self.independent))] = 1
+        self.embedding[self.dependent] = -self.laws[:, self.independent]
+
+    def totals(self, y0: np.ndarray) -> np.ndarray:
+        """
+        The conserved totals of the state y0.
+        """
+        return self.laws @ np.asarray(y0, dtype=float)
+
+    def expand(self, z: np.ndarray, totals: np.ndarray) -> np.ndarray:
+        """
+        The full states of the integrated species z, of shape
+        (n_independent,) or (n_independent, m), for the given totals.
+        """
+        z = np.asarray(z, dtype=float)
+        offset = np.zeros(len(self.embedding))
+        offset[self.dependent] = totals
+        return self.embedding @ z + offset.reshape((-1,) + (1,) * (z.ndim - 1))
+
+    def drift(self, y: np.ndarray, y0: np.ndarray) -> np.ndarray:
+        """
+        How far the states y, of shape (n_species, ...), break the laws
+        of the initial state y0, one row per law.
+        """
+        y = np.asarray(y, dtype=float)
+        change = y - np.asarray(y0, dtype=float).reshape((-1,) + (1,) * (y.ndim - 1))
+        return np.tensordot(self.laws, change, axes=1)
+
+    def __repr__(self) -> str:
+        laws = []
+        for law in self.laws:
+            terms = [f"{coef:+g} {name}" for coef, name in zip(law, self.names) if coef != 0]
+            laws.append(' '.join(terms).lstrip('+') + ' = const')
+        return f"Invariants({laws})"
+
+
+def drift(model, sol) -> np.ndarray:
+    """
+    The drift monitor: how far a solution of a model breaks its
+    conservation laws at every time, of shape (n_laws, n_times). Exact
+    solutions give roundoff only, so anything larger is integration error.
+    """
+    return Invariants(model).drift(sol.y, model.init_conc)
+
+
+def conserved(model: type, dependent: Iterable = None, tol: float = 1e-9) -> type:
+    """
+    Builds the version of a model class that integrates only the species
+    left after eliminating its conservation laws, see Invariants.
+
+    The returned class takes the same arguments as model and its solve
+    the same arguments as that of model, but sensitivities. The solutions
+    hold every species again, in y, the events and the DenseSolution of
+    dense=True, and event functions are called with the full state. They
+    gain the fields
+
+    drift : np.ndarray
+        How far the recovered solution breaks the conservation laws, of
+        shape (n_laws, n_times). This is roundoff only.
+    invariants : Invariants
+        The laws that were eliminated.
+
+    Parameters
+    ----------
+    model : type
+        The full model, e.g. HydrogenFusion. Its rhs must take blocks of
+        states of shape (n, m).
+    dependent, tol
+        See Invariants.
+
+    Returns
+    -------
+    type
+        The reduced model, a subclass of model.
+    """
+    signature = inspect.signature(model.solve)
+
+    class Conserved(model):
+        def rhs(self, t, z, out=None):
+            """
+            The rates of the integrated species. z may also be a block of
+            shape (n_independent, m).
+            """
+            system = self._invariants
+            z = np.asarray(z)
+            y = system.embedding @ z + (self._offset if z.ndim == 1 else self._offset[:, None])
+            result = model.rhs(self, t, y)[system.independent]
+            if out is None:
+                return result
+            out[...] = result
+            return out
+
+        def jac(self, t, z):
+            """
+            The exact Jacobian of the rates of the integrated species.
+            """
+            system = self._invariants
+            J = model.jac(self, t, system.embedding @ z + self._offset)
+            return J[system.independent] @ system.embedding
+
+        def solve(self, *args, **options):
+            """
+            Solves the reduced system, see conserved.
+            """
+            arguments = _arguments(signature, self, *args, **options)
+            if arguments.get('sensitivities') is not None:
+                raise ValueError("The reduced models do not give sensitivities, "
+                                 "solve the full model for them.")
+
+            given = np.array(self.init_conc, dtype=float)
+            full = model.__new__(model)
+            full.__dict__.update(self.__dict__)
+            system = self._invariants = Invariants(full, dependent, tol)
+            totals = system.totals(given)
+            # Events are posed on the full state, with the full initial
+            # concentrations for relative thresholds.
+            if arguments.get('events') is not None:
+                events = arguments['events']
+                if not isinstance(events, (list, tuple)):
+                    events = [events]
+                arguments['events'] = [_reduced_event(e.event(self) if hasattr(e, 'event') else e,
+                                                      system, totals) for e in events]
+
+            # The finite difference Jacobian of jac=None must follow the
+            # sparsity of the reduced rates, not that of the network.
+            sparsity = getattr(getattr(model, 'network', None), 'sparsity', None)
+            if 'jac' in arguments and arguments['jac'] is None and sparsity is not None:
+                arguments.setdefault('jac_sparsity', (sparsity[system.independent].astype(int)
+                                                      @ (system.embedding != 0)) != 0)
+
+            # The totals enter the rates, and so the cache key.
+            self.init_conc = given[system.independent]
+            self.totals = totals
+            self._offset = system.expand(np.zeros(len(system.independent)), totals)
+            try:
+                sol = super().solve(**arguments)
+            finally:
+                self.init_conc = given
+                del self.totals
+
+            if getattr(sol, 'y', None) is None:
+                return sol
+            sol.y = system.expand(sol.y, totals)
+            if getattr(sol, 'y_events', None) is not None:
+                sol.y_events = [system.expand(np.reshape(y, (-1, len(system.independent))).T, totals).T
+                                for y in sol.y_events]
+            if isinstance(getattr(sol, 'sol', None), DenseSolution):
+                sol.sol = DenseSolution(sol.sol.t, system.expand(sol.sol.y, totals),
+                                        system.embedding @ sol.sol.dy)
+            sol.drift = system.drift(sol.y, given)
+            sol.invariants = system
+            return sol
+
+    names = getattr(getattr(model, 'network', None), 'species', None)
+    label = '' if dependent is None else ','.join(
+        d if isinstance(d, str) or names is None else names[d] for d in map(_plain, dependent))
+    _name_variant(Conserved, f'{model.__name__}Conserved', label)
+    Conserved.__doc__ = f"{model.__name__} without its conservation laws, see conservation.conserved."
+    return Conserved
+
+
+def _plain(value):
+    return value if isinstance(value, str) else int(value)
+
+
+def _reduced_event(event, system: Invariants, totals: np.ndarray):
+    """
+    Wraps an event function of the full state for the integrated species.
+    """
+    def reduced(t, z):
+        return event(t, system.expand(z, totals))
+    for name in ('terminal', 'direction'):
+        if hasattr(event, name):
+            setattr(reduced, name, getattr(event, name))
+    return reduced
+
+
+def _echelon(basis: np.ndarray, order: list, tol: float) -> tuple:
+    """
+    Brings the rows of basis into reduced row echelon form, taking the
+    pivot columns in the given order of preference. Returns the rows and
+    the pivot columns.
+    """
+    A = np.array(basis, dtype=float)
+    pivots = []
+    for column in order:
+        row = len(pivots)
+        if row == len(A):
+            break
+        i = row + int(np.argmax(np.abs(A[row:, column])))
+        if abs(A[i, column]) <= tol:
+            continue
+        A[[row, i]] = A[[i, row]]
+        A[row] /= A[row, column]
+        others = np.arange(len(A)) != row
+        A[others] -= np.outer(A[others, column], A[row])
+        pivots.append(column)
+    A[np.abs(A) <= tol] = 0
+    return A, pivots
+
+
+def _identical(basis: np.ndarray, n: int, tol: float) -> list:
+    """
+    Groups of species whose differences are conserved, i.e. that share
+    their rate equations.
+    """
+    groups = []
+    grouped = set()
+    for i in range(n):
+        if i in grouped:
+            continue
+        group = [i]
+        for j in range(i + 1, n):
+            difference = np.zeros(n)
+            difference[[i, j]] = 1, -1
+            residual = difference - basis.T @ (basis @ difference)
+            if np.linalg.norm(residual) <= np.sqrt(tol):
+                group.append(j)
+        if len(group) > 1:
+            groups.append(tuple(group))
+            grouped.update(group)
+    return groups
@@ -0,0 +1,226 @@
+"""
+Warm starts for the solves of a parameter continuation, see
+sweep(..., continuation=...). A solve given a WarmStart records the steps
+it takes, and the solve at the next parameter value starts from them
+instead of from scratch: with the first step of its neighbour, with the
+Jacobian of its neighbour at the initial state and, for Radau, along the
+steps of its neighbour, reusing their LU factors and taking the
+trajectory of the neighbour as the initial guess of the Newton iteration
+of every step.
+"""
+import bisect
+import numpy as np
+from scipy.integrate import BDF, Radau
+from typing import Any, Callable
+
+
+class WarmStart:
+    def __init__(self, previous: 'WarmStart' = None) -> None:
+        """
+        The warm start of one solve of a continuation, given to
+        solvestats.solve_ivp as warm_start, e.g. through the options of
+        the solve method of a model.
+
+        Parameters
+        ----------
+        previous : WarmStart, optional
+            The warm start of the solve at the neighbouring parameter
+            value, whose recorded steps this solve starts from. Without
+            it, the solve only records its steps for the next one.
+
+        Attributes
+        ----------
+        steps : list
+            (t_old, t, dense output, J, LU factors) of the accepted steps,
+            all of them for Radau, the first one without the last three
+            for the other methods.
+        jac : np.ndarray or sparse matrix
+            The Jacobian at the initial state, for BDF and Radau.
+        replayed : int
+            Steps taken along those of the previous solve.
+        departed : float
+            The time at which the solve left the steps of the previous
+            one, after a rejected step or where it needed a Jacobian of
+            its own, None if it did not.
+        refreshed : int
+            Jacobian evaluations on the steps started from the previous
+            solve, i.e. where its Jacobian no longer did.
+        breakdown : str
+            Why the warm start did not work, None if it did.
+        """
+        self.previous = previous if previous is not None and previous.steps else None
+        self.steps = []
+        self.jac = None
+        self.replayed = 0
+        self.departed = None
+        self.refreshed = 0
+        self.breakdown = None
+
+    @property
+    def first_step(self) -> float:
+        t_old, t = self.steps[0][:2]
+        return abs(t - t_old)
+
+    def prepare(self, solver: type, options: dict) -> tuple:
+        """
+        The solver class and the options of solve_ivp for this solve.
+        """
+        options = dict(options)
+        previous = self.previous
+        start_jac = False
+        if previous is not None:
+            options.setdefault('first_step', previous.first_step)
+            jac = options.get('jac')
+            if previous.jac is not None and callable(jac) and issubclass(solver, (BDF, Radau)):
+                options['jac'] = _starting(jac, previous.jac)
+                start_jac = True
+        return _warm(solver, self, start_jac), options
+
+    def finish(self) -> None:
+        """
+        Sets breakdown once the solve is done, and lets go of the
+        previous solve.
+        """
+        previous, self.previous = self.previous, None
+        if not self.steps:
+            self.breakdown = "The solve holds no steps to continue from."
+            return
+        if previous is None:
+            return
+        reasons = []
+        if self.first_step < previous.first_step * (1 - 1e-9):
+            reasons.append("rejected the first step of the previous point")
+        if self.departed is not None:
+            reasons.append(f"left the steps of the previous point at t = {self.departed:.6g}, "
+                           f"after {self.replayed} of {len(previous.steps)}")
+        if self.refreshed:
+            times = 'once' if self.refreshed == 1 else f'{self.refreshed} times'
+            reasons.append(f"refreshed the Jacobian of the previous point {times}")
+        if reasons:
+            self.breakdown = "The solve " + ", ".join(reasons) + "."
+
+    def __repr__(self) -> str:
+        return f"WarmStart(steps={len(self.steps)}, replayed={self.replayed})"
+
+
+def _starting(jac: Callable, J: Any) -> Callable:
+    """
+    A Jacobian function that gives J on its first call, at the initial
+    state, and evaluates jac after that.
+    """
+    first = [True]
+
+    def starting(t, y):
+        if first[0]:
+            first[0] = False
+            return J
+        return jac(t, y)
+    return starting
+
+
+def _segment(starts: list, steps: list, t: float) -> int:
+    """
+    The index of the step of the previous solve that t falls into, or
+    None past its end. A t that rounding put just before the start of a
+    step counts as its start.
+    """
+    i = bisect.bisect_right(starts, t)
+    if i < len(starts) and _same(t, starts[i], steps[i][1] - starts[i]):
+        return i
+    if i > 0 and t < steps[i - 1][1]:
+        return i - 1
+    return None
+
+
+def _same(t: float, other: float, step: float) -> bool:
+    """
+    Whether two times agree up to rounding, relative to a step size.
+    """
+    return abs(t - other) <= 1e-9 * abs(step)
+
+
+class _Guess:
+    def __init__(self, dense: Any, t: float, y: np.ndarray) -> None:
+        """
+        The trajectory of the previous solve, shifted to pass through y
+        at t, as the Radau stages read it for their initial guess.
+        """
+        self.dense = dense
+        self.shift = y - dense(t)
+
+    def __call__(self, t: np.ndarray) -> np.ndarray:
+        return self.dense(t) + self.shift[:, None]
+
+
+def _warm(solver: type, start: WarmStart, start_jac: bool) -> type:
+    """
+    A subclass of the solver class that records its steps into start and
+    starts from those of start.previous.
+    """
+    previous = start.previous
+    radau = issubclass(solver, Radau)
+    replay = radau and previous is not None
+    starts = [step[0] for step in previous.steps] if replay else []
+
+    class Warm(solver):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            if start_jac:
+                # The Jacobian of the previous solve was not evaluated
+                # here, and is refreshed where the Newton iteration fails.
+                self.njev = 0
+                self.current_jac = False
+            start.jac = getattr(self, 'J', None)
+            if radau:
+                # Keep the LU factors of every step, for the next solve.
+                self.factors = []
+                lu = self.lu
+
+                def recording(A):
+                    factor = lu(A)
+                    self.factors.append(factor)
+                    return factor
+                self.lu = recording
+
+        def step(self):
+            t, y = self.t, self.y
+            njev = self.njev
+            planned = None
+            if replay:
+                i = _segment(starts, previous.steps, t)
+                if i is not None:
+                    t_old, t_new, dense, J, factors = previous.steps[i]
+                    if start.departed is None and _same(t, t_old, t_new - t_old):
+                        # Take the step of the previous solve with its
+                        # factors, which are refreshed where Newton fails.
+                        planned = t_new
+                        self.h_abs = abs(t_new - t_old)
+                        self.LU_real, self.LU_complex = factors
+                        self.J = J
+                        self.current_jac = False
+                        self.sol = _Guess(dense, t, y)
+            held = (self.LU_real, self.LU_complex) if radau else None
+            if radau:
+                self.factors = []
+
+            message = super().step()
+            if self.status == 'failed':
+                return message
+            if planned is not None or (start_jac and not start.steps):
+                start.refreshed += self.njev - njev
+            if radau:
+                factors = tuple(self.factors[-2:]) if self.factors else held
+                start.steps.append((t, self.t, self.dense_output(), self.J, factors))
+            elif not start.steps:
+                start.steps.append((t, self.t, None, None, None))
+            if planned is not None:
+                # A rejected step or a Jacobian of its own ends the replay,
+                # the solver carries on with its own steps and factors.
+                if _same(self.t, planned, planned - t) and self.njev == njev:
+                    start.replayed += 1
+                else:
+                    start.departed = t
+            return message
+
+    Warm.__name__ = Warm.__qualname__ = solver.__name__
+    return Warm
@@ -0,0 +1,100 @@
+"""
+Contains the DenseSolution class, a compact continuous solution that can
+be evaluated at any time inside the integration interval. It keeps only
+the states and derivatives at the steps the solver took, so a single
+integration to the longest horizon serves every sampling of the result.
+"""
+import numpy as np
+from typing import Callable
+
+
+class DenseSolution:
+    def __init__(self, t: np.ndarray, y: np.ndarray, dy: np.ndarray) -> None:
+        """
+        A piecewise cubic Hermite interpolant through the solver steps.
+
+        Parameters
+        ----------
+        t : np.ndarray
+            The step times, increasing, of shape (n_steps,).
+        y : np.ndarray
+            The states at the step times, of shape (..., n_steps), e.g.
+            (n_species, n_steps) or (n_members, n_species, n_steps).
+        dy : np.ndarray
+            The time derivatives of the states, of the same shape as y.
+        """
+        self.t = np.asarray(t, dtype=float)
+        self.y = np.asarray(y)
+        self.dy = np.asarray(dy)
+        if self.y.shape != self.dy.shape or self.y.shape[-1] != self.t.size:
+            raise ValueError(f"y {self.y.shape} and dy {self.dy.shape} do not match "
+                             f"{self.t.size} step times.")
+
+    @classmethod
+    def from_ode(cls, sol, fun: Callable, shape: tuple = None) -> 'DenseSolution':
+        """
+        Builds the compact interpolant from the dense output (an
+        OdeSolution) of solve_ivp.
+
+        Parameters
+        ----------
+        sol : OdeSolution
+            The dense output of solve_ivp, i.e. its result.sol.
+        fun : Callable
+            fun(t, y) gives the derivatives for a block of states y of
+            shape (n, n_steps), e.g. a vectorized rhs.
+        shape : tuple, optional
+            Shape to give every state, e.g. (n_members, n_species) for an
+            ensemble integrated as one flat system.
+        """
+        t = np.asarray(sol.ts, dtype=float)
+        y = sol(t)
+        dy = fun(t, y)
+        if shape is not None:
+            y = y.reshape(tuple(shape) + (t.size,))
+            dy = dy.reshape(tuple(shape) + (t.size,))
+        return cls(t, y, dy)
+
+    @property
+    def t_min(self) -> float:
+        return self.t[0]
+
+    @property
+    def t_max(self) -> float:
+        return self.t[-1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.t.nbytes + self.y.nbytes + self.dy.nbytes
+
+    def __call__(self, t) -> np.ndarray:
+        """
+        Evaluates the solution at the time or array of times t.
+
+        Returns
+        -------
+        np.ndarray
+            The states, of shape (..., len(t)) for an array of times and
+            of the shape of a single state for a scalar time.
+        """
+        t = np.asarray(t, dtype=float)
+        times = np.atleast_1d(t)
+        if times.size and (times.min() < self.t_min or times.max() > self.t_max):
+            raise ValueError(f"Times must lie within [{self.t_min}, {self.t_max}].")
+
+        i = np.clip(np.searchsorted(self.t, times, side='right') - 1, 0, self.t.size - 2)
+        h = self.t[i + 1] - self.t[i]
+        theta = (times - self.t[i]) / h
+        theta2 = theta**2
+        theta3 = theta2*theta
+
+        # Cubic Hermite basis on every step.
+        y = ((2*theta3 - 3*theta2 + 1) * self.y[..., i]
+             + (theta3 - 2*theta2 + theta) * h * self.dy[..., i]
+             + (3*theta2 - 2*theta3) * self.y[..., i + 1]
+             + (theta3 - theta2) * h * self.dy[..., i + 1])
+        return y[..., 0] if t.ndim == 0 else y
+
+    def __repr__(self) -> str:
+        return (f"DenseSolution(t=[{self.t_min}, {self.t_max}], steps={self.t.size}, "
+                f"shape={self.y.shape[:-1]})")
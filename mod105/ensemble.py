@@ -0,0 +1,383 @@
+"""
+Fixed-grid integration of whole ensembles of trajectories. Every member
+takes the same steps on a shared time grid, so a step of the ensemble is a
+handful of vectorized evaluations on a block of states instead of a solver
+per member. Screening sweeps, which do not need the step size control of
+solve_ivp, run at the throughput of NumPy. Each member is checked against
+the local error estimate of its steps and for breaking down, so the points
+where the grid was too coarse can be picked out and solved properly.
+"""
+import time
+import numpy as np
+from scipy.integrate import RK23, RK45
+from scipy.optimize import OptimizeResult
+from typing import Any, Callable, Hashable, Mapping
+from .solvestats import SolveStats
+
+# The explicit Runge-Kutta pairs of solve_ivp, taken at fixed steps.
+EXPLICIT = {'BS3': RK23, 'DOPRI5': RK45}
+
+# The fixed-step schemes of integrate.
+METHODS = tuple(EXPLICIT) + ('ROS2',)
+
+# Where the models keep their output times.
+TIME_ATTRIBUTES = ('t_eval', 'tau', 't')
+
+# The ROS2 scheme of Verwer et al., L-stable with gamma = 1 + 1/sqrt(2).
+GAMMA = 1 + 1 / np.sqrt(2)
+
+
+def integrate(fun: Callable,
+              t: np.ndarray,
+              y0: np.ndarray,
+              method: str = 'DOPRI5',
+              jac: Callable = None,
+              max_step: float = None,
+              rtol: float = 1e-3,
+              atol: float = 1e-6,
+              dtype: np.dtype = np.float64,
+              ) -> OptimizeResult:
+    """
+    Integrates an ensemble of initial value problems on a fixed time grid.
+
+    Parameters
+    ----------
+    fun : Callable
+        fun(t, Y) gives the rates of a block of states Y of shape
+        (n_species, n_members), one member per column.
+    t : np.ndarray
+        The output times, increasing. The steps are the intervals between
+        them, split into equal substeps no longer than max_step.
+    y0 : np.ndarray
+        Initial states, of shape (n_species,) or (n_species, n_members).
+    method : str
+        'DOPRI5' or 'BS3', the explicit Dormand-Prince and Bogacki-Shampine
+        pairs of RK45 and RK23 at fixed steps, with six and three
+        evaluations per step, or 'ROS2', a linearly implicit Rosenbrock
+        method of second order for stiff ensembles, which solves for
+        autonomous rates.
+    jac : Callable, optional
+        jac(t, Y) gives the Jacobians of a block of states, of shape
+        (n_species, n_species, n_members) as from the reaction networks,
+        for ROS2. By default they are found by finite differences, at
+        n_species extra evaluations per step.
+    max_step : float, optional
+        Largest step size. By default one step per output interval.
+    rtol, atol : float
+        Tolerances the local error estimates of the steps are held to, as
+        in solve_ivp. They do not change the steps, they only flag the
+        members the grid is too coarse for. The estimates are those of the
+        embedded lower order solutions, which for ROS2 is of first order,
+        so its flags are on the safe side by about a factor 1/h.
+    dtype : np.dtype
+        Data type the states are stored in, e.g. np.float32 to halve the
+        memory of large ensembles. The steps are always taken in double
+        precision.
+
+    Returns
+    -------
+    OptimizeResult
+        t and y, of shape (n_species, n_members, n_times), as for
+        solve_ivp, and per member
+        status, 0 if every step met the tolerances, 1 if some did not and
+        -1 if the member broke down, its states turning NaN from there on;
+        success, whether status is 0;
+        error, the largest local error estimate relative to the tolerances.
+        nfev, njev and nlu count the evaluations on the whole block, stats
+        holds them with the wall time.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {', '.join(METHODS)}.")
+    start = time.perf_counter()
+    t = np.asarray(t, dtype=float)
+    y0 = np.array(y0, dtype=float)
+    if y0.ndim == 1:
+        y0 = y0[:, None]
+    store = np.empty((len(t),) + y0.shape, dtype=dtype)
+    counts = {'nfev': 0, 'njev': 0, 'nlu': 0}
+    stepper = _Stepper(fun, jac, method, rtol, atol, counts)
+    error, broken, steps = _advance(stepper, t, y0, store, max_step)
+    return _result(t, store, error, broken, method, time.perf_counter() - start, steps, counts)
+
+
+def ensemble(model: type,
+             base: Mapping[str, Any],
+             axes: Mapping[Hashable, np.ndarray],
+             method: str = 'DOPRI5',
+             max_step: float = None,
+             rtol: float = 1e-3,
+             atol: float = 1e-6,
+             dtype: np.dtype = np.float64,
+             block: int = 4096,
+             ) -> OptimizeResult:
+    """
+    Integrates a model at every point of a parameter grid as one ensemble,
+    see integrate.
+
+    The members are taken in blocks. For each, the model is built once
+    with every swept parameter holding one value per member, which the
+    rates of HydrogenFusion and ChemicalClock take as they are, and its rhs
+    and, for ROS2, jac advance the whole block on the output times of the
+    model.
+
+    Parameters
+    ----------
+    model : type
+        The model class.
+    base : Mapping[str, Any]
+        The model arguments shared by all points.
+    axes : Mapping[Hashable, np.ndarray]
+        The swept parameters and their values, with keys as in
+        sweep.grid_point.
+    method, max_step, rtol, atol, dtype
+        See integrate.
+    block : int
+        Number of members integrated together. Blocks that fit the cache
+        of the processor give the highest throughput.
+
+    Returns
+    -------
+    OptimizeResult
+        As of integrate, with y of shape (n_species,) + grid shape +
+        (n_times,) and status, success and error over the grid. axes holds
+        the swept parameters.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {', '.join(METHODS)}.")
+    start = time.perf_counter()
+    axes = {key: np.asarray(values) for key, values in axes.items()}
+    shape = tuple(len(values) for values in axes.values())
+    size = int(np.prod(shape))
+
+    store = error = broken = None
+    counts = {'nfev': 0, 'njev': 0, 'nlu': 0}
+    steps = 0
+    for first in range(0, size, block):
+        members = slice(first, min(first + block, size))
+        instance = model(**member_kwargs(base, axes, members))
+        t = np.asarray(next(getattr(instance, name) for name in TIME_ATTRIBUTES
+                            if hasattr(instance, name)), dtype=float)
+        y0 = np.asarray(instance.init_conc, dtype=float)
+        y0 = np.broadcast_to(y0.reshape(len(y0), -1), (len(y0), members.stop - members.start))
+        if store is None:
+            store = np.empty((len(t), len(y0), size), dtype=dtype)
+            error = np.empty(size)
+            broken = np.empty(size, dtype=bool)
+        stepper = _Stepper(instance.rhs, instance.jac if method == 'ROS2' else None,
+                           method, rtol, atol, counts)
+        error[members], broken[members], steps = _advance(stepper, t, y0, store[:, :, members], max_step)
+
+    sol = _result(t, store, error, broken, method, time.perf_counter() - start, steps, counts)
+    sol.y = sol.y.reshape(sol.y.shape[:1] + shape + sol.y.shape[-1:])
+    for name in ('status', 'success', 'error'):
+        setattr(sol, name, getattr(sol, name).reshape(shape))
+    sol.axes = axes
+    return sol
+
+
+def member_kwargs(base: Mapping[str, Any], axes: Mapping[Hashable, np.ndarray],
+                  members: slice = slice(None)) -> dict:
+    """
+    The model arguments of a whole grid at once, every swept parameter
+    holding its values at the given points, by default all, in grid order.
+    Keys are as in sweep.grid_point, a (name, index) key turning the array
+    argument name into one column per point.
+    """
+    grids = np.meshgrid(*[np.asarray(values, dtype=float) for values in axes.values()], indexing='ij')
+    columns = [grid.ravel()[members] for grid in grids]
+    m = len(columns[0]) if columns else 1
+    kwargs = dict(base)
+    copied = set()
+    for key, values in zip(axes, columns):
+        if isinstance(key, tuple):
+            name, element = key
+            if name not in copied:
+                array = np.asarray(kwargs[name], dtype=float)
+                kwargs[name] = np.repeat(array.reshape(len(array), 1), m, axis=1)
+                copied.add(name)
+            kwargs[name][element] = values
+        else:
+            kwargs[key] = values
+    return kwargs
+
+
+def _advance(stepper: '_Stepper', t: np.ndarray, y0: np.ndarray, store: np.ndarray,
+             max_step: float) -> tuple:
+    """
+    Integrates a block of members over the grid t, writing the states
+    into store, of shape (n_times, n_species, n_members). Returns the
+    largest error norms of the members, which of them broke down and the
+    number of steps.
+    """
+    Y = np.array(y0, dtype=float)
+    store[0] = Y
+    error = np.zeros(Y.shape[1])
+    broken = np.zeros(Y.shape[1], dtype=bool)
+    steps = 0
+    F = None
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for i in range(1, len(t)):
+            interval = t[i] - t[i - 1]
+            substeps = 1 if max_step is None else max(1, int(np.ceil(interval / max_step)))
+            h = interval / substeps
+            for j in range(substeps):
+                Y, F, local = stepper.step(t[i - 1] + j * h, Y, F, h)
+                steps += 1
+                error = np.fmax(error, local)
+                # Members that broke down start over from their initial
+                # states, so the block stays finite, and are masked below.
+                bad = ~np.all(np.isfinite(Y), axis=0) | ~np.isfinite(local)
+                if bad.any():
+                    broken |= bad
+                    Y[:, bad] = y0[:, bad]
+                    F = None
+            store[i] = Y
+            if broken.any():
+                store[i][:, broken] = np.nan
+    return error, broken, steps
+
+
+def _result(t: np.ndarray, store: np.ndarray, error: np.ndarray, broken: np.ndarray, method: str,
+            wall_time: float, steps: int, counts: dict) -> OptimizeResult:
+    status = np.where(broken, -1, np.where(error > 1, 1, 0))
+    message = (f"{np.sum(status == 1)} of {status.size} members exceeded the tolerances, "
+               f"{np.sum(broken)} broke down.")
+    stats = SolveStats(method, wall_time, steps=steps, status=-1 if broken.any() else 0,
+                       message=message, **counts)
+    return OptimizeResult(t=t, y=np.moveaxis(store, 0, -1), status=status, success=status == 0,
+                     error=np.where(broken, np.nan, error), message=message, stats=stats, **counts)
+
+
+class _Stepper:
+    def __init__(self, fun: Callable, jac: Callable, method: str, rtol: float, atol: float,
+                 counts: dict) -> None:
+        """
+        One fixed step of the whole block, with its local error estimate
+        per member, counting the evaluations.
+        """
+        self.fun = fun
+        self.jac = jac
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.counts = counts
+        self._stages = None
+
+    def rates(self, t: float, Y: np.ndarray) -> np.ndarray:
+        self.counts['nfev'] += 1
+        return np.asarray(self.fun(t, Y), dtype=float)
+
+    def step(self, t: float, Y: np.ndarray, F: np.ndarray, h: float) -> tuple:
+        """
+        Returns the new states, their rates where the scheme has them for
+        the next step, and the error norms of the members.
+        """
+        if F is None:
+            F = self.rates(t, Y)
+        if self.method in EXPLICIT:
+            return self._explicit(EXPLICIT[self.method], t, Y, F, h)
+        return self._ros2(t, Y, F, h)
+
+    def _explicit(self, pair: type, t: float, Y: np.ndarray, F: np.ndarray, h: float) -> tuple:
+        shape = (pair.n_stages + 1,) + Y.shape
+        if self._stages is None or self._stages.shape != shape:
+            self._stages = np.empty(shape)
+        # The stages are reused from step to step, the rates of the last
+        # one are moved to the first before it is overwritten.
+        K = self._stages
+        K[0] = F
+        # The stages as rows, so every combination of them is one matrix
+        # product.
+        stages = K.reshape(len(K), -1)
+        for s in range(1, pair.n_stages):
+            dY = (h * pair.A[s, :s]) @ stages[:s]
+            K[s] = self.rates(t + pair.C[s] * h, Y + dY.reshape(Y.shape))
+        Y_new = Y + ((h * pair.B) @ stages[:-1]).reshape(Y.shape)
+        # First same as last: the rates at the new states start the next step.
+        K[-1] = self.rates(t + h, Y_new)
+        error = ((h * pair.E) @ stages).reshape(Y.shape)
+        return Y_new, K[-1], self._norm(error, Y, Y_new)
+
+    def _ros2(self, t: float, Y: np.ndarray, F: np.ndarray, h: float) -> tuple:
+        W = -GAMMA * h * self._jacobians(t, Y, F)
+        W[np.arange(len(Y)), np.arange(len(Y))] += 1
+        # Both stages share the matrix, so it is factorized once per step.
+        self.counts['nlu'] += 1
+        lu, swaps = _lu_factor(W)
+        k1 = _lu_solve(lu, swaps, F)
+        k2 = _lu_solve(lu, swaps, self.rates(t + h, Y + h * k1) - 2 * k1)
+        Y_new = Y + h * (1.5 * k1 + 0.5 * k2)
+        # The difference to the linearly implicit Euler step.
+        error = h * 0.5 * (k1 + k2)
+        return Y_new, None, self._norm(error, Y, Y_new)
+
+    def _jacobians(self, t: float, Y: np.ndarray, F: np.ndarray) -> np.ndarray:
+        """
+        The Jacobians of the members, of shape (n, n, n_members).
+        """
+        if self.jac is not None:
+            self.counts['njev'] += 1
+            return np.asarray(self.jac(t, Y), dtype=float)
+        J = np.empty((len(Y),) + Y.shape)
+        delta = np.sqrt(np.finfo(float).eps) * np.maximum(1.0, np.abs(Y))
+        for j in range(len(Y)):
+            shifted = Y.copy()
+            shifted[j] += delta[j]
+            J[:, j] = (self.rates(t, shifted) - F) / delta[j]
+        return J
+
+    def _norm(self, error: np.ndarray, Y: np.ndarray, Y_new: np.ndarray) -> np.ndarray:
+        """
+        The RMS norms of the members' error estimates relative to the
+        tolerances, as in solve_ivp.
+        """
+        scale = self.atol + self.rtol * np.maximum(np.abs(Y), np.abs(Y_new))
+        ratio = error / scale
+        return np.sqrt(np.einsum('im,im->m', ratio, ratio) / len(Y))
+
+
+def _lu_factor(A: np.ndarray) -> tuple:
+    """
+    LU decompositions with partial pivoting of a matrix per member, of
+    shape (n, n, n_members), vectorized over the members. LAPACK takes
+    the small matrices one at a time, which costs far more than the
+    arithmetic here. Returns the factors, in place of A, and the row swaps
+    as (row, members, rows swapped in).
+    """
+    n = len(A)
+    swaps = []
+    for k in range(n - 1):
+        pivot = np.full(A.shape[-1], k)
+        largest = np.abs(A[k, k])
+        for row in range(k + 1, n):
+            size = np.abs(A[row, k])
+            pivot[size > largest] = row
+            np.maximum(largest, size, out=largest)
+        # Only the few members whose diagonal is not the largest swap.
+        members = np.flatnonzero(pivot != k)
+        if members.size:
+            rows = pivot[members]
+            A[k, :, members], A[rows, :, members] = A[rows, :, members], A[k, :, members].copy()
+            swaps.append((k, members, rows))
+        A[k + 1:, k] /= A[k, k]
+        A[k + 1:, k + 1:] -= A[k + 1:, k, None] * A[k, None, k + 1:]
+    return A, swaps
+
+
+def _lu_solve(lu: np.ndarray, swaps: list, b: np.ndarray) -> np.ndarray:
+    """
+    Solves the systems of _lu_factor for the columns of b, of shape
+    (n, n_members).
+    """
+    x = np.array(b, dtype=float)
+    for k, members, rows in swaps:
+        x[k, members], x[rows, members] = x[rows, members], x[k, members]
+    n = len(x)
+    for i in range(1, n):
+        for j in range(i):
+            x[i] -= lu[i, j] * x[j]
+    for i in range(n - 1, -1, -1):
+        for j in range(i + 1, n):
+            x[i] -= lu[i, j] * x[j]
+        x[i] /= lu[i, i]
+    return x
@@ -0,0 +1,160 @@
+"""
+Positivity-preserving integration of the models in log-concentrations.
+The solver advances u = log(y) instead of the concentrations y, so
+whatever step it takes, y = exp(u) stays positive, the rate laws are
+never evaluated at negative concentrations, and the concentrations that
+span many orders of magnitude are all resolved to the same relative
+accuracy. Species starting at zero, where the logarithm does not exist,
+start from a floor far below the absolute tolerance instead.
+"""
+import inspect
+import numpy as np
+from .densesolution import DenseSolution
+from .solvecache import _arguments, _name_variant
+
+EPS = np.finfo(float).eps
+
+
+def log_space(model: type, floor: float = None) -> type:
+    """
+    Builds the version of a model class that integrates the logarithms of
+    the concentrations, see the module docstring.
+
+    The rates become du/dt = f(y) / y, and the Jacobian J_u = D^-1 J D -
+    diag(f / y) with D = diag(y). The error of u is kept below rtol, which
+    bounds the error of every species by rtol y, i.e. to the relative
+    tolerance however small the concentration.
+
+    The returned class takes the same arguments as model and its solve the
+    same arguments as that of model, but sensitivities. rtol keeps its
+    meaning for the concentrations, atol only sets the default floor. The
+    solutions hold the concentrations in y, the events and the
+    DenseSolution of dense=True. Event functions are called with the
+    concentrations. The solutions gain the field
+
+    floor : np.ndarray
+        The floor every species starting at zero started from instead, 0
+        for the others.
+
+    Parameters
+    ----------
+    model : type
+        The full model, e.g. HydrogenFusion. Its rhs must take blocks of
+        states of shape (n, m).
+    floor : float, optional
+        The concentration that species starting at zero start from. By
+        default 1e-6 atol, so that the difference stays far below what the
+        tolerances resolve.
+
+    Returns
+    -------
+    type
+        The log-space model, a subclass of model.
+    """
+    signature = inspect.signature(model.solve)
+
+    class LogSpace(model):
+        def rhs(self, t, u, out=None):
+            """
+            The rates of the log-concentrations. u may also be a block of
+            shape (n, m).
+            """
+            y = self._concentrations(np.asarray(u, dtype=float))
+            with np.errstate(over='ignore', invalid='ignore'):
+                f = model.rhs(self, t, y)
+                # A concentration that underflowed to zero stays there.
+                result = np.divide(f, y, out=np.zeros(np.shape(f)), where=y > 0)
+            if out is None:
+                return result
+            out[...] = result
+            return out
+
+        def jac(self, t, u):
+            """
+            The exact Jacobian of the rates of the log-concentrations.
+            """
+            y = self._concentrations(np.asarray(u, dtype=float))
+            J = np.asarray(model.jac(self, t, y))
+            f = model.rhs(self, t, y)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                J_u = J * y[None, :] / y[:, None] - np.diag(f / y)
+            return np.where(np.isfinite(J_u), J_u, 0)
+
+        def solve(self, *args, **options):
+            """
+            Solves the model in log-concentrations, see log_space.
+            """
+            arguments = _arguments(signature, self, *args, **options)
+            if arguments.get('sensitivities') is not None:
+                raise ValueError("The log-space models do not give sensitivities, "
+                                 "solve the full model for them.")
+
+            given = np.array(self.init_conc, dtype=float)
+            if np.any(given < 0):
+                raise ValueError("Log-space integration needs nonnegative initial concentrations.")
+            rtol = np.asarray(arguments.get('rtol', 1e-3), dtype=float)
+            atol = np.asarray(arguments.get('atol', 1e-6), dtype=float)
+            floors = np.broadcast_to(1e-6 * atol if floor is None else floor, given.shape).astype(float)
+            if np.any(floors <= 0):
+                raise ValueError("The floor of log-space integration must be positive.")
+            floors = np.where(given > 0, 0, floors)
+            # The error of u is the relative error of y, so the relative
+            # tolerance becomes the absolute one of u.
+            arguments['atol'] = rtol
+            arguments['rtol'] = 100 * EPS
+            # Events are posed on the concentrations, with the given initial
+            # concentrations for relative thresholds.
+            if arguments.get('events') is not None:
+                events = arguments['events']
+                if not isinstance(events, (list, tuple)):
+                    events = [events]
+                arguments['events'] = [_log_event(e.event(self) if hasattr(e, 'event') else e)
+                                       for e in events]
+
+            # The finite difference Jacobian of jac=None must follow the
+            # sparsity of the log-space rates, which gain the diagonal.
+            sparsity = getattr(getattr(model, 'network', None), 'sparsity', None)
+            if 'jac' in arguments and arguments['jac'] is None and sparsity is not None:
+                arguments.setdefault('jac_sparsity', sparsity | np.eye(len(given), dtype=bool))
+
+            # The floor enters the initial state, and so the cache key.
+            self.init_conc = np.log(given + floors)
+            try:
+                sol = super().solve(**arguments)
+            finally:
+                self.init_conc = given
+
+            if getattr(sol, 'y', None) is None:
+                return sol
+            sol.y = np.exp(sol.y)
+            if getattr(sol, 'y_events', None) is not None:
+                sol.y_events = [np.exp(u) for u in sol.y_events]
+            if isinstance(getattr(sol, 'sol', None), DenseSolution):
+                y = np.exp(sol.sol.y)
+                sol.sol = DenseSolution(sol.sol.t, y, sol.sol.dy * y)
+            sol.floor = floors
+            return sol
+
+        def _concentrations(self, u: np.ndarray) -> np.ndarray:
+            """
+            The concentrations exp(u). Trial steps may overflow, the
+            solver rejects the rates that are not finite.
+            """
+            with np.errstate(over='ignore'):
+                return np.exp(u)
+
+    _name_variant(LogSpace, f'{model.__name__}LogSpace', '' if floor is None else repr(floor))
+    LogSpace.__doc__ = f"{model.__name__} in log-concentrations, see logspace.log_space."
+    return LogSpace
+
+
+def _log_event(event):
+    """
+    Wraps an event function of the concentrations for the log-concentrations.
+    """
+    def logged(t, u):
+        return event(t, np.exp(u))
+    for name in ('terminal', 'direction'):
+        if hasattr(event, name):
+            setattr(logged, name, getattr(event, name))
+    return logged
@@ -0,0 +1,269 @@
+"""
+Quasi-steady-state reduction of the reaction models. The chosen fast
+species are held on their slow manifold, where their own rate equations
+vanish, so only the slow species are integrated and the fast time scales
+that make the full models stiff drop out. Every reduced solution comes with
+an estimate of its distance to the full model, so sweeps can use the
+reduction wherever it is accurate and fall back to the full model elsewhere.
+"""
+import functools
+import numpy as np
+from scipy.integrate import solve_ivp
+from .solvecache import _name_variant
+from typing import Callable, Iterable
+
+
+def quasi_steady(model: type, fast: Iterable, tol: float = None,
+                 newton_tol: float = 1e-12, max_iter: int = 50) -> type:
+    """
+    Builds the quasi-steady-state reduction of a model class.
+
+    The returned class takes the same arguments as model. Its rhs solves
+    the rate equations of the fast species for their quasi-steady values
+    at the current slow species, by Newton's method started from the fast
+    species of the state, and gives the rates of the slow species there.
+    For the fast species it gives the rate at which the quasi-steady values
+    move, so the solve of model, which it inherits, integrates the reduced
+    system and returns every species. Its jac is the reduced Jacobian
+    J_SS - J_SF J_FF^-1 J_FS, for the stiff methods.
+
+    The solutions gain the fields
+
+    error : np.ndarray
+        A first order estimate of the difference to the full model at
+        every output time, of the shape of y. In the full model the fast
+        species lag behind their quasi-steady values by J_FF^-1 dy_F/dt,
+        and the initial layer, in which they relax from their initial
+        values, shifts the slow species by -J_SF J_FF^-1 (y_F(0) - y_F*(0)).
+        Both are carried along the linearised reduced system. The initial
+        layer of the fast species themselves is left out, it has decayed
+        by the first output time after t[0].
+    error_max : float
+        The largest absolute value of error.
+    reduced : bool
+        Whether this is the reduced solution, see tol.
+
+    Parameters
+    ----------
+    model : type
+        The full model, e.g. HydrogenFusion. Its rhs must take blocks of
+        states of shape (n, m).
+    fast : Iterable
+        The quasi-steady species, by name in model.network.species or by
+        index into the state.
+    tol : float, optional
+        If given, solve falls back to the full model whenever error_max
+        exceeds tol or the fast species have no quasi-steady state.
+    newton_tol : float
+        Tolerance of the Newton steps for the fast species, relative to
+        1 + |y_F|.
+    max_iter : int
+        Maximum number of Newton iterations.
+
+    Returns
+    -------
+    type
+        The reduced model, a subclass of model.
+    """
+    names = getattr(getattr(model, 'network', None), 'species', None)
+    F = np.array([names.index(f) if isinstance(f, str) else int(f) for f in fast])
+    label = ','.join(names[f] if names else str(f) for f in F)
+
+    class Reduced(model):
+        def rhs(self, t, y, out=None):
+            """
+            The rates of the slow species with the fast ones quasi-steady,
+            and the rates of the quasi-steady values. y may also be a
+            block of shape (n, m).
+            """
+            Y = np.asarray(y, dtype=float)
+            _, f, J = self._manifold(t, Y.reshape(len(Y), -1))
+            f[F] = _manifold_rates(J, f, F)
+            f = f.reshape(Y.shape)
+            if out is None:
+                return f
+            out[...] = f
+            return out
+
+        def jac(self, t, y):
+            """
+            The Jacobian of the reduced system, in which only the slow
+            species vary independently.
+            """
+            y = np.asarray(y, dtype=float)
+            _, _, J = self._manifold(t, y[:, None])
+            J = J[0]
+            S = _slow(len(y), F)
+            # The derivative of the quasi-steady values by the slow species.
+            dF = -np.linalg.solve(J[np.ix_(F, F)], J[np.ix_(F, S)])
+            reduced = J[np.ix_(S, S)] + J[np.ix_(S, F)] @ dF
+            result = np.zeros_like(J)
+            result[np.ix_(S, S)] = reduced
+            result[np.ix_(F, S)] = dF @ reduced
+            return result
+
+        def solve(self, *args, **options):
+            """
+            Solves the reduced system, see quasi_steady. Takes the same
+            arguments as the solve of the full model, but sensitivities.
+            """
+            if options.get('sensitivities') is not None:
+                raise ValueError("The reduced models do not give sensitivities, "
+                                 "solve the full model for them.")
+            given = np.array(self.init_conc, dtype=float)
+            try:
+                Y, _, _ = self._manifold(0.0, given[:, None], relax=True)
+                # The reduced system starts on the slow manifold.
+                self.init_conc = Y[:, 0]
+                try:
+                    sol = super().solve(*args, **options)
+                finally:
+                    self.init_conc = given
+            except (RuntimeError, np.linalg.LinAlgError):
+                if tol is None:
+                    raise
+                return self._full(*args, **options)
+            if not getattr(sol, 'success', True):
+                return sol if tol is None else self._full(*args, **options)
+
+            # Put the output exactly on the manifold, the integration only
+            # carries it along.
+            sol.y, f, J = self._manifold(sol.t, sol.y)
+            sol.error = _error(sol.t, given, Y[:, 0], f, J, F)
+            sol.error_max = float(np.max(np.abs(sol.error), initial=0))
+            sol.reduced = True
+            if tol is not None and sol.error_max > tol:
+                return self._full(*args, **options)
+            return sol
+
+        def _full(self, *args, **options):
+            """
+            Solves the full model with the parameters of this one.
+            """
+            full = model.__new__(model)
+            full.__dict__.update(self.__dict__)
+            sol = full.solve(*args, **options)
+            sol.reduced = False
+            return sol
+
+        def _manifold(self, t, Y: np.ndarray, relax: bool = False) -> tuple:
+            """
+            Moves the fast species of the states Y, of shape (n, m), onto
+            their quasi-steady values, starting from their current values.
+            Returns the states with the full rates and Jacobians there, of
+            shapes (n, m) and (m, n, n). With relax, a single state is first
+            relaxed towards the manifold where Newton's method fails from it.
+            """
+            start = Y
+            Y = np.array(Y, dtype=float)
+            for _ in range(max_iter):
+                f = model.rhs(self, t, Y)
+                J = _jac_blocks(lambda t, y: model.jac(self, t, y), t, Y)
+                delta = np.linalg.solve(J[:, F][:, :, F], -f[F].T[..., None])[..., 0].T
+                if not np.all(np.isfinite(delta)):
+                    break
+                Y[F] += delta
+                # Newton's method converges quadratically, so once the step
+                # is below the square root of the tolerance, the rates moved
+                # along with it to first order are accurate to the tolerance.
+                if np.all(np.abs(delta) <= np.sqrt(newton_tol) * (1 + np.abs(Y[F]))):
+                    f = f + np.einsum('mif,fm->im', J[:, :, F], delta)
+                    # From a poor start, e.g. no radicals at all, Newton's
+                    # method may settle on a root with negative concentrations.
+                    if relax and np.any(Y[F] < -newton_tol * (1 + np.abs(Y[F]))):
+                        break
+                    return Y, f, J
+            if relax:
+                return self._manifold(t, self._relax(t, np.array(start, dtype=float)))
+            raise RuntimeError("The fast species found no quasi-steady state.")
+
+        def _relax(self, t: float, Y: np.ndarray) -> np.ndarray:
+            """
+            Lets the fast species of a single state relax with the slow
+            species held fixed, as a start for Newton's method where it
+            does not converge on its own.
+            """
+            y = Y[:, 0].copy()
+
+            def rates(_, yF):
+                y[F] = yF
+                return model.rhs(self, t, y)[F]
+
+            horizon = 1.0
+            for _ in range(10):
+                sol = solve_ivp(rates, (0, horizon), Y[F, 0], method='BDF')
+                if not sol.success:
+                    break
+                Y[F, 0] = sol.y[:, -1]
+                if np.all(np.abs(rates(0, Y[F, 0])) <= 1e-8 * (1 + np.abs(Y[F, 0]))):
+                    break
+                horizon *= 10
+            return Y
+
+    _name_variant(Reduced, f'{model.__name__}QSSA', label)
+    Reduced.__doc__ = f"{model.__name__} with {label} quasi-steady, see qssa.quasi_steady."
+    return Reduced
+
+
+def _slow(n: int, fast: np.ndarray) -> np.ndarray:
+    return _slow_indices(n, tuple(fast))
+
+
+@functools.lru_cache(maxsize=None)
+def _slow_indices(n: int, fast: tuple) -> np.ndarray:
+    return np.setdiff1d(np.arange(n), fast)
+
+
+def _jac_blocks(jac: Callable, t, Y: np.ndarray) -> np.ndarray:
+    """
+    The Jacobians at the states Y, of shape (n, m), as an array of shape
+    (m, n, n). The models give blocks of shape (n, n, m).
+    """
+    return np.moveaxis(np.asarray(jac(t, Y)), -1, 0)
+
+
+def _manifold_rates(J: np.ndarray, f: np.ndarray, fast: np.ndarray) -> np.ndarray:
+    """
+    The rates of change of the quasi-steady values, -J_FF^-1 J_FS f_S,
+    of shape (n_fast, m).
+    """
+    S = _slow(len(f), fast)
+    A = J[:, fast][:, :, fast]
+    B = J[:, fast][:, :, S]
+    return -np.linalg.solve(A, B @ f[S].T[..., None])[..., 0].T
+
+
+def _error(t: np.ndarray, given: np.ndarray, y0: np.ndarray, f: np.ndarray,
+           J: np.ndarray, fast: np.ndarray) -> np.ndarray:
+    """
+    The first order estimate of the distance of a reduced solution to the
+    full model, see quasi_steady. The error of the slow species follows
+    the linearised reduced system driven by the lag of the fast species,
+    e_S' = J_red e_S + J_SF lag, integrated by the trapezoidal rule over
+    the output times, starting from the shift of the initial layer.
+    """
+    S = _slow(len(f), fast)
+    A = J[:, fast][:, :, fast]
+    C = J[:, S][:, :, fast]
+    dF = -np.linalg.solve(A, J[:, fast][:, :, S])
+    reduced = J[:, S][:, :, S] + C @ dF
+    lag = np.linalg.solve(A, _manifold_rates(J, f, fast).T[..., None])[..., 0]
+    drift = (C @ lag[..., None])[..., 0]
+
+    slow = np.zeros((len(t), len(S)))
+    slow[0] = -C[0] @ np.linalg.solve(A[0], given[fast] - y0[fast])
+    if len(t) > 1:
+        # The trapezoidal steps e_i = M_i e_i-1 + g_i, set up for all steps
+        # at once.
+        h = (np.diff(t) / 2)[:, None, None]
+        identity = np.eye(len(S))
+        left = identity - h * reduced[1:]
+        M = np.linalg.solve(left, identity + h * reduced[:-1])
+        g = np.linalg.solve(left, h * (drift[:-1] + drift[1:])[..., None])[..., 0]
+        for i in range(1, len(t)):
+            slow[i] = M[i - 1] @ slow[i - 1] + g[i - 1]
+
+    error = np.empty_like(f)
+    error[S] = slow.T
+    error[fast] = ((dF @ slow[..., None])[..., 0] + lag).T
+    return error
@@ -0,0 +1,309 @@
+"""
+Contains the ReactionNetwork class, which turns a declarative list of
+mass-action reactions into fast vectorized NumPy kernels for the rate
+equations and their exact Jacobians. The generated source is cached on
+disk, so the code generation only ever runs once per network.
+"""
+import hashlib
+import importlib.util
+import os
+import numpy as np
+from typing import Iterable, Mapping
+from .solvecache import cache_dir
+
+# Bump whenever the generated code changes, so stale cache files are ignored.
+CODEGEN_VERSION = 2
+
+
+class Reaction:
+    def __init__(self,
+                 rate: str,
+                 reactants: Mapping[str, float],
+                 products: Mapping[str, float] = None,
+                 change: Mapping[str, float] = None,
+                 ) -> None:
+        """
+        A single mass-action reaction.
+
+        The reaction proceeds with rate rate * prod(c_i**order_i) over its
+        reactants. By default the concentrations change by products minus
+        reactants. Models that use effective rate laws can instead give the
+        net change of every species directly.
+
+        Parameters
+        ----------
+        rate : str
+            Name of the rate constant of the reaction.
+        reactants : Mapping[str, float]
+            Reaction order of every species in the rate law.
+        products : Mapping[str, float], optional
+            Stoichiometric coefficients of the products.
+        change : Mapping[str, float], optional
+            Net change of every species per unit of reaction rate.
+            Overrides reactants and products for the stoichiometry.
+        """
+        self.rate = rate
+        self.reactants = dict(reactants)
+        if change is None:
+            change = {}
+            for species, coef in self.reactants.items():
+                change[species] = change.get(species, 0) - coef
+            for species, coef in (products or {}).items():
+                change[species] = change.get(species, 0) + coef
+        self.change = {species: coef for species, coef in change.items() if coef != 0}
+
+    def __repr__(self) -> str:
+        return f"Reaction({self.rate!r}, {self.reactants!r}, change={self.change!r})"
+
+
+class ReactionNetwork:
+    def __init__(self,
+                 species: Iterable[str],
+                 parameters: Iterable[str],
+                 reactions: Iterable[Reaction],
+                 ) -> None:
+        """
+        A network of mass-action reactions.
+
+        Parameters
+        ----------
+        species : Iterable[str]
+            Names of the species, in the order of the state vector.
+        parameters : Iterable[str]
+            Names of the rate constants, in the order they are passed to
+            rhs and jac.
+        reactions : Iterable[Reaction]
+            The reactions of the network.
+        """
+        self.species = tuple(species)
+        self.parameters = tuple(parameters)
+        self.reactions = tuple(reactions)
+
+        for reaction in self.reactions:
+            if reaction.rate not in self.parameters:
+                raise ValueError(f"Unknown rate constant {reaction.rate!r} in {reaction!r}.")
+            unknown = (set(reaction.reactants) | set(reaction.change)) - set(self.species)
+            if unknown:
+                raise ValueError(f"Unknown species {sorted(unknown)} in {reaction!r}.")
+
+        index = {name: i for i, name in enumerate(self.species)}
+        n, r = len(self.species), len(self.reactions)
+
+        # Net stoichiometric changes, one column per reaction.
+        self.stoichiometry = np.zeros((n, r))
+        # Reaction orders, one row per reaction.
+        self.orders = np.zeros((r, n))
+        for j, reaction in enumerate(self.reactions):
+            for name, coef in reaction.change.items():
+                self.stoichiometry[index[name], j] = coef
+            for name, order in reaction.reactants.items():
+                self.orders[j, index[name]] = order
+
+        # Structural nonzeros of the Jacobian.
+        self.sparsity = (np.abs(self.stoichiometry) @ (self.orders != 0)) != 0
+
+        self._kernels = None
+
+    @property
+    def key(self) -> str:
+        """
+        A hash identifying the network and the code generator version.
+        """
+        definition = repr((CODEGEN_VERSION, self.species, self.parameters,
+                           [(r.rate, sorted(r.reactants.items()), sorted(r.change.items()))
+                            for r in self.reactions]))
+        return hashlib.sha256(definition.encode()).hexdigest()[:16]
+
+    def rhs(self, t: float, y: np.ndarray, k: Iterable[float], out: np.ndarray = None) -> np.ndarray:
+        """
+        The rate equations of the network.
+
+        y has shape (n_species,) or (n_species, m) and k holds the rate
+        constants in the order of self.parameters, as scalars or as arrays
+        broadcasting against the rows of y. If out is given, the result is
+        written into it instead of a new array.
+        """
+        return self.kernels.rhs(t, y, k, out)
+
+    def jac(self, t: float, y: np.ndarray, k: Iterable[float], out: np.ndarray = None) -> np.ndarray:
+        """
+        The exact Jacobian of the rate equations, of shape (n_species,
+        n_species) or (n_species, n_species, m) for a block of states.
+        """
+        return self.kernels.jac(t, y, k, out)
+
+    def parameter_jac(self, t: float, y: np.ndarray, k: Iterable[float], out: np.ndarray = None) -> np.ndarray:
+        """
+        The exact Jacobian of the rate equations with respect to the rate
+        constants, of shape (n_species, n_parameters) or (n_species,
+        n_parameters, m) for a block of states.
+        """
+        return self.kernels.parameter_jac(t, y, k, out)
+
+    @property
+    def kernels(self):
+        """
+        The module holding the generated rhs and jac functions. It is
+        loaded from the on-disk cache, generating it first if needed.
+        """
+        if self._kernels is None:
+            self._kernels = _load_kernels(self)
+        return self._kernels
+
+    def source(self) -> str:
+        """
+        Generates the Python source of the rhs, jac and parameter_jac kernels.
+        """
+        n = len(self.species)
+        states = _unpacking('y', n)
+        constants = _unpacking('k', len(self.parameters))
+        parameter = {name: i for i, name in enumerate(self.parameters)}
+
+        lines = [f"# Generated by reactionnetwork.py for {self.species}, do not edit.",
+                 "from numpy import empty, shape, zeros",
+                 "",
+                 "",
+                 "def rhs(t, y, k, out=None):",
+                 f"    {states} = y",
+                 f"    {constants} = k"]
+        for j, reaction in enumerate(self.reactions):
+            lines.append(f"    w{j} = {_monomial(parameter[reaction.rate], self.orders[j])}")
+        lines += ["    if out is None:",
+                  "        out = empty(shape(y))"]
+        for i in range(n):
+            lines.append(f"    out[{i}] = {_linear_combination(self.stoichiometry[i], [f'w{j}' for j in range(len(self.reactions))])}")
+        lines += ["    return out",
+                  "",
+                  "",
+                  "def jac(t, y, k, out=None):",
+                  f"    {states} = y",
+                  f"    {constants} = k",
+                  "    if out is None:",
+                  f"        out = zeros(({n}, {n}) + shape(y)[1:])",
+                  "    else:",
+                  "        out[...] = 0"]
+        for i in range(n):
+            for l in range(n):
+                if not self.sparsity[i, l]:
+                    continue
+                terms = []
+                coefs = []
+                for j, reaction in enumerate(self.reactions):
+                    order = self.orders[j, l]
+                    if self.stoichiometry[i, j] == 0 or order == 0:
+                        continue
+                    orders = self.orders[j].copy()
+                    orders[l] -= 1
+                    terms.append(_monomial(parameter[reaction.rate], orders))
+                    coefs.append(self.stoichiometry[i, j] * order)
+                lines.append(f"    out[{i}, {l}] = {_linear_combination(coefs, terms)}")
+        lines += ["    return out",
+                  "",
+                  "",
+                  "def parameter_jac(t, y, k, out=None):",
+                  f"    {states} = y",
+                  "    if out is None:",
+                  f"        out = zeros(({n}, {len(self.parameters)}) + shape(y)[1:])",
+                  "    else:",
+                  "        out[...] = 0"]
+        for i in range(n):
+            for p, name in enumerate(self.parameters):
+                reactions = [j for j, reaction in enumerate(self.reactions)
+                             if reaction.rate == name and self.stoichiometry[i, j] != 0]
+                if not reactions:
+                    continue
+                terms = [_monomial(None, self.orders[j]) for j in reactions]
+                coefs = [self.stoichiometry[i, j] for j in reactions]
+                lines.append(f"    out[{i}, {p}] = {_linear_combination(coefs, terms)}")
+        lines += ["    return out", ""]
+        return '\n'.join(lines)
+
+    def __repr__(self) -> str:
+        return f"ReactionNetwork({self.species}, {len(self.reactions)} reactions)"
+
+
+def _unpacking(name: str, count: int) -> str:
+    """
+    Source of the targets when unpacking count rows of the named array.
+    """
+    targets = ', '.join(f'{name}{i}' for i in range(count))
+    return targets + ',' if count == 1 else targets
+
+
+def _monomial(constant: int, orders: np.ndarray) -> str:
+    """
+    Source of k_constant * prod(y_i**orders_i), or of the product alone
+    if constant is None.
+    """
+    factors = [] if constant is None else [f'k{constant}']
+    for i, order in enumerate(orders):
+        if order == 0:
+            continue
+        if order == 1:
+            factors.append(f'y{i}')
+        else:
+            factors.append(f'y{i}**{_number(order)}')
+    return '*'.join(factors) or '1'
+
+
+def _linear_combination(coefs: Iterable[float], terms: Iterable[str]) -> str:
+    """
+    Source of sum(coef*term), leaving out the zero coefficients.
+    """
+    source = ''
+    for coef, term in zip(coefs, terms):
+        if coef == 0:
+            continue
+        sign = '-' if coef < 0 else '+'
+        magnitude = abs(coef)
+        factor = term if magnitude == 1 else f'{_number(magnitude)}*{term}'
+        source += f' {sign} {factor}' if source else ('-' if coef < 0 else '') + factor
+    return source or '0'
+
+
+def _number(value: float) -> str:
+    """
+    Source of a number, written as an integer where possible.
+    """
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Kernels already loaded by this process, by network key.
+_loaded = {}
+
+
+def _load_kernels(network: ReactionNetwork):
+    """
+    Imports the generated kernels of a network from the on-disk cache,
+    writing the source there first if it is not cached yet. If the cache
+    directory is not writable, the kernels are compiled in memory.
+    """
+    key = network.key
+    if key in _loaded:
+        return _loaded[key]
+
+    directory = os.path.join(cache_dir(), 'networks')
+    path = os.path.join(directory, f'network_{key}.py')
+    if not os.path.exists(path):
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file first, so a concurrent process never
+            # imports a half written module.
+            temporary = f'{path}.{os.getpid()}.tmp'
+            with open(temporary, 'w') as f:
+                f.write(network.source())
+            os.replace(temporary, path)
+        except OSError:
+            path = None
+
+    if path is None:
+        module = type(os)(f'network_{key}')
+        exec(compile(network.source(), f'<network {key}>', 'exec'), module.__dict__)
+    else:
+        spec = importlib.util.spec_from_file_location(f'network_{key}', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+    _loaded[key] = module
+    return module
@@ -0,0 +1,154 @@
+"""
+Forward sensitivity analysis of the models. The derivatives of the state
+by a set of parameters, dy/dtheta, obey the linear equations
+
+    d/dt dy/dtheta = J dy/dtheta + df/dtheta,
+
+which are integrated alongside the state in one solve, so a single solve
+gives the local derivatives that otherwise take a perturbed solve per
+parameter.
+"""
+import numpy as np
+from scipy.sparse import bsr_matrix
+from .densesolution import DenseSolution
+from typing import Hashable, Iterable, Mapping
+
+
+def is_initial(key: Hashable) -> bool:
+    """
+    Whether a parameter key stands for an initial concentration, i.e. is
+    ('init_conc', i).
+    """
+    return isinstance(key, tuple) and len(key) == 2 and key[0] == 'init_conc'
+
+
+def chain(parameters: Iterable[Hashable], constants: Mapping[Hashable, Mapping[int, float]],
+          n_constants: int) -> np.ndarray:
+    """
+    The matrix turning the derivatives of the rates by the constants of a
+    model into those by the given parameters.
+
+    Parameters
+    ----------
+    parameters : Iterable[Hashable]
+        The parameters, with keys as in sweep.grid_point.
+    constants : Mapping[Hashable, Mapping[int, float]]
+        For every parameter of the model, the derivatives of its rate
+        constants by it, as {constant: derivative}.
+    n_constants : int
+        Number of rate constants of the model.
+
+    Returns
+    -------
+    np.ndarray
+        The derivatives of the constants by the parameters, of shape
+        (n_constants, n_parameters). The rates do not depend on the initial
+        concentrations, so their columns are zero.
+    """
+    result = np.zeros((n_constants, len(parameters)))
+    for j, key in enumerate(parameters):
+        if is_initial(key):
+            continue
+        if key not in constants:
+            raise ValueError(f"Unknown parameter {key!r}, expected one of "
+                             f"{', '.join(map(repr, constants))} or ('init_conc', i).")
+        for column, factor in constants[key].items():
+            result[column, j] = factor
+    return result
+
+
+class Sensitivities:
+    def __init__(self, model, parameters: Iterable[Hashable]) -> None:
+        """
+        The state of a model extended by its derivatives by the given
+        parameters, for solve_ivp.
+
+        The extended state holds the species followed by dy/dtheta, one
+        parameter after the other. Its Jacobian is block diagonal with the
+        Jacobian of the model in every block, see jac, leaving out how the
+        sensitivities depend on the state. The corrector of the implicit
+        methods then treats the state as if alone and corrects every
+        sensitivity with the same iteration matrix, a staggered corrector
+        that only costs a Jacobian the size of the model.
+
+        Parameters
+        ----------
+        model
+            The model, with its initial concentrations in init_conc and the
+            methods rhs, jac, parameter_jac, the derivatives of the rates by
+            its rate constants, and sensitivity_parameters, the derivatives
+            of the rate constants by its parameters, see chain. For a block
+            of states of shape (n_species, m), jac and parameter_jac give
+            shapes (n_species, n_species, m) and (n_species, n_constants, m).
+        parameters : Iterable[Hashable]
+            The parameters, with keys as in sweep.grid_point, e.g.
+            ('rates', 0) or ('init_conc', 1).
+        """
+        self.model = model
+        self.parameters = list(parameters)
+        y0 = np.asarray(model.init_conc, dtype=float)
+        self.n = len(y0)
+
+        initial = np.zeros((len(self.parameters), self.n))
+        for j, key in enumerate(self.parameters):
+            if is_initial(key):
+                initial[j, key[1]] = 1
+        n_constants = np.shape(model.parameter_jac(0.0, y0))[1]
+        self.chain = chain(self.parameters, model.sensitivity_parameters(), n_constants)
+        self.y0 = np.concatenate([y0, initial.ravel()])
+
+    def rhs(self, t: float, z: np.ndarray) -> np.ndarray:
+        """
+        The derivatives of the extended state. z may also be a block of
+        shape (n, m), which is evaluated in one pass.
+        """
+        z = np.asarray(z, dtype=float)
+        model = self.model
+        if z.ndim == 2:
+            y = z[:self.n]
+            S = z[self.n:].reshape(-1, self.n, z.shape[1])
+            dS = (np.einsum('ikm,jkm->jim', model.jac(t, y), S)
+                  + np.einsum('icm,cj->jim', model.parameter_jac(t, y), self.chain))
+            return np.concatenate([model.rhs(t, y), dS.reshape(-1, z.shape[1])])
+        y = z[:self.n]
+        S = z[self.n:].reshape(-1, self.n).T
+        dS = model.jac(t, y) @ S + model.parameter_jac(t, y) @ self.chain
+        return np.concatenate([model.rhs(t, y), dS.T.ravel()])
+
+    def jac(self, t: float, z: np.ndarray) -> bsr_matrix:
+        """
+        The block diagonal Jacobian of the extended state, see Sensitivities,
+        as a sparse matrix holding the Jacobian of the model once per block.
+        """
+        J = self.model.jac(t, np.asarray(z, dtype=float)[:self.n])
+        blocks = len(self.parameters) + 1
+        return bsr_matrix((np.broadcast_to(J, (blocks, self.n, self.n)), np.arange(blocks), np.arange(blocks + 1)),
+                          shape=(blocks*self.n, blocks*self.n))
+
+    def dense_jac(self, t: float, z: np.ndarray) -> np.ndarray:
+        """
+        The Jacobian of jac as a dense array.
+        """
+        return self.jac(t, z).toarray()
+
+    def jacobian(self, method: str):
+        """
+        The Jacobian to give solve_ivp for method. BDF and Radau factorize
+        the sparse one, LSODA only takes dense Jacobians.
+        """
+        return self.dense_jac if method == 'LSODA' else self.jac
+
+    def split(self, sol) -> None:
+        """
+        Splits the extended state of a solution of solve_ivp back up. sol.y
+        and a DenseSolution in sol.sol keep the species only, the events
+        their species too, and sol.sensitivities gets dy/dtheta, of shape
+        (n_species, n_parameters, n_times).
+        """
+        n = self.n
+        sol.sensitivities = sol.y[n:].reshape(len(self.parameters), n, -1).transpose(1, 0, 2)
+        sol.y = sol.y[:n]
+        if getattr(sol, 'y_events', None) is not None:
+            sol.y_events = [np.asarray(y)[:, :n] for y in sol.y_events]
+        if isinstance(getattr(sol, 'sol', None), DenseSolution):
+            sol.sol = DenseSolution(sol.sol.t, sol.sol.y[:n], sol.sol.dy[:n])
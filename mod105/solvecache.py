@@ -0,0 +1,449 @@
+"""
+A two-tier cache of model solutions. Solutions are looked up in an
+in-memory LRU cache first and in a persistent on-disk store second, keyed
+on a hash of the model class, its parameters and the solver options, so
+the same system is never integrated twice. Only the memory tier is on by
+default, the disk tier is switched on with use_disk.
+"""
+import functools
+import hashlib
+import importlib
+import inspect
+import os
+import sys
+import numpy as np
+import scipy
+from collections import OrderedDict
+from .densesolution import DenseSolution
+from scipy.optimize import OptimizeResult
+from .solvestats import SolveStats
+from typing import Any, Callable
+
+
+def cache_dir() -> str:
+    """
+    Returns the root directory of the on-disk caches. It can be moved
+    with the MOD105_CACHE environment variable.
+    """
+    default = os.path.join(os.path.expanduser('~'), '.cache', 'mod105')
+    return os.environ.get('MOD105_CACHE', default)
+
+
+class SolutionCache:
+    def __init__(self,
+                 memory_items: int = 256,
+                 memory_bytes: int = 256 * 2**20,
+                 disk_bytes: int = 0,
+                 directory: str = None,
+                 ) -> None:
+        """
+        An in-memory LRU cache backed by an on-disk store of .npz files.
+
+        Parameters
+        ----------
+        memory_items : int
+            Maximum number of solutions kept in memory.
+        memory_bytes : int
+            Maximum total size of the solutions kept in memory.
+        disk_bytes : int
+            Maximum total size of the on-disk store. 0, the default, keeps
+            the cache in memory only.
+        directory : str, optional
+            Location of the on-disk store, by default solutions/ in the
+            cache directory.
+        """
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.directory = directory or os.path.join(cache_dir(), 'solutions')
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        # The size of the on-disk store as far as this process knows, None
+        # until the directory is first scanned. Other processes write into
+        # the same store, so it is rescanned before anything is evicted.
+        self._disk_size = None
+
+    def get(self, key: str) -> Any:
+        """
+        Returns a fresh copy of the cached solution, or None on a miss.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return _unpack(self._memory[key])
+
+        if self.disk_bytes <= 0:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                payload = {name: data[name] for name in data.files}
+            # Mark the file as recently used for the eviction.
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, payload)
+        return _unpack(payload)
+
+    def put(self, key: str, result: Any) -> None:
+        """
+        Stores a solution in both tiers.
+        """
+        payload = _pack(result)
+        if payload is None:
+            return
+        self._remember(key, payload)
+
+        if self.disk_bytes <= 0:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first, so that concurrent readers,
+            # e.g. other workers of a sweep, never see a partial file.
+            temporary = f'{path}.{os.getpid()}.tmp.npz'
+            np.savez(temporary, **payload)
+            size = os.path.getsize(temporary)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temporary, path)
+        except OSError:
+            return
+        if self._disk_size is None:
+            self._disk_size = self._scan()[1]
+        else:
+            self._disk_size += size - replaced
+        if self._disk_size > self.disk_bytes:
+            self._evict_disk()
+
+    def invalidate(self, model: type = None) -> None:
+        """
+        Drops the cached solutions of a model class, or of every model if
+        no class is given. Editing the source file of a model already
+        changes its keys, so this is only needed to reclaim the space or
+        when the equations change in a way the source does not show.
+        """
+        prefix = None if model is None else f'{model.__name__}-'
+        for key in list(self._memory):
+            if prefix is None or key.startswith(prefix):
+                self._memory_size -= _payload_size(self._memory.pop(key))
+
+        for name in self._files():
+            if prefix is None or name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        self._disk_size = None
+
+    def clear(self) -> None:
+        """
+        Drops every cached solution.
+        """
+        self.invalidate()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def _files(self) -> list:
+        try:
+            return [name for name in os.listdir(self.directory)
+                    if name.endswith('.npz') and '.tmp' not in name]
+        except OSError:
+            return []
+
+    def _remember(self, key: str, payload: dict) -> None:
+        """
+        Puts a payload into the memory tier, evicting the least recently
+        used entries beyond the limits.
+        """
+        size = _payload_size(payload)
+        if size > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= _payload_size(self._memory.pop(key))
+        self._memory[key] = payload
+        self._memory_size += size
+        while len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_size -= _payload_size(old)
+
+    def _scan(self) -> tuple:
+        """
+        The (mtime, size, name) of every file in the store and their total size.
+        """
+        entries = []
+        for name in self._files():
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        return entries, sum(size for _, size, _ in entries)
+
+    def _evict_disk(self) -> None:
+        """
+        Removes the least recently used files until the store is a tenth
+        below its limit, so that the next puts do not scan it again at once.
+        """
+        entries, total = self._scan()
+        for _, size, name in sorted(entries):
+            if total <= 0.9 * self.disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+        self._disk_size = total
+
+
+# The cache used by the solve methods of the models.
+default_cache = SolutionCache()
+
+# Whether solve uses the cache when it is not told explicitly.
+enabled = True
+
+# The modules every solve runs through besides those of the model class,
+# whose sources enter equations_version.
+SOLVER_MODULES = ('continuation', 'densesolution', 'reactionnetwork', 'sensitivity', 'solvecache', 'solvestats')
+
+
+def use_disk(disk_bytes: int = 2 * 2**30, directory: str = None) -> None:
+    """
+    Switches on the on-disk tier of the default cache, so that solutions
+    outlive the process, e.g. across reruns of a sweep. Solutions are
+    written as .npz files into directory, by default solutions/ in the
+    cache directory. 0 switches it off again.
+    """
+    default_cache.disk_bytes = disk_bytes
+    default_cache.directory = directory or os.path.join(cache_dir(), 'solutions')
+    default_cache._disk_size = None
+
+
+def cached(method: Callable) -> Callable:
+    """
+    Decorator making a solve method of a model look up its result in the
+    default cache before integrating.
+
+    The decorated method takes an extra cache argument. cache=False skips
+    the cache, cache=True forces it and None follows the module setting
+    enabled. Calls with callable options, such as a custom jac, with the
+    dense_output of solve_ivp or with a warm_start are never cached. The
+    compact dense solutions of solve(dense=True) are.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, cache: bool = None, **options):
+        use = enabled if cache is None else cache
+        if use and not _uncacheable(args, options):
+            # Key on the complete set of arguments.
+            arguments = _arguments(signature, self, *args, **options)
+            key = solution_key(self, method.__name__, **arguments)
+            result = default_cache.get(key)
+            if result is None:
+                result = method(self, *args, **options)
+                if getattr(result, 'success', True):
+                    default_cache.put(key, result)
+            return result
+        return method(self, *args, **options)
+    return wrapper
+
+
+def _arguments(signature: inspect.Signature, self: Any, *args, **options) -> dict:
+    """
+    The arguments of a call to a method with the given signature, by
+    name and with the defaults filled in, the extra keyword arguments
+    merged in and self left out, so that positional, keyword and default
+    arguments give the same dict.
+    """
+    bound = signature.bind(self, *args, **options)
+    bound.apply_defaults()
+    arguments = {}
+    for name, value in list(bound.arguments.items())[1:]:
+        if signature.parameters[name].kind is inspect.Parameter.VAR_KEYWORD:
+            arguments.update(value)
+        else:
+            arguments[name] = value
+    return arguments
+
+
+def _name_variant(cls: type, name: str, label: str) -> None:
+    """
+    Names a class built by one of the reductions, like the models
+    returned by conservation.conserved, after its base model and the
+    choices it was built with.
+    """
+    cls.__name__ = name
+    # The label enters the identity of the class, and so the keys of the
+    # solution cache.
+    cls.__qualname__ = f'{name}[{label}]'
+
+
+def solution_key(model: Any, name: str, **arguments) -> str:
+    """
+    The cache key of a solve call: a hash of the model class and the
+    source of its module, of every public attribute of the model (initial
+    concentrations, rates, time grid, ...) and of the solver options.
+    """
+    h = hashlib.sha256()
+    h.update(equations_version(type(model)).encode())
+    h.update(name.encode())
+    _feed(h, {key: value for key, value in vars(model).items() if not key.startswith('_')})
+    _feed(h, arguments)
+    return f'{type(model).__name__}-{h.hexdigest()[:32]}'
+
+
+@functools.lru_cache(maxsize=None)
+def equations_version(model: type) -> str:
+    """
+    A hash of the model class, of the source files defining it and its
+    base classes, of the shared modules every solve runs through and of
+    the versions of NumPy and SciPy, so that editing the equations or the
+    solver code invalidates old entries.
+    """
+    h = hashlib.sha256()
+    h.update(f'numpy {np.__version__} scipy {scipy.__version__}'.encode())
+    for name in SOLVER_MODULES:
+        h.update(inspect.getsource(importlib.import_module(f'{__package__}.{name}')).encode())
+    for cls in model.__mro__:
+        if cls is object:
+            continue
+        h.update(f'{cls.__module__}.{cls.__qualname__}'.encode())
+        try:
+            h.update(inspect.getsource(sys.modules[cls.__module__]).encode())
+        except (OSError, TypeError, KeyError):
+            pass
+        network = cls.__dict__.get('network')
+        if network is not None:
+            h.update(network.key.encode())
+    return h.hexdigest()
+
+
+def _uncacheable(args: tuple, options: dict) -> bool:
+    # A warm start changes the steps, and records them as the solve goes.
+    if options.get('dense_output') or options.get('warm_start') is not None:
+        return True
+    return _has_callable(args) or _has_callable(options)
+
+
+def _has_callable(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(_has_callable(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_callable(item) for item in value)
+    return callable(value)
+
+
+def _feed(h, value: Any) -> None:
+    """
+    Feeds a value into a hash in a canonical form.
+    """
+    if isinstance(value, dict):
+        h.update(b'{')
+        for key in sorted(value, key=repr):
+            h.update(repr(key).encode())
+            _feed(h, value[key])
+        h.update(b'}')
+    elif isinstance(value, (np.ndarray, list, tuple)):
+        try:
+            array = np.asarray(value)
+        except ValueError:
+            array = None
+        if array is None or array.dtype == object:
+            h.update(b'[')
+            for item in value:
+                _feed(h, item)
+            h.update(b']')
+        else:
+            h.update(f'{array.dtype.str}{array.shape}'.encode())
+            h.update(np.ascontiguousarray(array).tobytes())
+    else:
+        h.update(repr(value).encode())
+
+
+def _pack(result: Any) -> dict:
+    """
+    Turns a solution into a flat dict of arrays for storage, or returns
+    None for results the cache does not know how to store.
+    """
+    if isinstance(result, OptimizeResult):
+        if result.get('sol') is not None and not isinstance(result['sol'], DenseSolution):
+            return None
+        payload = {'kind': np.array('OdeResult')}
+        # Every array is copied, so that a caller modifying the returned
+        # solution in place does not change the cached one. Fields that
+        # are None, e.g. sol without dense output, are marked as such, so
+        # a hit has the same fields as the solve.
+        for name, value in result.items():
+            if value is None:
+                payload[f'none_{name}'] = np.array(True)
+                continue
+            if name in ('t_events', 'y_events'):
+                payload[f'count_{name}'] = np.array(len(value))
+                for i, item in enumerate(value):
+                    payload[f'{name}_{i}'] = np.array(item)
+                continue
+            if name == 'sol' and isinstance(value, DenseSolution):
+                payload.update(_pack_dense(value))
+                continue
+            if name == 'stats' and isinstance(value, SolveStats):
+                payload.update({f'stats_{key}': np.array(item) for key, item in value.as_dict().items()
+                                if item is not None and key != 'cached'})
+                continue
+            payload[f'field_{name}'] = np.array(value)
+        return payload
+    if isinstance(result, DenseSolution):
+        return {'kind': np.array('DenseSolution'), **_pack_dense(result)}
+    if isinstance(result, np.ndarray):
+        return {'kind': np.array('ndarray'), 'item_0': result.copy()}
+    if isinstance(result, (list, tuple)) and all(isinstance(item, np.ndarray) for item in result):
+        payload = {'kind': np.array('list')}
+        for i, item in enumerate(result):
+            payload[f'item_{i}'] = item.copy()
+        return payload
+    return None
+
+
+def _unpack(payload: dict) -> Any:
+    """
+    Rebuilds a solution from its stored form, copying every array so the
+    caller can modify it freely.
+    """
+    kind = str(payload['kind'])
+    if kind == 'OdeResult':
+        result = OptimizeResult()
+        for name, value in payload.items():
+            if name.startswith('none_'):
+                result[name[len('none_'):]] = None
+            elif name.startswith('field_'):
+                value = np.array(value)
+                result[name[len('field_'):]] = value.item() if value.ndim == 0 else value
+        for name in ('t_events', 'y_events'):
+            if f'count_{name}' in payload:
+                count = int(payload[f'count_{name}'])
+                result[name] = [np.array(payload[f'{name}_{i}']) for i in range(count)]
+        if 'dense_t' in payload:
+            result['sol'] = _unpack_dense(payload)
+        if 'stats_method' in payload:
+            stats = {name[len('stats_'):]: np.array(value).item()
+                     for name, value in payload.items() if name.startswith('stats_')}
+            result['stats'] = SolveStats(**stats, cached=True)
+        return result
+    if kind == 'DenseSolution':
+        return _unpack_dense(payload)
+    items = [np.array(payload[f'item_{i}']) for i in range(len(payload) - 1)]
+    return items[0] if kind == 'ndarray' else items
+
+
+def _pack_dense(dense: DenseSolution) -> dict:
+    return {'dense_t': np.array(dense.t), 'dense_y': np.array(dense.y), 'dense_dy': np.array(dense.dy)}
+
+
+def _unpack_dense(payload: dict) -> DenseSolution:
+    return DenseSolution(np.array(payload['dense_t']), np.array(payload['dense_y']),
+                         np.array(payload['dense_dy']))
+
+
+def _payload_size(payload: dict) -> int:
+    return sum(value.nbytes for value in payload.values())
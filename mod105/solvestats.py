@@ -0,0 +1,169 @@
+"""
+Statistics of model solves. Every integration records what it cost and
+how it ended in a SolveStats record, attached to its result as
+result.stats, so that sweeps can show where the compute budget goes.
+"""
+import time
+import numpy as np
+from scipy.integrate import BDF, DOP853, LSODA, RK23, RK45, Radau, solve_ivp as _solve_ivp
+from scipy.optimize import OptimizeResult
+from typing import Any, Callable
+from .continuation import WarmStart
+
+# The methods of solve_ivp by name.
+METHODS = {'RK23': RK23, 'RK45': RK45, 'DOP853': DOP853, 'Radau': Radau, 'BDF': BDF, 'LSODA': LSODA}
+
+# Methods of solve_ivp that make use of the Jacobian.
+STIFF_METHODS = ('BDF', 'Radau', 'LSODA')
+
+# The explicit Runge-Kutta methods, which evaluate all of their stages on
+# every attempted step, so that their rejected steps can be counted.
+EXPLICIT = (RK23, RK45, DOP853)
+
+
+class SolveStats:
+    # The numeric fields, as kept per point by sweeps.
+    FIELDS = ('wall_time', 'nfev', 'njev', 'nlu', 'steps', 'rejected', 'status')
+
+    def __init__(self,
+                 method: str,
+                 wall_time: float,
+                 nfev: int = 0,
+                 njev: int = 0,
+                 nlu: int = 0,
+                 steps: int = None,
+                 rejected: int = None,
+                 status: int = 0,
+                 message: str = '',
+                 cached: bool = False,
+                 ) -> None:
+        """
+        The cost and outcome of a single solve.
+
+        Parameters
+        ----------
+        method : str
+            The integration method, or e.g. 'exact' for a closed form.
+        wall_time : float
+            Wall time of the solve in seconds.
+        nfev, njev, nlu : int
+            Number of right-hand side and Jacobian evaluations and of LU
+            decompositions.
+        steps : int, optional
+            Number of accepted steps.
+        rejected : int, optional
+            Number of rejected steps. Only the explicit Runge-Kutta
+            methods tell, it is None for the others.
+        status : int
+            Status of solve_ivp: 0 reached the end, 1 stopped at a
+            terminal event and -1 failed.
+        message : str
+            The message of the solver.
+        cached : bool
+            True if the result came from the solution cache, the costs are
+            then those of the original solve.
+        """
+        self.method = method
+        self.wall_time = wall_time
+        self.nfev = nfev
+        self.njev = njev
+        self.nlu = nlu
+        self.steps = steps
+        self.rejected = rejected
+        self.status = status
+        self.message = message
+        self.cached = cached
+
+    @property
+    def success(self) -> bool:
+        return self.status >= 0
+
+    @classmethod
+    def from_result(cls, result: Any, method: str, wall_time: float, **fields) -> 'SolveStats':
+        """
+        Reads the counts and status of a solve_ivp result.
+        """
+        status = getattr(result, 'status', 0)
+        return cls(method, wall_time,
+                   nfev=int(getattr(result, 'nfev', 0)),
+                   njev=int(getattr(result, 'njev', 0)),
+                   nlu=int(getattr(result, 'nlu', 0)),
+                   status=int(status),
+                   message=str(getattr(result, 'message', '')),
+                   **fields)
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+    def values(self) -> tuple:
+        """
+        The numeric fields, unknown ones as NaN.
+        """
+        return tuple(np.nan if getattr(self, name) is None else float(getattr(self, name))
+                     for name in self.FIELDS)
+
+    def __repr__(self) -> str:
+        steps = '' if self.steps is None else f", steps={self.steps}"
+        rejected = '' if self.rejected is None else f", rejected={self.rejected}"
+        cached = ', cached' if self.cached else ''
+        return (f"SolveStats({self.method}, {self.wall_time*1e3:.3f} ms, nfev={self.nfev}, "
+                f"njev={self.njev}, nlu={self.nlu}{steps}{rejected}, status={self.status}{cached})")
+
+
+def select_method(method: str | None, stiff: bool, nonstiff: str = 'RK45') -> str:
+    """
+    Picks the solve_ivp method from the method and stiff arguments of the
+    solve method of a model: the given method, else BDF if stiff, else the
+    nonstiff default of the model.
+    """
+    if method is not None:
+        return method
+    return 'BDF' if stiff else nonstiff
+
+
+def solve_ivp(fun: Callable, t_span, y0, method: str = 'RK45', warm_start: WarmStart = None,
+              **options) -> OptimizeResult:
+    """
+    scipy.integrate.solve_ivp, which also counts the accepted and rejected
+    steps and attaches the SolveStats of the solve to the result.
+
+    A warm_start records the steps of the solve and starts it from those
+    of the solve at a neighbouring parameter value, see continuation.
+
+    The right-hand sides of the models are passed without an output array:
+    solve_ivp keeps references to the derivatives it is given, so every
+    call has to return its own.
+    """
+    name = method if isinstance(method, str) else method.__name__
+    solver = METHODS.get(method, method) if isinstance(method, str) else method
+    counts = {'steps': 0, 'rejected': 0 if issubclass(solver, EXPLICIT) else None}
+    if warm_start is not None:
+        solver, options = warm_start.prepare(solver, options)
+
+    start = time.perf_counter()
+    result = _solve_ivp(fun, t_span, y0, method=_counting(solver, counts), **options)
+    result.stats = SolveStats.from_result(result, name, time.perf_counter() - start, **counts)
+    if warm_start is not None:
+        warm_start.finish()
+    return result
+
+
+def _counting(solver: type, counts: dict) -> type:
+    """
+    A subclass of the solver class that counts its steps into counts.
+    """
+    class Counting(solver):
+        def step(self):
+            nfev = self.nfev
+            message = super().step()
+            if self.status != 'failed':
+                counts['steps'] += 1
+            if counts['rejected'] is not None:
+                # Every attempt of an explicit Runge-Kutta step evaluates
+                # all of its stages, the last attempt is the accepted one.
+                attempts = (self.nfev - nfev) // self.n_stages
+                counts['rejected'] += attempts - (self.status != 'failed')
+            return message
+
+    Counting.__name__ = Counting.__qualname__ = solver.__name__
+    return Counting
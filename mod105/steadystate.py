@@ -0,0 +1,273 @@
+"""
+Steady states of reaction networks. The fixed points of the rate equations
+are found directly, by Newton's method on the rate equations together with
+the conservation laws of the network, so the long time limit costs one
+nonlinear solve instead of a long integration. Where Newton's method does
+not converge, pseudo-transient continuation takes over.
+"""
+import time
+import numpy as np
+from scipy.optimize import OptimizeResult
+from .conservation import Invariants
+from .solvestats import SolveStats
+
+
+def steady_state(model,
+                 k: np.ndarray,
+                 guess: np.ndarray = None,
+                 tol: float = 1e-10,
+                 max_iter: int = 50,
+                 ptc: bool = True,
+                 max_steps: int = 1000,
+                 ) -> OptimizeResult:
+    """
+    Finds the fixed points of a reaction network with the conservation laws
+    of the initial concentrations, for a whole batch of systems at once.
+
+    The equations solved are f(y) = 0 for the rate equations f of the
+    species left after eliminating the conservation laws, see
+    conservation.Invariants, which fix the others, and L (y - y0) = 0 for
+    the laws L, with their exact Jacobian. Newton steps are
+    damped by a backtracking line search and kept from crossing into
+    negative concentrations. Members where Newton's method fails are
+    restarted from the guess with pseudo-transient continuation, implicit
+    Euler steps whose step size grows as the residual falls, until they
+    become Newton steps.
+
+    Parameters
+    ----------
+    model
+        The model instance, with its ReactionNetwork in network and the
+        initial concentrations in init_conc, of shape (n_species,) or
+        (n_species, ...) for a batch.
+    k : np.ndarray
+        Rate constants in the order of network.parameters, of shape
+        (n_parameters,) or (n_parameters, ...). The batch shapes of
+        init_conc and k broadcast.
+    guess : np.ndarray, optional
+        Starting point of the iteration, by default y0.
+    tol : float
+        Convergence tolerance of the steps, relative to 1 + |y|.
+    max_iter : int
+        Maximum number of Newton iterations.
+    ptc : bool
+        Whether to fall back to pseudo-transient continuation.
+    max_steps : int
+        Maximum number of pseudo-transient continuation steps.
+
+    Returns
+    -------
+    OptimizeResult
+        x holds the steady states, of the shape of the broadcast y0.
+        success, nit, ptc (whether the fallback was used) and residual,
+        the largest rate of change left, are given per member. stats is
+        the SolveStats of the whole batch.
+    """
+    start = time.perf_counter()
+    network = model.network
+    y0 = np.asarray(model.init_conc, dtype=float)
+    k = np.asarray(k, dtype=float)
+    n = len(network.species)
+    batch = np.broadcast_shapes(y0.shape[1:], k.shape[1:])
+    if guess is None:
+        guess = y0
+    guess = np.asarray(guess, dtype=float)
+    batch = np.broadcast_shapes(batch, guess.shape[1:])
+
+    m = int(np.prod(batch))
+    y0 = _columns(y0, batch)
+    k = _columns(k, batch)
+    guess = _columns(guess, batch)
+    y = guess.copy()
+
+    system = _System(network, Invariants(model), y0, k)
+
+    converged = np.zeros(m, dtype=bool)
+    iterations = np.zeros(m, dtype=int)
+    active = np.arange(m)
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        y_new, done, failed = _newton_step(system, y[:, active], active, tol)
+        y[:, active] = y_new
+        iterations[active] += 1
+        converged[active[done]] = True
+        active = active[~(done | failed)]
+
+    used_ptc = np.zeros(m, dtype=bool)
+    if ptc and not converged.all():
+        restart = np.flatnonzero(~converged)
+        used_ptc[restart] = True
+        y[:, restart], ok, steps = _continuation(system, guess[:, restart], restart, tol, max_steps)
+        converged[restart] = ok
+        iterations[restart] += steps
+
+    residual = np.max(np.abs(network.rhs(0, y, k)), axis=0)
+    system.nfev += 1
+    message = ("All members converged." if converged.all()
+               else f"{np.sum(~converged)} of {m} members did not converge.")
+    stats = SolveStats('newton', time.perf_counter() - start, nfev=system.nfev, njev=system.njev,
+                       nlu=system.nlu, steps=int(iterations.sum()), status=0 if converged.all() else -1,
+                       message=message)
+    return OptimizeResult(x=y.reshape((n,) + batch), success=converged.reshape(batch)[()],
+                          nit=iterations.reshape(batch)[()], ptc=used_ptc.reshape(batch)[()],
+                          residual=residual.reshape(batch)[()], message=message, stats=stats)
+
+
+def _columns(a: np.ndarray, batch: tuple) -> np.ndarray:
+    """
+    Broadcasts an array of shape (rows,) or (rows, ...) over the batch,
+    returning one column per member.
+    """
+    a = a.reshape(a.shape + (1,) * (len(batch) + 1 - a.ndim))
+    return np.broadcast_to(a, a.shape[:1] + batch).reshape(len(a), -1)
+
+
+class _System:
+    def __init__(self, network, invariants: Invariants, y0: np.ndarray, k: np.ndarray) -> None:
+        """
+        The rate equations and conservation laws of a batch of systems,
+        counting the evaluations.
+        """
+        self.network = network
+        self.independent = invariants.independent
+        self.laws = invariants.laws
+        self.y0 = y0
+        self.k = k
+        self.nfev = self.njev = self.nlu = 0
+
+    def rhs(self, y: np.ndarray, members: np.ndarray) -> np.ndarray:
+        self.nfev += 1
+        return self.network.rhs(0, y, self.k[:, members])
+
+    def jac(self, y: np.ndarray, members: np.ndarray) -> np.ndarray:
+        self.njev += 1
+        return self.network.jac(0, y, self.k[:, members])
+
+    def residual(self, y: np.ndarray, f: np.ndarray, members: np.ndarray) -> np.ndarray:
+        """
+        The rate equations of the independent species stacked on the
+        conservation laws.
+        """
+        return np.concatenate([f[self.independent], self.laws @ (y - self.y0[:, members])])
+
+    def matrix(self, J: np.ndarray, shift: np.ndarray = None) -> np.ndarray:
+        """
+        The Jacobian of the residual, of shape (m, n, n), or with a shift
+        that of the pseudo-transient step with I/dt - J.
+        """
+        J = np.moveaxis(J, -1, 0)
+        if shift is not None:
+            J = J - np.eye(J.shape[-1]) * shift[:, None, None]
+        top = J[:, self.independent]
+        bottom = np.broadcast_to(self.laws, (len(J),) + self.laws.shape)
+        return np.concatenate([top, bottom], axis=1)
+
+    def solve(self, A: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """
+        Solves the batch of linear systems A x = b with b of shape (n, m),
+        falling back to least squares for singular members.
+        """
+        self.nlu += 1
+        try:
+            return np.linalg.solve(A, b.T[..., None])[..., 0].T
+        except np.linalg.LinAlgError:
+            return (np.linalg.pinv(A) @ b.T[..., None])[..., 0].T
+
+
+def _newton_step(system: _System, y: np.ndarray, members: np.ndarray, tol: float) -> tuple:
+    """
+    One damped Newton step of every member. Returns the new states and the
+    masks of the members that converged and that failed.
+    """
+    f = system.rhs(y, members)
+    G = system.residual(y, f, members)
+    delta = system.solve(system.matrix(system.jac(y, members)), -G)
+    alpha = _boundary(y, delta, tol)
+
+    # Backtrack until the residual falls.
+    norm = np.linalg.norm(G, axis=0)
+    accepted = np.zeros(y.shape[1], dtype=bool)
+    y_new = y.copy()
+    for _ in range(10):
+        trial = np.maximum(y + alpha * delta, 0)
+        with np.errstate(over='ignore', invalid='ignore'):
+            trial_norm = np.linalg.norm(system.residual(trial, system.rhs(trial, members), members), axis=0)
+        good = ~accepted & (trial_norm <= (1 - 1e-4 * alpha) * norm)
+        y_new[:, good] = trial[:, good]
+        accepted |= good
+        if accepted.all():
+            break
+        alpha = np.where(accepted, alpha, alpha / 2)
+
+    # Converged once the full Newton step barely moves, even if it was cut
+    # short at the boundary, where many steady states lie.
+    # The line search may fail there, as the residual is down to roundoff.
+    small = np.all(np.abs(delta) <= tol * (1 + np.abs(y_new)), axis=0)
+    done = (norm == 0) | small
+    failed = ~done & (~accepted | ~np.all(np.isfinite(delta), axis=0))
+    return y_new, done, failed
+
+
+def _continuation(system: _System, y: np.ndarray, members: np.ndarray, tol: float, max_steps: int) -> tuple:
+    """
+    Pseudo-transient continuation of the given members. Returns their
+    states, whether they converged and the number of steps taken.
+    """
+    m = y.shape[1]
+    J = system.jac(y, members)
+    # Start with steps well below the fastest time scale.
+    scale = np.max(np.sum(np.abs(J), axis=1), axis=0)
+    dt = 0.1 / np.where(scale > 0, scale, 1.0)
+
+    converged = np.zeros(m, dtype=bool)
+    steps = np.zeros(m, dtype=int)
+    active = np.arange(m)
+    norm = np.max(np.abs(system.rhs(y, members)), axis=0)
+    for _ in range(max_steps):
+        if not active.size:
+            break
+        ya, ma = y[:, active], members[active]
+        Ja = system.jac(ya, ma)
+        G = system.residual(ya, system.rhs(ya, ma), ma)
+        # Implicit Euler step of the rates of the independent species,
+        # (I/dt - J) delta = f, while keeping to the conservation laws.
+        delta = system.solve(system.matrix(Ja, 1 / dt[active]), -G)
+        alpha = _boundary(ya, delta, tol)
+        steps[active] += 1
+
+        trial = np.maximum(ya + alpha * delta, 0)
+        ok = np.all(np.isfinite(trial), axis=0)
+        with np.errstate(over='ignore', invalid='ignore'):
+            new_norm = np.max(np.abs(system.rhs(trial, ma)), axis=0)
+        # Switched evolution relaxation: grow the step as the residual falls,
+        # but at least twofold while it does not rise much, so slow
+        # transients, in which the rates first build up, are crossed in a
+        # few dozen steps. Only a sharp rise cuts the step.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(new_norm == 0, 10, norm[active] / new_norm)
+        growth = np.where(ratio >= 0.5, np.clip(ratio, 2, 10), np.maximum(ratio, 0.25))
+
+        y[:, active[ok]] = trial[:, ok]
+        norm[active[ok]] = new_norm[ok]
+        dt[active] = np.where(ok, dt[active] * growth, dt[active] / 4)
+
+        # Converged once the steps are Newton steps that barely move.
+        small = np.all(np.abs(delta) <= tol * (1 + np.abs(trial)), axis=0)
+        newton_like = dt[active] * np.max(np.sum(np.abs(Ja), axis=1), axis=0) >= 1e6
+        done = ok & small & (newton_like | (new_norm == 0))
+        converged[active[done]] = True
+        active = active[~done]
+    return y, converged, steps
+
+
+def _boundary(y: np.ndarray, delta: np.ndarray, tol: float) -> np.ndarray:
+    """
+    The fraction of every step that stops short of the boundary, so that
+    positive concentrations stay positive. Concentrations that are already
+    negligible do not hold the step back, they are clipped at zero.
+    """
+    positive = y > tol * (1 + np.abs(y).max(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        limit = np.where((delta < 0) & positive, -0.99 * y / delta, np.inf)
+    return np.minimum(1.0, limit.min(axis=0))
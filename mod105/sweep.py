@@ -0,0 +1,974 @@
+"""
+Parameter sweeps over any of the reaction models. Every point of the
+parameter grid is solved and reduced to the quantity of interest in a
+pool of worker processes, and the results are gathered back in grid order,
+together with what every point cost to solve, or streamed point by point
+as they finish.
+"""
+import itertools
+import math
+import multiprocessing
+import os
+import time
+import traceback
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Any, Callable, Hashable, Iterator, Mapping, Sequence
+from . import solvecache
+from .continuation import WarmStart
+from .solvestats import SolveStats
+from .sweepstore import SweepStore
+
+# The per point solve statistics of a sweep, see SweepResult.stats.
+STATS_DTYPE = np.dtype([(name, float) for name in SolveStats.FIELDS] + [('cached', bool)])
+
+
+class SweepResult:
+    def __init__(self,
+                 axes: Mapping[Hashable, np.ndarray],
+                 values: np.ndarray,
+                 errors: Mapping[int, str],
+                 breakdowns: Mapping[int, str] = None,
+                 stats: np.ndarray = None,
+                 elapsed: float = None,
+                 ) -> None:
+        """
+        The reduced results of a parameter sweep.
+
+        Parameters
+        ----------
+        axes : Mapping[Hashable, np.ndarray]
+            The swept parameters and their values, in grid order.
+        values : np.ndarray
+            The reduced value of every point, with shape grid shape + the
+            shape of a single reduced value. Failed points are NaN.
+        errors : Mapping[int, str]
+            Error messages of the failed points, by flat grid index.
+        breakdowns : Mapping[int, str], optional
+            Points of a continuation sweep where the warm start did not
+            work, by flat grid index.
+        stats : np.ndarray, optional
+            What every point cost, a structured array over the grid with
+            the fields of STATS_DTYPE, so stats['nfev'] is a map of the
+            right-hand side evaluations. wall_time is the time the sweep
+            spent on the point, including the reducer. Unknown values,
+            e.g. of points solved in an earlier run into the same store,
+            are NaN.
+        elapsed : float, optional
+            Wall time of the whole sweep in seconds.
+        """
+        self.axes = dict(axes)
+        self.values = values
+        self.errors = dict(errors)
+        self.breakdowns = dict(breakdowns or {})
+        if stats is None:
+            stats = np.full(self.shape, np.nan, dtype=STATS_DTYPE)
+            stats['cached'] = False
+        self.stats = stats
+        self.elapsed = elapsed
+
+    @property
+    def shape(self) -> tuple:
+        """
+        The shape of the parameter grid.
+        """
+        return tuple(len(values) for values in self.axes.values())
+
+    @property
+    def failed(self) -> np.ndarray:
+        """
+        Boolean mask over the grid marking the points that failed.
+        """
+        mask = np.zeros(self.shape, dtype=bool)
+        mask.flat[list(self.errors)] = True
+        return mask
+
+    def summary(self) -> dict:
+        """
+        Totals of the solve statistics: the number of solved, failed and
+        cached points, the summed costs, the throughput and the most
+        expensive point. Cached points only add their wall time, their
+        solves were paid for before.
+        """
+        stats = self.stats.ravel()
+        solved = ~np.isnan(stats['wall_time'])
+        summary = {'points': int(solved.sum()),
+                   'failed': len(self.errors),
+                   'cached': int(stats['cached'].sum()),
+                   'elapsed': self.elapsed,
+                   'wall_time': float(np.nansum(stats['wall_time']))}
+        for name in SolveStats.FIELDS[1:-1]:
+            values = stats[name][~stats['cached']]
+            # None where no solve told, e.g. rejected steps of BDF.
+            summary[name] = float(np.nansum(values)) if np.any(~np.isnan(values)) else None
+        summary['throughput'] = summary['points'] / self.elapsed if self.elapsed else None
+        summary['slowest'] = int(np.nanargmax(stats['wall_time'])) if solved.any() else None
+        return summary
+
+    def index(self, point: Mapping[Hashable, Any]) -> tuple:
+        """
+        The index into values of the grid values nearest to a point, a
+        partial one leaving the other axes whole, e.g. {('rates', 0): 2.0}.
+        """
+        unknown = [key for key in point if key not in self.axes]
+        if unknown:
+            raise ValueError(f"Unknown axes {unknown}, the sweep is over {list(self.axes)}.")
+        return tuple(int(np.argmin(np.abs(values - point[key]))) if key in point else slice(None)
+                     for key, values in self.axes.items())
+
+    def at(self, point: Mapping[Hashable, Any]) -> np.ndarray:
+        """
+        The values at the grid values nearest to a point, see index.
+        """
+        return self.values[self.index(point)]
+
+    def __repr__(self) -> str:
+        return f"SweepResult(shape={self.shape}, failed={len(self.errors)})"
+
+
+class SweepPoint:
+    def __init__(self, index: int, point: Mapping[Hashable, Any], value: Any, error: str = None,
+                 breakdown: str = None, stats: Mapping[str, float] = None) -> None:
+        """
+        The result of a single point of a streamed sweep, see stream.
+
+        Parameters
+        ----------
+        index : int
+            The flat grid index of the point.
+        point : Mapping[Hashable, Any]
+            The values of the swept parameters at the point.
+        value : Any
+            The reduced value, None if the point failed.
+        error : str, optional
+            The error message if the point failed.
+        breakdown : str, optional
+            Why the warm start of a continuation sweep did not work here.
+        stats : Mapping[str, float], optional
+            What the point cost, by the fields of STATS_DTYPE.
+        """
+        self.index = index
+        self.point = dict(point)
+        self.value = value
+        self.error = error
+        self.breakdown = breakdown
+        self.stats = dict(stats or {})
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def __repr__(self) -> str:
+        outcome = 'failed' if self.failed else 'ok'
+        return f"SweepPoint(index={self.index}, point={self.point}, {outcome})"
+
+
+class Trajectories:
+    def __init__(self, species: Any = None, every: int = 1) -> None:
+        """
+        A reducer keeping the time series of some species only, at every
+        every-th output time, so a sweep holds no more of the solutions
+        than is analysed. Unlike a lambda it pickles, for workers that are
+        not forked.
+
+        Parameters
+        ----------
+        species : int or Sequence[int], optional
+            The rows of the state to keep, by default all. A single index
+            gives a value of shape (n_times,), a sequence one of shape
+            (n_species, n_times).
+        every : int
+            Keep every every-th output time, starting at the first.
+        """
+        if every < 1:
+            raise ValueError("every must be a positive number of output times.")
+        self.species = species
+        self.every = every
+
+    def __call__(self, sol: Any) -> np.ndarray:
+        rows = slice(None) if self.species is None else self.species
+        return np.asarray(sol.y)[rows, ::self.every]
+
+    def __repr__(self) -> str:
+        return f"Trajectories(species={self.species!r}, every={self.every})"
+
+
+class Final(Trajectories):
+    def __init__(self, species: Any = None) -> None:
+        """
+        A reducer keeping the concentrations of some species at the last
+        output time only, see Trajectories.
+        """
+        super().__init__(species)
+
+    def __call__(self, sol: Any) -> np.ndarray:
+        rows = slice(None) if self.species is None else self.species
+        return np.asarray(sol.y)[rows, -1]
+
+    def __repr__(self) -> str:
+        return f"Final(species={self.species!r})"
+
+
+def grid_point(base: Mapping[str, Any], axes: Mapping[Hashable, np.ndarray], index: int) -> dict:
+    """
+    Returns the model arguments at the given flat index of the grid.
+
+    A key of axes is either the name of a model argument, which is then
+    replaced by the swept value, or a (name, index) tuple, which replaces
+    a single element of an array argument such as rates or init_conc.
+    """
+    shape = tuple(len(values) for values in axes.values())
+    position = np.unravel_index(index, shape)
+    return point_kwargs(base, {key: values[i] for (key, values), i in zip(axes.items(), position)})
+
+
+def point_kwargs(base: Mapping[str, Any], point: Mapping[Hashable, Any]) -> dict:
+    """
+    Returns the model arguments at a single parameter point, whose keys
+    are as in grid_point.
+    """
+    kwargs = dict(base)
+    copied = set()
+    for key, value in point.items():
+        if isinstance(key, tuple):
+            name, element = key
+            if name not in copied:
+                kwargs[name] = np.array(kwargs[name], dtype=float)
+                copied.add(name)
+            kwargs[name][element] = value
+        else:
+            kwargs[key] = value
+    return kwargs
+
+
+def solve_point(model: type, kwargs: Mapping[str, Any], reducer: Callable,
+                solve_options: Mapping[str, Any] = None) -> Any:
+    """
+    Builds the model at one grid point, solves it and applies the reducer.
+    Raises RuntimeError if the solver reports a failure.
+    """
+    return reducer(_solve(model, kwargs, solve_options))
+
+
+def _solve(model: type, kwargs: Mapping[str, Any], solve_options: Mapping[str, Any] = None) -> Any:
+    return _check(model(**kwargs).solve(**(solve_options or {})))
+
+
+def _check(sol: Any) -> Any:
+    if getattr(sol, 'success', True) is False:
+        raise RuntimeError(f"Solver failed: {sol.message}")
+    return sol
+
+
+def _point_stats(sol: Any, wall_time: float, failed: bool) -> tuple:
+    """
+    The STATS_DTYPE record of a point, from the SolveStats of its solution
+    where the model gives them.
+    """
+    stats = getattr(sol, 'stats', None)
+    if isinstance(stats, SolveStats):
+        return (wall_time,) + stats.values()[1:] + (stats.cached,)
+    counts = tuple(float(getattr(sol, name, np.nan)) for name in ('nfev', 'njev', 'nlu'))
+    status = -1.0 if failed else float(getattr(sol, 'status', np.nan))
+    return (wall_time,) + counts + (np.nan, np.nan, status, False)
+
+
+# The sweep set up in this worker process, see _init_worker.
+_task = None
+
+
+def _init_worker(model, base, axes, reducer, solve_options, continuation=None):
+    global _task
+    _task = (model, base, axes, reducer, solve_options, continuation)
+
+
+def _init_pool_worker(*initargs):
+    """
+    Sets up a worker process of the pool. Its memory tier of the solution
+    cache only lives as long as the sweep, whose points are all different,
+    so it is switched off unless the disk tier keeps the solutions for
+    later runs. Solves given cache=True still use it. The workers of a
+    shared pool get no initargs, their tasks come with every chunk.
+    """
+    if solvecache.default_cache.disk_bytes <= 0:
+        solvecache.enabled = False
+    if initargs:
+        _init_worker(*initargs)
+
+
+def _run_chunk(indices: Sequence[int]) -> list:
+    """
+    Solves a chunk of grid points, capturing the error of every failed
+    point instead of aborting the whole chunk. Returns (index, value,
+    error, breakdown, stats) tuples.
+    """
+    model, base, axes, reducer, solve_options, continuation = _task
+    if continuation is not None:
+        return _run_line(indices)
+    results = []
+    for index in indices:
+        start = time.perf_counter()
+        sol = None
+        try:
+            # A list of axes holds scattered points, see sweep_points.
+            if isinstance(axes, list):
+                kwargs = point_kwargs(base, axes[index])
+            else:
+                kwargs = grid_point(base, axes, index)
+            sol = model(**kwargs).solve(**(solve_options or {}))
+            value = reducer(_check(sol))
+            results.append((index, value, None, None, _point_stats(sol, time.perf_counter() - start, False)))
+        except Exception as e:
+            results.append((index, None, _message(e), None,
+                            _point_stats(sol, time.perf_counter() - start, True)))
+    return results
+
+
+def _run_points(task: tuple, start: int) -> list:
+    """
+    Solves a chunk of scattered points in a worker of a shared pool, see
+    worker_pool. The task holds the points of the chunk, the first of
+    which is point start of the whole list.
+    """
+    _init_worker(*task)
+    points = task[2]
+    return [(start + result[0],) + result[1:] for result in _run_chunk(range(len(points)))]
+
+
+def _run_line(indices: Sequence[int]) -> list:
+    """
+    Solves the points of a chunk in order along the continuation axis,
+    starting every solve from the steps of its neighbour, see WarmStart.
+    Where the warm start did not work, the breakdown is reported. After
+    a failed point, the line starts again from scratch.
+    """
+    model, base, axes, reducer, solve_options, continuation = _task
+    shape = tuple(len(values) for values in axes.values())
+    axis = list(axes).index(continuation)
+
+    # Order the points line by line, each line along the axis.
+    positions = np.array(np.unravel_index(np.asarray(indices, dtype=int), shape)).T
+    keys = [tuple(np.delete(position, axis)) + (position[axis],) for position in positions]
+    order = sorted(range(len(indices)), key=keys.__getitem__)
+
+    results = []
+    line = previous = None
+    for i in order:
+        index = indices[i]
+        start = time.perf_counter()
+        sol = None
+        if keys[i][:-1] != line:
+            line, previous = keys[i][:-1], None
+        warm_start = WarmStart(previous)
+        try:
+            sol = _solve(model, grid_point(base, axes, index), dict(solve_options or {}, warm_start=warm_start))
+            value = reducer(sol)
+            previous = warm_start
+            results.append((index, value, None, warm_start.breakdown,
+                            _point_stats(sol, time.perf_counter() - start, False)))
+        except Exception as e:
+            previous = None
+            results.append((index, None, _message(e), None,
+                            _point_stats(sol, time.perf_counter() - start, True)))
+    return results
+
+
+def _message(e: Exception) -> str:
+    return ''.join(traceback.format_exception_only(type(e), e)).strip()
+
+
+def sweep(model: type,
+          base: Mapping[str, Any],
+          grid: Mapping[Hashable, Sequence[float]],
+          reducer: Callable,
+          processes: int = None,
+          chunksize: int = None,
+          solve_options: Mapping[str, Any] = None,
+          progress: bool = False,
+          store: str = None,
+          store_chunks: Sequence[int] = None,
+          continuation: Hashable = None,
+          metrics: str = None,
+          dtype: Any = float,
+          ) -> SweepResult:
+    """
+    Solves a model over a parameter grid in a pool of worker processes.
+
+    Parameters
+    ----------
+    model : type
+        The model class, e.g. HydrogenFusion.
+    base : Mapping[str, Any]
+        Keyword arguments of the model that stay fixed over the sweep.
+    grid : Mapping[Hashable, Sequence[float]]
+        The swept parameters, see grid_point. The sweep covers all
+        combinations, the first parameter being the slowest varying.
+    reducer : Callable
+        Maps the solution of one point to the quantity to keep.
+    processes : int, optional
+        Number of worker processes, by default one per core. With 1 the
+        sweep runs in this process.
+    chunksize : int, optional
+        Number of grid points handed to a worker at once. By default
+        every worker gets about four chunks.
+    solve_options : Mapping[str, Any], optional
+        Keyword arguments for the solve method of the model.
+    progress : bool
+        Print the number of finished points, the throughput and the
+        estimated time left as the sweep goes.
+    store : str, optional
+        Directory of a SweepStore to write the results into, chunk by
+        chunk as they finish. If it already holds this sweep, only the
+        missing chunks are solved, so an interrupted sweep resumes.
+    store_chunks : Sequence[int], optional
+        Chunk shape over the grid for the store. By default a chunk holds
+        about chunksize points.
+    continuation : Hashable, optional
+        A key of grid to continue along. The points are then solved line
+        by line along this parameter, each solve starting from the steps,
+        Jacobian and LU factors of the previous point, see
+        continuation.WarmStart, and chunks always hold whole lines.
+        Points where this did not work are listed in the breakdowns of
+        the result. The solve method of the model must pass its options
+        on to solvestats.solve_ivp, and these solves bypass the solution
+        cache.
+    metrics : str, optional
+        File to keep the progress and the summed solve statistics in, in
+        the Prometheus text format, e.g. for the textfile collector of a
+        local node exporter. It is rewritten at most once a second.
+    dtype : Any
+        Floating point type of the values, e.g. np.float32 to halve the
+        memory of large sweeps. The values are gathered into one array,
+        allocated once the first point shows the shape of a value, so
+        the memory of a sweep is that of its reduced values; keep it
+        small with reducers such as Trajectories and Final.
+
+    Returns
+    -------
+    SweepResult
+        The reduced values in grid order, the errors of failed points and
+        the solve statistics of every point. With a store, values is the
+        SweepStore itself, which reads slices from disk on indexing.
+        Values that do not form a numeric array are kept in an object
+        array over the grid.
+
+    Notes
+    -----
+    Where available, workers are started with fork, so the model, the
+    reducer and the base arguments are inherited instead of pickled and
+    the reducer may be a lambda. Elsewhere they must be picklable. The
+    workers only use the solution cache where its disk tier is on, see
+    solvecache.use_disk.
+    """
+    axes = {key: np.asarray(values) for key, values in grid.items()}
+    shape = tuple(len(values) for values in axes.values())
+    total = math.prod(shape)
+    processes = processes or multiprocessing.cpu_count()
+    chunksize = chunksize or max(1, math.ceil(total / (4 * processes)))
+    _check_dtype(dtype)
+
+    if continuation is not None:
+        if continuation not in axes:
+            raise ValueError(f"The continuation axis {continuation!r} is not swept.")
+        # Every chunk holds whole lines along the continuation axis.
+        axis = list(axes).index(continuation)
+        if store_chunks is not None and store_chunks[axis] < shape[axis]:
+            raise ValueError("Store chunks must span the whole continuation axis.")
+        line = shape[axis]
+        chunksize = max(chunksize, line)
+        store_chunks = store_chunks or tuple(line if i == axis else 1 for i in range(len(shape)))
+
+    if store is None:
+        writer = None
+        tasks = [(None, indices) for indices in _chunks(shape, chunksize, continuation, axes)]
+        collector = _Collector(total, dtype)
+    else:
+        writer = _StoreWriter(store, axes, store_chunks or _default_chunks(shape, chunksize), dtype)
+        tasks = writer.tasks()
+    breakdowns = {}
+    stats = np.full(total, np.nan, dtype=STATS_DTYPE)
+    stats['cached'] = False
+    monitor = _Monitor(model.__name__, sum(len(indices) for _, indices in tasks), progress, metrics)
+
+    def collect(chunk, chunk_results):
+        if writer is None:
+            collector.collect(chunk_results)
+        else:
+            writer.collect(chunk, chunk_results)
+        breakdowns.update((index, note) for index, _, _, note, _ in chunk_results if note is not None)
+        for index, _, _, _, point in chunk_results:
+            stats[index] = point
+        monitor.update(chunk_results)
+
+    _execute(tasks, (model, base, axes, reducer, solve_options, continuation), processes, collect)
+    monitor.finish()
+
+    stats = stats.reshape(shape)
+    if writer is not None:
+        values = writer.finish()
+        return SweepResult(axes, values, values.errors, breakdowns, stats, monitor.elapsed)
+    return SweepResult(axes, collector.finish(shape), collector.errors, breakdowns, stats, monitor.elapsed)
+
+
+def stream(model: type,
+           base: Mapping[str, Any],
+           grid: Mapping[Hashable, Sequence[float]],
+           reducer: Callable,
+           processes: int = None,
+           chunksize: int = None,
+           solve_options: Mapping[str, Any] = None,
+           continuation: Hashable = None,
+           ordered: bool = False,
+           max_pending: int = None,
+           ) -> Iterator[SweepPoint]:
+    """
+    Solves a model over a parameter grid like sweep, but yields the points
+    one by one as they finish, so that later stages, e.g. fits, plots or
+    writes to disk, can be chained on as generators and start on the
+    first results while the sweep goes on. Nothing is gathered, the
+    memory is that of the chunks in flight.
+
+    Parameters
+    ----------
+    ordered : bool
+        Yield the points in grid order, or with a continuation line by
+        line along it, instead of as they finish. Finished chunks then
+        wait for the ones before them.
+    max_pending : int, optional
+        Number of chunks handed to the workers or finished but not yet
+        consumed at a time, by default two per worker. Workers only get
+        new chunks as the points are consumed, so a slow consumer holds
+        the sweep back instead of piling up results.
+    model, base, grid, reducer, processes, chunksize, solve_options, continuation
+        As in sweep.
+
+    Yields
+    ------
+    SweepPoint
+        The reduced value, error and solve statistics of every point.
+        Failed points are yielded too, with their error.
+
+    Notes
+    -----
+    Closing the generator early cancels the chunks that have not started.
+    """
+    axes = {key: np.asarray(values) for key, values in grid.items()}
+    shape = tuple(len(values) for values in axes.values())
+    total = math.prod(shape)
+    processes = processes or multiprocessing.cpu_count()
+    chunksize = chunksize or max(1, math.ceil(total / (4 * processes)))
+    if continuation is not None:
+        if continuation not in axes:
+            raise ValueError(f"The continuation axis {continuation!r} is not swept.")
+        chunksize = max(chunksize, shape[list(axes).index(continuation)])
+    if max_pending is not None and max_pending < 1:
+        raise ValueError("max_pending must allow at least one chunk.")
+
+    tasks = [(None, indices) for indices in _chunks(shape, chunksize, continuation, axes)]
+    chunks = _stream(tasks, (model, base, axes, reducer, solve_options, continuation), processes,
+                     ordered, max_pending or 2 * processes)
+    for _, chunk_results in chunks:
+        if ordered and continuation is None:
+            chunk_results = sorted(chunk_results, key=lambda result: result[0])
+        for index, value, error, breakdown, point in chunk_results:
+            position = np.unravel_index(index, shape)
+            yield SweepPoint(index, {key: values[i] for (key, values), i in zip(axes.items(), position)},
+                             value, error, breakdown, dict(zip(STATS_DTYPE.names, point)))
+
+
+def sweep_points(model: type,
+                 base: Mapping[str, Any],
+                 points: Sequence[Mapping[Hashable, Any]],
+                 reducer: Callable,
+                 processes: int = None,
+                 chunksize: int = None,
+                 solve_options: Mapping[str, Any] = None,
+                 dtype: Any = float,
+                 pool: ProcessPoolExecutor = None,
+                 ) -> tuple:
+    """
+    Solves a model at a list of scattered parameter points in a pool of
+    worker processes, e.g. the points an adaptive sampler asks for.
+
+    Parameters
+    ----------
+    points : Sequence[Mapping[Hashable, Any]]
+        The parameter values of every point, keyed as the grid of sweep.
+    model, base, reducer, processes, chunksize, solve_options, dtype
+        As in sweep.
+    pool : ProcessPoolExecutor, optional
+        A pool of worker_pool to solve in instead of a new one, so that
+        repeated calls, like the rounds of adaptive.sample, start their
+        workers only once. processes then only sets the chunksize.
+
+    Returns
+    -------
+    tuple
+        The reduced values stacked as in sweep, with shape (n_points,) +
+        the shape of a single value, and the errors of the failed points.
+    """
+    points = list(points)
+    total = len(points)
+    processes = processes or multiprocessing.cpu_count()
+    chunksize = chunksize or max(1, math.ceil(total / (4 * processes)))
+    _check_dtype(dtype)
+    tasks = [(None, range(start, min(start + chunksize, total)))
+             for start in range(0, total, chunksize)]
+    collector = _Collector(total, dtype)
+
+    def collect(chunk, chunk_results):
+        collector.collect(chunk_results)
+
+    if pool is None:
+        _execute(tasks, (model, base, points, reducer, solve_options, None), processes, collect)
+        return collector.finish((total,)), collector.errors
+    # Every chunk carries its own points, the workers outlive this call.
+    futures = [pool.submit(_run_points, (model, base, points[indices.start:indices.stop], reducer,
+                                         solve_options, None), indices.start)
+               for _, indices in tasks]
+    try:
+        for future in as_completed(futures):
+            collect(None, future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+    return collector.finish((total,)), collector.errors
+
+
+def worker_pool(processes: int = None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    A pool of worker processes for the solves of sweeps, which the callers
+    shut down, e.g. by using it in a with statement. Without initargs, it
+    can be shared by several calls of sweep_points.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    return ProcessPoolExecutor(processes or multiprocessing.cpu_count(), mp_context=context,
+                               initializer=_init_pool_worker, initargs=initargs)
+
+
+def _execute(tasks: list, initargs: tuple, processes: int, collect: Callable) -> None:
+    """
+    Runs the (chunk, indices) tasks in this process or in a pool of
+    workers set up with initargs, collecting the results as they finish.
+    """
+    for chunk, chunk_results in _stream(tasks, initargs, processes):
+        collect(chunk, chunk_results)
+
+
+def _stream(tasks: list, initargs: tuple, processes: int, ordered: bool = False,
+            max_pending: int = None) -> Iterator[tuple]:
+    """
+    Runs the (chunk, indices) tasks like _execute, yielding (chunk,
+    results) pairs as they finish, or in the order of tasks if ordered.
+    With max_pending, at most that many chunks are submitted or finished
+    but not yet yielded at a time.
+    """
+    if processes == 1:
+        _init_worker(*initargs)
+        for chunk, indices in tasks:
+            yield chunk, _run_chunk(indices)
+        return
+    if not tasks:
+        return
+    limit = max_pending or len(tasks)
+    pool = worker_pool(processes, initargs)
+    pending = {}
+    finished = {}
+    queue = iter(enumerate(tasks))
+    following = 0
+    try:
+        while True:
+            # Only hand out new chunks as the finished ones are consumed.
+            while len(pending) + len(finished) < limit:
+                position, (_, indices) = next(queue, (None, (None, None)))
+                if position is None:
+                    break
+                pending[pool.submit(_run_chunk, indices)] = position
+            if not pending and not finished:
+                break
+            if pending and not (ordered and following in finished):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = pending.pop(future)
+                    finished[position] = (tasks[position][0], future.result())
+            if ordered:
+                while following in finished:
+                    yield finished.pop(following)
+                    following += 1
+            else:
+                for position in list(finished):
+                    yield finished.pop(position)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _Monitor:
+    def __init__(self, name: str, todo: int, progress: bool, metrics: str = None,
+                 interval: float = 1.0) -> None:
+        """
+        Follows a sweep as its points finish, reporting the throughput and
+        the time left and keeping the metrics file up to date.
+        """
+        self.name = name
+        self.todo = todo
+        self.progress = progress
+        self.metrics = metrics
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.written = -math.inf
+        self.done = 0
+        self.failed = 0
+        self.cached = 0
+        self.totals = dict.fromkeys(SolveStats.FIELDS, 0.0)
+        del self.totals['status']
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def throughput(self) -> float:
+        """
+        Finished points per second.
+        """
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float:
+        """
+        Estimated seconds until the sweep is done.
+        """
+        throughput = self.throughput
+        return (self.todo - self.done) / throughput if throughput > 0 else math.inf
+
+    def update(self, chunk_results: list) -> None:
+        for _, _, error, _, point in chunk_results:
+            self.done += 1
+            self.failed += error is not None
+            self.cached += bool(point[-1])
+            for name, value in zip(SolveStats.FIELDS, point):
+                if name in self.totals and not math.isnan(value) and (name == 'wall_time' or not point[-1]):
+                    self.totals[name] += value
+        if self.progress:
+            print(f"Progress: {self.done}/{self.todo}, {self.throughput:.1f} points/s, "
+                  f"ETA {_duration(self.eta)}")
+        if self.metrics and time.perf_counter() - self.written >= self.interval:
+            self._write()
+
+    def finish(self) -> None:
+        if self.metrics:
+            self._write()
+
+    def _write(self) -> None:
+        """
+        Writes the metrics file, replacing it at once so that a scraper
+        never reads half of it.
+        """
+        label = f'model="{self.name}"'
+        eta = self.eta
+        lines = [
+            '# HELP mod105_sweep_points Points of the running sweep, by state.',
+            '# TYPE mod105_sweep_points gauge',
+            f'mod105_sweep_points{{{label},state="planned"}} {self.todo}',
+            f'mod105_sweep_points{{{label},state="done"}} {self.done}',
+            f'mod105_sweep_points{{{label},state="failed"}} {self.failed}',
+            f'mod105_sweep_points{{{label},state="cached"}} {self.cached}',
+            '# TYPE mod105_sweep_elapsed_seconds gauge',
+            f'mod105_sweep_elapsed_seconds{{{label}}} {self.elapsed:.6g}',
+            '# TYPE mod105_sweep_throughput_points_per_second gauge',
+            f'mod105_sweep_throughput_points_per_second{{{label}}} {self.throughput:.6g}',
+            '# TYPE mod105_sweep_eta_seconds gauge',
+            f'mod105_sweep_eta_seconds{{{label}}} {eta if math.isfinite(eta) else "+Inf"}',
+            '# HELP mod105_sweep_solve_seconds_total Summed wall time of the finished points.',
+            '# TYPE mod105_sweep_solve_seconds_total counter',
+            f'mod105_sweep_solve_seconds_total{{{label}}} {self.totals["wall_time"]:.6g}',
+            '# TYPE mod105_sweep_evaluations_total counter',
+        ]
+        lines += [f'mod105_sweep_evaluations_total{{{label},kind="{name}"}} {self.totals[name]:.0f}'
+                  for name in ('nfev', 'njev', 'nlu')]
+        lines += ['# TYPE mod105_sweep_steps_total counter',
+                  f'mod105_sweep_steps_total{{{label},kind="accepted"}} {self.totals["steps"]:.0f}',
+                  f'mod105_sweep_steps_total{{{label},kind="rejected"}} {self.totals["rejected"]:.0f}']
+        temporary = f'{self.metrics}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(temporary, self.metrics)
+        except OSError:
+            return
+        self.written = time.perf_counter()
+
+
+def _duration(seconds: float) -> str:
+    if not math.isfinite(seconds):
+        return '?'
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def _chunks(shape: Sequence[int], size: int, continuation: Hashable, axes: Mapping) -> list:
+    """
+    Splits the flat grid indices into chunks of about size points. With a
+    continuation axis, a chunk holds whole lines along it.
+    """
+    total = math.prod(shape)
+    if continuation is None:
+        return [range(start, min(start + size, total)) for start in range(0, total, size)]
+    axis = list(axes).index(continuation)
+    lines = np.moveaxis(np.arange(total).reshape(shape), axis, -1).reshape(-1, shape[axis])
+    per_chunk = max(1, size // shape[axis])
+    return [lines[start:start + per_chunk].ravel().tolist()
+            for start in range(0, len(lines), per_chunk)]
+
+
+class _StoreWriter:
+    def __init__(self, path: str, axes: Mapping[Hashable, np.ndarray], chunks: Sequence[int],
+                 dtype: Any = float) -> None:
+        """
+        Writes the chunks of a sweep into a SweepStore as they finish.
+        The store is created once the first value shows its shape.
+        """
+        self.path = path
+        self.shape = tuple(len(values) for values in axes.values())
+        self.chunks = tuple(chunks)
+        self.dtype = dtype
+        self.attrs = {'axes': [[repr(key), values.tolist()] for key, values in axes.items()]}
+        self.pending = []
+
+        self.store = None
+        if SweepStore.exists(path):
+            self.store = SweepStore(path)
+            if (self.store.attrs.get('axes') != self.attrs['axes']
+                    or self.store.chunks[:len(self.shape)] != self.chunks):
+                raise ValueError(f"The store at {path} holds a different sweep.")
+
+    def tasks(self) -> list:
+        """
+        The (chunk, flat indices) pairs that still have to be solved.
+        """
+        tasks = []
+        layout = [range(-(-n // c)) for n, c in zip(self.shape, self.chunks)]
+        for chunk in itertools.product(*layout):
+            if self.store is not None and self._full(chunk) in self.store.completed:
+                continue
+            ranges = [np.arange(i * c, min((i + 1) * c, n))
+                      for i, c, n in zip(chunk, self.chunks, self.shape)]
+            indices = np.ravel_multi_index(np.meshgrid(*ranges, indexing='ij'), self.shape)
+            tasks.append((chunk, indices.ravel().tolist()))
+        return tasks
+
+    def collect(self, chunk: tuple, chunk_results: list) -> None:
+        self.pending.append((chunk, chunk_results))
+        if self.store is None:
+            values = [value for _, value, error, _, _ in chunk_results if error is None]
+            if not values:
+                return
+            sample = np.asarray(values[0], dtype=self.dtype)
+            self.store = SweepStore.create(self.path, self.shape + sample.shape,
+                                           self.chunks, dtype=self.dtype, attrs=self.attrs)
+        for chunk, chunk_results in self.pending:
+            self._write(chunk, chunk_results)
+        self.pending = []
+
+    def finish(self) -> SweepStore:
+        if self.store is None:
+            # Every point failed, so there is no value shape to go by.
+            self.store = SweepStore.create(self.path, self.shape, self.chunks,
+                                           dtype=self.dtype, attrs=self.attrs)
+        for chunk, chunk_results in self.pending:
+            self._write(chunk, chunk_results)
+        self.pending = []
+        return self.store
+
+    def _full(self, chunk: tuple) -> tuple:
+        """
+        The store index of a grid chunk, which spans all value dimensions.
+        """
+        return chunk + (0,) * (self.store.ndim - len(chunk))
+
+    def _write(self, chunk: tuple, chunk_results: list) -> None:
+        region = tuple(s.stop - s.start for s in self.store.chunk_slices(self._full(chunk)))
+        data = np.full((len(chunk_results),) + self.store.shape[len(self.shape):], np.nan,
+                       dtype=self.store.dtype)
+        errors = {}
+        for i, (index, value, error, _, _) in enumerate(sorted(chunk_results, key=lambda result: result[0])):
+            if error is None:
+                data[i] = value
+            else:
+                errors[index] = error
+        self.store.write_chunk(self._full(chunk), data.reshape(region), errors)
+
+
+def _default_chunks(shape: Sequence[int], size: int) -> tuple:
+    """
+    A chunk shape over the grid holding about size points, splitting the
+    leading, slowest varying axes first.
+    """
+    chunks = [1] * len(shape)
+    points = 1
+    for axis in reversed(range(len(shape))):
+        chunks[axis] = max(1, min(shape[axis], size // points))
+        points *= chunks[axis]
+        if chunks[axis] < shape[axis]:
+            break
+    return tuple(chunks)
+
+
+def _check_dtype(dtype: Any) -> None:
+    if np.dtype(dtype).kind != 'f':
+        raise ValueError(f"The values of a sweep need a floating point type for NaN, not {np.dtype(dtype)}.")
+
+
+class _Collector:
+    def __init__(self, total: int, dtype: Any = float) -> None:
+        """
+        Gathers the reduced values of a sweep straight into one array
+        over the flat grid as the chunks finish, filling the failed points
+        with NaN. The array is allocated once the first value shows its
+        shape. Values that do not form a numeric array of that shape are
+        kept in an object array instead.
+        """
+        self.total = total
+        self.dtype = np.dtype(dtype)
+        self.values = None
+        self.objects = None
+        self.filled = np.zeros(total, dtype=bool)
+        self.errors = {}
+
+    def collect(self, chunk_results: list) -> None:
+        for index, value, error, _, _ in chunk_results:
+            if error is not None:
+                self.errors[index] = error
+            elif self.objects is None:
+                try:
+                    if self.values is None:
+                        sample = np.asarray(value, dtype=self.dtype)
+                        self.values = np.full((self.total,) + sample.shape, np.nan, dtype=self.dtype)
+                    self.values[index] = value
+                    self.filled[index] = True
+                except (TypeError, ValueError):
+                    self._objects()
+                    self.objects[index] = value
+            else:
+                self.objects[index] = value
+
+    def finish(self, shape: Sequence[int]) -> np.ndarray:
+        shape = tuple(shape)
+        if self.objects is not None:
+            return self.objects.reshape(shape)
+        if self.values is None:
+            return np.full(shape, np.nan, dtype=self.dtype)
+        return self.values.reshape(shape + self.values.shape[1:])
+
+    def _objects(self) -> None:
+        """
+        Moves the values gathered so far into an object array.
+        """
+        self.objects = np.empty(self.total, dtype=object)
+        if self.values is not None:
+            for index in np.flatnonzero(self.filled):
+                self.objects[index] = self.values[index]
+        self.values = None
@@ -0,0 +1,227 @@
+"""
+A chunked N-D array store on disk for the results of large sweeps.
+Every chunk is its own .npy file and a manifest records which chunks are
+complete, so an interrupted sweep resumes where it stopped and slices
+are read back without loading the whole array.
+"""
+import itertools
+import json
+import os
+import numpy as np
+from typing import Any, Iterable, Mapping
+
+MANIFEST = 'manifest.json'
+
+
+class SweepStore:
+    def __init__(self, path: str) -> None:
+        """
+        Opens an existing store. Use SweepStore.create for a new one.
+
+        Parameters
+        ----------
+        path : str
+            The directory of the store.
+        """
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.shape = tuple(manifest['shape'])
+        self.chunks = tuple(manifest['chunks'])
+        self.dtype = np.dtype(manifest['dtype'])
+        self.attrs = manifest['attrs']
+        self.completed = {tuple(chunk) for chunk in manifest['completed']}
+        self.errors = {int(index): message for index, message in manifest['errors'].items()}
+
+    @classmethod
+    def create(cls,
+               path: str,
+               shape: Iterable[int],
+               chunks: Iterable[int],
+               dtype: Any = float,
+               attrs: Mapping[str, Any] = None,
+               ) -> 'SweepStore':
+        """
+        Creates a new, empty store.
+
+        Parameters
+        ----------
+        path : str
+            The directory of the store. It must not hold a store yet.
+        shape : Iterable[int]
+            Shape of the whole array.
+        chunks : Iterable[int]
+            Shape of a single chunk. Trailing dimensions that are not given
+            are not split, e.g. the values of every grid point.
+        dtype : Any
+            Data type of the array.
+        attrs : Mapping[str, Any], optional
+            JSON serializable metadata, e.g. the axes of the sweep.
+        """
+        shape = tuple(int(n) for n in shape)
+        chunks = tuple(int(n) for n in chunks)
+        chunks = chunks + shape[len(chunks):]
+        if len(chunks) != len(shape) or min(chunks, default=1) < 1:
+            raise ValueError(f"Chunks {chunks} do not fit the shape {shape}.")
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            raise FileExistsError(f"There already is a store at {path}.")
+
+        os.makedirs(path, exist_ok=True)
+        _write_manifest(path, {'shape': shape, 'chunks': chunks, 'dtype': np.dtype(dtype).str,
+                               'attrs': dict(attrs or {}), 'completed': [], 'errors': {}})
+        return cls(path)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """
+        Returns True if there is a store at the given path.
+        """
+        return os.path.exists(os.path.join(path, MANIFEST))
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def grid(self) -> tuple:
+        """
+        Number of chunks along every dimension.
+        """
+        return tuple(-(-n // c) for n, c in zip(self.shape, self.chunks))
+
+    @property
+    def complete(self) -> bool:
+        """
+        True once every chunk has been written.
+        """
+        return len(self.completed) == int(np.prod(self.grid))
+
+    def chunk_indices(self) -> list:
+        """
+        The indices of all chunks, in C order.
+        """
+        return list(itertools.product(*(range(n) for n in self.grid)))
+
+    def missing(self) -> list:
+        """
+        The indices of the chunks that have not been written yet.
+        """
+        return [chunk for chunk in self.chunk_indices() if chunk not in self.completed]
+
+    def chunk_slices(self, chunk: Iterable[int]) -> tuple:
+        """
+        The region of the whole array covered by a chunk.
+        """
+        return tuple(slice(i * c, min((i + 1) * c, n))
+                     for i, c, n in zip(chunk, self.chunks, self.shape))
+
+    def write_chunk(self, chunk: Iterable[int], data: np.ndarray,
+                    errors: Mapping[int, str] = None) -> None:
+        """
+        Writes one chunk and marks it complete in the manifest.
+
+        Parameters
+        ----------
+        chunk : Iterable[int]
+            Index of the chunk.
+        data : np.ndarray
+            The values of the chunk, with the shape of its region.
+        errors : Mapping[int, str], optional
+            Error messages of failed points inside the chunk.
+        """
+        chunk = tuple(chunk)
+        region = tuple(s.stop - s.start for s in self.chunk_slices(chunk))
+        data = np.asarray(data, dtype=self.dtype)
+        if data.shape != region:
+            raise ValueError(f"Chunk {chunk} has shape {region}, got {data.shape}.")
+
+        path = self._chunk_path(chunk)
+        temporary = f'{path}.tmp.npy'
+        np.save(temporary, data)
+        os.replace(temporary, path)
+
+        # Only mark the chunk complete once its data is safely on disk.
+        self.completed.add(chunk)
+        self.errors.update({int(index): message for index, message in (errors or {}).items()})
+        self._flush()
+
+    def read_chunk(self, chunk: Iterable[int]) -> np.ndarray:
+        """
+        Returns a chunk as a read-only memory map, or None if it is missing.
+        """
+        chunk = tuple(chunk)
+        if chunk not in self.completed:
+            return None
+        return np.load(self._chunk_path(chunk), mmap_mode='r')
+
+    def __getitem__(self, key) -> np.ndarray:
+        """
+        Reads a region of the array with integer and slice indexing. Only
+        the chunks overlapping the region are touched; missing chunks read
+        as NaN.
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+        if Ellipsis in key:
+            i = key.index(Ellipsis)
+            key = key[:i] + (slice(None),) * (self.ndim - len(key) + 1) + key[i + 1:]
+        key = key + (slice(None),) * (self.ndim - len(key))
+        if len(key) != self.ndim:
+            raise IndexError(f"Too many indices for a store of dimension {self.ndim}.")
+
+        selections = []
+        for k, n in zip(key, self.shape):
+            if isinstance(k, slice):
+                selections.append(np.arange(n)[k])
+            else:
+                selections.append(np.atleast_1d(np.arange(n)[k]))
+
+        fill = np.nan if self.dtype.kind in 'fc' else 0
+        out = np.full(tuple(len(s) for s in selections), fill, dtype=self.dtype)
+
+        # Group the selected indices of every dimension by chunk.
+        groups = []
+        for selection, c in zip(selections, self.chunks):
+            owners = selection // c
+            groups.append([(owner, np.nonzero(owners == owner)[0]) for owner in np.unique(owners)])
+
+        for combination in itertools.product(*groups):
+            chunk = tuple(int(owner) for owner, _ in combination)
+            data = self.read_chunk(chunk)
+            if data is None:
+                continue
+            positions = [where for _, where in combination]
+            local = [selection[where] - owner * c for (owner, where), selection, c
+                     in zip(combination, selections, self.chunks)]
+            out[np.ix_(*positions)] = data[np.ix_(*local)]
+
+        # Integer indices drop their dimension, as with NumPy arrays.
+        drop = tuple(i for i, k in enumerate(key) if not isinstance(k, slice))
+        return out.reshape(tuple(n for i, n in enumerate(out.shape) if i not in drop))
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        array = self[...]
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self) -> str:
+        return (f"SweepStore({self.path!r}, shape={self.shape}, chunks={self.chunks}, "
+                f"completed={len(self.completed)}/{int(np.prod(self.grid))})")
+
+    def _chunk_path(self, chunk: tuple) -> str:
+        return os.path.join(self.path, 'c' + '_'.join(str(i) for i in chunk) + '.npy')
+
+    def _flush(self) -> None:
+        _write_manifest(self.path, {'shape': self.shape, 'chunks': self.chunks,
+                                    'dtype': self.dtype.str, 'attrs': self.attrs,
+                                    'completed': sorted(self.completed),
+                                    'errors': {str(i): m for i, m in sorted(self.errors.items())}})
+
+
+def _write_manifest(path: str, manifest: dict) -> None:
+    """
+    Replaces the manifest atomically, so a crash never leaves it half written.
+    """
+    temporary = os.path.join(path, MANIFEST + '.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(temporary, os.path.join(path, MANIFEST))